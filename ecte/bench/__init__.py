@@ -0,0 +1,6 @@
+"""
+Benchmarks sem terminal das operações do editor e do custo de desenho.
+
+    python -m ecte.bench --quick -o antes.json
+    python -m ecte.bench --quick --compare antes.json
+"""
@@ -0,0 +1,54 @@
+import argparse
+import fnmatch
+import json
+import sys
+from pathlib import Path
+
+from ecte.bench.replay import replay_results
+from ecte.bench.runner import compare, load_report, result_key, run_all
+from ecte.bench.workloads import build_workloads
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m ecte.bench",
+                                     description="Benchmarks do editor sem terminal (resultado em JSON).")
+    parser.add_argument("--quick", action="store_true", help="Tamanhos e repetições menores (sem os arquivos de 1M de linhas)")
+    parser.add_argument("--only", metavar="PADRÃO", help="Roda só os benchmarks cujo nome casa com o padrão (ex.: 'main.draw*')")
+    parser.add_argument("--no-memory", action="store_true", help="Pula a passada com tracemalloc")
+    parser.add_argument("-o", "--output", type=Path, help="Grava o relatório JSON neste arquivo em vez da saída padrão")
+    parser.add_argument("--compare", type=Path, metavar="BASE.json", help="Compara com um relatório anterior")
+    parser.add_argument("--list", action="store_true", help="Lista os benchmarks e sai")
+    parser.add_argument("--replay", type=Path, nargs="+", metavar="TECLAS.jsonl",
+                        help="Reproduz gravações de teclas (--record / 'record' no console) e mede a latência por classe")
+    parser.add_argument("--no-sandbox", action="store_true", help="Na reprodução, abre os arquivos originais em vez de cópias")
+    args = parser.parse_args(argv)
+
+    workloads = [] if args.replay and not args.only else build_workloads(quick=args.quick)
+    if args.only:
+        workloads = [w for w in workloads if fnmatch.fnmatch(w.name, args.only)]
+
+    if args.list:
+        for workload in workloads:
+            print(f"{result_key({'name': workload.name, 'params': workload.params})}  ops={workload.ops}")
+        return 0
+
+    report = run_all(workloads, measure_memory=not args.no_memory,
+                     progress=lambda w: print(f"... {result_key({'name': w.name, 'params': w.params})}", file=sys.stderr))
+    for recording in args.replay or []:
+        print(f"... replay {recording}", file=sys.stderr)
+        report["results"].extend(replay_results(recording, sandbox=not args.no_sandbox))
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.compare:
+        for row in compare(load_report(args.compare), report):
+            print(row, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from ecte.bench.workloads import DrawHarness
+from ecte.latency import load_recording, read_key, tracker
+from ecte.virtual_screen import VirtualTerminal, installed
+
+
+class ReplayExhausted(Exception):
+    pass
+
+
+class _ReplayTerminal(VirtualTerminal):
+    """Terminal virtual cuja entrada é a gravação; acabar as teclas no meio de um prompt encerra a reprodução."""
+
+    def next_key(self) -> int:
+        if not self.input:
+            raise ReplayExhausted()
+        return self.input.popleft()
+
+
+def _prepare_files(header: dict, sandbox_dir: Path | None):
+    """Abre as mesmas abas da gravação; no modo sandbox, cópias delas, para Ctrl+S não tocar nos originais."""
+    paths = [Path(p) for p in header.get("tabs", []) if Path(p).is_file()]
+    active = header.get("active")
+    if sandbox_dir is None:
+        return paths, Path(active) if active else None, Path(header["project"]) if header.get("project") else None
+
+    copies = []
+    active_copy = None
+    for i, path in enumerate(paths):
+        target_dir = sandbox_dir / str(i)
+        target_dir.mkdir()
+        copy = target_dir / path.name
+        shutil.copy2(path, copy)
+        copies.append(copy)
+        if active and str(path) == active:
+            active_copy = copy
+    return copies, active_copy, sandbox_dir
+
+
+def replay(path: Path, sandbox: bool = True) -> dict:
+    """
+    Reproduz uma gravação de teclas sem terminal, na velocidade máxima, pelo mesmo
+    caminho do loop principal (draw → getch → handle_key). Retorna a latência por classe.
+    """
+    from ecte.key_handler import handle_key, keymap
+
+    header, events = load_recording(path)
+    height, width = header.get("size", [50, 160])
+    terminal = _ReplayTerminal(height, width)
+    terminal.push_keys(*(key for _, key in events))
+
+    with tempfile.TemporaryDirectory(prefix="ecte-replay-") as tmp:
+        files, active, project = _prepare_files(header, Path(tmp) if sandbox else None)
+        harness = DrawHarness([""], terminal=terminal)
+        editor = harness.editor
+        editor.tabs = []
+        editor.active_tab_index = -1
+        for file in files:
+            editor.open_file(file)
+        if not editor.tabs:
+            editor.new_file()
+        if active in files:
+            editor.active_tab_index = files.index(active)
+        if project and project.is_dir():
+            harness.sidebar.set_project_path(project)
+            harness.console.set_cwd(project)
+
+        keymap.reset()
+        keymap.apply(header.get("keymap", {})) # Os mesmos atalhos da sessão gravada
+        recorder, tracker.recorder = tracker.recorder, None # Nunca regrava a própria reprodução
+        tracker.reset()
+        status = ""
+        keys = 0
+        started = time.perf_counter()
+        try:
+            with installed(terminal):
+                while terminal.input:
+                    harness.frame(status)
+                    tracker.painted()
+                    key = read_key(harness.screen, record_timeouts=False)
+                    if key == -1:
+                        continue
+                    keys += 1
+                    tracker.key_read(key)
+                    try:
+                        result = handle_key(key, harness.screen, editor, harness.sidebar, harness.console,
+                                            harness.structbar, harness.help_window, harness.git_window,
+                                            harness.whats_new_window, harness.config_window)
+                    except ReplayExhausted:
+                        break
+                    if result == "exit":
+                        break
+                    if result:
+                        status = result
+                harness.frame(status)
+                tracker.painted()
+        finally:
+            tracker.recorder = recorder
+        elapsed = time.perf_counter() - started
+
+        return {
+            "session": Path(path).name,
+            "keys": keys,
+            "elapsed_s": round(elapsed, 3),
+            "keys_per_sec": round(keys / elapsed, 1) if elapsed else None,
+            "latency": tracker.report(),
+            "final_frame": terminal.digest(),
+        }
+
+
+def replay_results(path: Path, sandbox: bool = True) -> list:
+    """Resultados no mesmo formato dos benchmarks (um por classe de tecla), para --compare."""
+    outcome = replay(path, sandbox)
+    results = []
+    for key_class, summary in outcome["latency"].items():
+        results.append({
+            "name": "replay",
+            "params": {"session": outcome["session"], "class": key_class},
+            "ops": summary["count"],
+            "ops_per_sec": outcome["keys_per_sec"],
+            "mean_ms": summary["mean_ms"],
+            "p50_ms": summary["p50_ms"],
+            "p99_ms": summary["p99_ms"],
+            "max_ms": summary["max_ms"],
+        })
+    return results
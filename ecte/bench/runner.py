@@ -0,0 +1,127 @@
+import gc
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from pathlib import Path
+from typing import List, Optional
+
+MEMORY_OPS = 3 # Operações repetidas na passada com tracemalloc (que deixa tudo bem mais lento)
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _measure_time(workload) -> dict:
+    step = workload.setup()
+    timings = []
+    gc.collect()
+    started = time.perf_counter()
+    for _ in range(workload.ops):
+        t0 = time.perf_counter_ns()
+        step()
+        timings.append(time.perf_counter_ns() - t0)
+    elapsed = time.perf_counter() - started
+
+    timings.sort()
+    result = {
+        "ops": workload.ops,
+        "ops_per_sec": round(workload.ops / elapsed, 2) if elapsed else None,
+        "mean_ms": round(sum(timings) / len(timings) / 1e6, 4),
+        "p50_ms": round(percentile(timings, 0.50) / 1e6, 4),
+        "p99_ms": round(percentile(timings, 0.99) / 1e6, 4),
+        "max_ms": round(timings[-1] / 1e6, 4),
+    }
+    terminal = getattr(step, "terminal", None)
+    if terminal is not None and terminal.frames:
+        frames = terminal.frames
+        for field in ("calls", "cells_written", "cells_changed", "attr_changes"):
+            result[f"{field}_per_frame"] = round(sum(getattr(f, field) for f in frames) / len(frames), 1)
+    return result
+
+
+def _measure_memory(workload) -> dict:
+    """Pico de memória alocada em Python: na preparação e durante as operações."""
+    tracemalloc.start()
+    try:
+        step = workload.setup()
+        setup_current, setup_peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for _ in range(min(MEMORY_OPS, workload.ops)):
+            step()
+        _, ops_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "setup_peak_kb": setup_peak // 1024,
+        "ops_peak_kb": max(0, ops_peak - setup_current) // 1024,
+    }
+
+
+def run_workload(workload, measure_memory: bool = True) -> dict:
+    result = {"name": workload.name, "params": workload.params}
+    try:
+        result.update(_measure_time(workload))
+        if measure_memory:
+            result.update(_measure_memory(workload))
+    finally:
+        workload.teardown()
+    return result
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=Path(__file__).parent, timeout=5, check=False)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return out.stdout.strip() or None
+
+
+def run_all(workloads, measure_memory: bool = True, progress=None) -> dict:
+    results = []
+    for workload in workloads:
+        if progress:
+            progress(workload)
+        results.append(run_workload(workload, measure_memory))
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+
+
+def result_key(result: dict) -> str:
+    params = ",".join(f"{k}={v}" for k, v in sorted(result["params"].items()))
+    return f"{result['name']}[{params}]"
+
+
+def compare(baseline: dict, current: dict) -> List[str]:
+    """Tabela de texto com a variação de p50/p99 e ops/s entre dois relatórios JSON."""
+    base_by_key = {result_key(r): r for r in baseline.get("results", [])}
+    rows = [f"{'benchmark':<58} {'p50 ms':>12} {'p99 ms':>12} {'ops/s':>10}"]
+    for result in current["results"]:
+        key = result_key(result)
+        base = base_by_key.get(key)
+        if not base:
+            rows.append(f"{key:<58} {'(novo)':>12}")
+            continue
+
+        def delta(field):
+            old, new = base.get(field), result.get(field)
+            if not old or new is None:
+                return "-"
+            return f"{(new - old) / old * 100:+.1f}%"
+        rows.append(f"{key:<58} {delta('p50_ms'):>12} {delta('p99_ms'):>12} {delta('ops_per_sec'):>10}")
+    return rows
+
+
+def load_report(path: Path) -> dict:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
@@ -0,0 +1,254 @@
+import random
+import tempfile
+from pathlib import Path
+from typing import Callable, List, NamedTuple
+
+from ecte.console import Console
+from ecte.config_window import ConfigWindow
+from ecte.editor import Buffer, Editor
+from ecte.execution_handler import search_in_project
+from ecte.git_window import GitWindow
+from ecte.help_window import HelpWindow
+from ecte.sidebar import Sidebar
+from ecte.structbar import Structbar
+from ecte.virtual_screen import VirtualTerminal, installed
+from ecte.whats_new_window import WhatsNewWindow
+
+SEED = 1337
+
+
+def python_source(line_count: int, seed: int = SEED) -> List[str]:
+    """Código Python sintético, determinístico, com classes, funções e comentários."""
+    rng = random.Random(seed)
+    lines = []
+    while len(lines) < line_count:
+        n = len(lines)
+        kind = rng.random()
+        if kind < 0.05:
+            lines.append(f"class Modelo{n}(Base):")
+            lines.append(f'    """Documentação da classe {n}."""')
+        elif kind < 0.25:
+            lines.append(f"def calcula_{n}(valor, fator={rng.randint(1, 9)}):")
+            lines.append(f"    resultado = valor * fator + {rng.randint(0, 999)}  # ajuste {n}")
+            lines.append("    return resultado")
+        elif kind < 0.35:
+            lines.append("")
+        else:
+            lines.append(f"    itens_{n} = [x for x in range({rng.randint(1, 99)}) if x % 3]")
+    return lines[:line_count]
+
+
+def tabbed_source(line_count: int) -> List[str]:
+    """python_source indentado com tabs e com comentários em CJK (larguras diferentes de 1)."""
+    return [line.replace("    ", "\t") + ("  # 変更 🚀" if i % 4 == 0 else "")
+            for i, line in enumerate(python_source(line_count))]
+
+
+def long_line(length: int) -> List[str]:
+    """Uma única linha enorme, como um JSON ou JS minificado."""
+    chunk = '{"id": 1, "nome": "item", "tags": ["a", "b"], "ativo": true},'
+    return ["[" + (chunk * (length // len(chunk) + 1))[:length] + "]"]
+
+
+def paste_text(line_count: int) -> str:
+    return "\n".join(python_source(line_count, seed=SEED + 1))
+
+
+def make_tree(root: Path, depth: int, fanout: int, files_per_dir: int, lines_per_file: int):
+    """Árvore de diretórios profunda com arquivos de texto em cada nível."""
+    content = "\n".join(python_source(lines_per_file)) + "\n"
+    pending = [(root, 0)]
+    while pending:
+        directory, level = pending.pop()
+        directory.mkdir(parents=True, exist_ok=True)
+        for i in range(files_per_dir):
+            (directory / f"modulo_{i}.py").write_text(content, encoding="utf-8")
+        if level < depth:
+            pending.extend((directory / f"pacote_{i}", level + 1) for i in range(fanout))
+
+
+def editor_with(lines: List[str], name: str = "bench.py") -> Editor:
+    editor = Editor()
+    buf = Buffer()
+    buf.filepath = Path(tempfile.gettempdir()) / name # Só o nome importa (lexer/estrutura); nada é salvo
+    buf.lines = lines
+    editor.tabs = [buf]
+    editor.active_tab_index = 0
+    return editor
+
+
+class Workload(NamedTuple):
+    name: str
+    params: dict
+    ops: int
+    setup: Callable # () -> passo: () -> None (uma operação medida)
+    teardown: Callable = lambda: None
+
+
+# --- Operações do editor ---
+
+def insert_char_setup(line_count: int):
+    def setup():
+        editor = editor_with(python_source(line_count))
+        buf = editor.active_buffer
+        buf.cursor_y = line_count // 2
+
+        def step():
+            editor.insert_char("x")
+        return step
+    return setup
+
+
+def long_line_insert_setup(length: int):
+    def setup():
+        editor = editor_with(long_line(length), "bundle.min.js")
+        editor.active_buffer.cursor_x = length // 2
+
+        def step():
+            editor.insert_char("x")
+        return step
+    return setup
+
+
+def undo_setup(line_count: int, ops: int):
+    def setup():
+        editor = editor_with(python_source(line_count))
+        editor.active_buffer.cursor_y = line_count // 2
+        for _ in range(ops):
+            editor.insert_char("x")
+
+        def step():
+            editor.undo()
+        return step
+    return setup
+
+
+def paste_setup(line_count: int, paste_lines: int):
+    def setup():
+        editor = editor_with(python_source(line_count))
+        editor.active_buffer.cursor_y = line_count // 2
+        text = paste_text(paste_lines)
+
+        def step():
+            editor.insert_text_at_cursor(text)
+        return step
+    return setup
+
+
+def parse_code_setup(line_count: int):
+    def setup():
+        lines = python_source(line_count)
+        structbar = Structbar()
+
+        def step():
+            structbar.parse_code(lines, ".py")
+        return step
+    return setup
+
+
+class _ProjectTree:
+    def __init__(self, depth: int, fanout: int):
+        self.depth = depth
+        self.fanout = fanout
+        self._tmp = None
+
+    def setup(self):
+        self._tmp = tempfile.TemporaryDirectory(prefix="ecte-bench-")
+        root = Path(self._tmp.name)
+        make_tree(root, self.depth, self.fanout, files_per_dir=3, lines_per_file=200)
+
+        def step():
+            for _ in search_in_project(root, "resultado * fator + 42"):
+                pass
+        return step
+
+    def teardown(self):
+        if self._tmp:
+            self._tmp.cleanup()
+            self._tmp = None
+
+
+# --- Desenho ---
+
+class DrawHarness:
+    """Monta os componentes da interface como main() faz, mas sobre um terminal virtual."""
+
+    def __init__(self, lines: List[str], height: int = 50, width: int = 160,
+                 structbar: bool = False, name: str = "bench.py", terminal: VirtualTerminal = None):
+        self.terminal = terminal or VirtualTerminal(height, width)
+        self.screen = self.terminal.stdscr
+        self.editor = editor_with(lines, name)
+        self.sidebar = Sidebar()
+        self.sidebar.current_path = Path(tempfile.gettempdir()) # Sem pasta aberta, draw mostra a arte de boas-vindas
+        self.console = Console()
+        self.structbar = Structbar()
+        self.structbar.visible = structbar
+        self.help_window = HelpWindow()
+        self.git_window = GitWindow(self.screen, None)
+        self.whats_new_window = WhatsNewWindow()
+        self.config_window = ConfigWindow(self.editor)
+
+    def frame(self, status: str = ""):
+        from ecte.main import draw
+        with installed(self.terminal):
+            draw(self.screen, self.editor, self.sidebar, self.console, self.structbar, self.help_window,
+                 self.git_window, self.whats_new_window, self.config_window, status)
+
+
+def draw_setup(lines_factory: Callable[[], List[str]], scroll: bool = True, soft_wrap: bool = False):
+    def setup():
+        harness = DrawHarness(lines_factory())
+        harness.editor.set_soft_wrap(soft_wrap)
+        buf = harness.editor.active_buffer
+        line_count = len(buf.lines)
+        harness.frame() # Aquecimento: detecção do lexer e imports ficam fora da medição
+        harness.terminal.frames.clear()
+
+        def step():
+            if scroll: # Cada quadro mostra uma região diferente do arquivo
+                buf.cursor_y = (buf.cursor_y + 37) % line_count
+            harness.frame()
+        step.terminal = harness.terminal
+        return step
+    return setup
+
+
+def build_workloads(quick: bool = False) -> List[Workload]:
+    sizes = [1_000, 100_000] if quick else [1_000, 100_000, 1_000_000]
+    # Cada operação de edição copia o buffer para o undo: menos operações nos arquivos enormes
+    edit_ops = {1_000: 2000, 100_000: 100, 1_000_000: 10}
+    scale = 0.2 if quick else 1.0
+
+    def n(ops):
+        return max(3, int(ops * scale))
+
+    workloads = []
+    for size in sizes:
+        workloads.append(Workload("editor.insert_char", {"lines": size}, n(edit_ops[size]), insert_char_setup(size)))
+    line_length = 200_000 if quick else 1_000_000
+    workloads.append(Workload("editor.insert_char", {"long_line_chars": line_length}, n(2000),
+                              long_line_insert_setup(line_length)))
+    for size in sizes:
+        ops = n(edit_ops[size])
+        workloads.append(Workload("editor.undo", {"lines": size}, ops, undo_setup(size, ops)))
+    for paste_lines in ([1_000, 50_000] if quick else [1_000, 100_000]):
+        workloads.append(Workload("editor.insert_text_at_cursor", {"lines": 1_000, "paste_lines": paste_lines},
+                                  n(20), paste_setup(1_000, paste_lines)))
+    # A deduplicação de nomes em parse_code é quadrática no número de itens: 1M de linhas não termina em tempo útil
+    for size in [s for s in sizes if s <= 100_000]:
+        workloads.append(Workload("structbar.parse_code", {"lines": size}, n({1_000: 200, 100_000: 5}[size]),
+                                  parse_code_setup(size)))
+
+    tree = _ProjectTree(depth=3 if quick else 4, fanout=4)
+    workloads.append(Workload("search_in_project", {"depth": tree.depth, "fanout": tree.fanout, "files_per_dir": 3},
+                              n(10), tree.setup, tree.teardown))
+
+    for size in sizes:
+        workloads.append(Workload("main.draw", {"lines": size}, n(200), draw_setup(lambda size=size: python_source(size))))
+    workloads.append(Workload("main.draw", {"lines": sizes[-1], "soft_wrap": True}, n(200),
+                              draw_setup(lambda: python_source(sizes[-1]), soft_wrap=True)))
+    workloads.append(Workload("main.draw", {"lines": sizes[0], "tabs_wide_chars": True}, n(200),
+                              draw_setup(lambda: tabbed_source(sizes[0]))))
+    workloads.append(Workload("main.draw", {"long_line_chars": line_length}, n(200),
+                              draw_setup(lambda: long_line(line_length), scroll=False)))
+    return workloads
@@ -0,0 +1,190 @@
+import bisect
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from ecte.instrumentation import cache_hit, cache_miss
+
+DIRECTORY_CACHE_SIZE = 256 # Diretórios guardados
+DIRECTORY_REVALIDATE = 1.0 # Segundos em que uma listagem vale sem nem um stat (Tabs seguidos)
+PATH_REVALIDATE = 30.0 # Intervalo mínimo entre duas verificações dos diretórios do $PATH
+LISTING_LIMIT = 60 # Candidatos mostrados na saída do console
+
+
+class Entry(NamedTuple):
+    name: str
+    is_dir: bool
+
+
+def _is_dir(entry: os.DirEntry) -> bool:
+    try:
+        return entry.is_dir() # d_type do scandir: sem um stat por item
+    except OSError:
+        return False
+
+
+class DirectoryCache:
+    """
+    Listagens de diretório para o Tab do console. Uma listagem guardada é revalidada com um
+    único stat (mtime do diretório) em vez de listar tudo de novo e checar cada item, e nos
+    primeiros DIRECTORY_REVALIDATE segundos nem isso: Tabs seguidos não tocam o disco, o
+    que importa em sistemas de arquivos lentos ou de rede.
+    """
+
+    def __init__(self, max_entries: int = DIRECTORY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict() # Caminho -> (mtime_ns, verificado em, entradas)
+
+    def listing(self, path: Path) -> List[Entry]:
+        now = time.monotonic()
+        cached = self._entries.get(path)
+        if cached and now - cached[1] < DIRECTORY_REVALIDATE:
+            self._entries.move_to_end(path)
+            cache_hit("completar")
+            return cached[2]
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            if cached and cached[0] == mtime:
+                cache_hit("completar")
+                entries = cached[2]
+            else:
+                cache_miss("completar")
+                with os.scandir(path) as it:
+                    entries = sorted(Entry(entry.name, _is_dir(entry)) for entry in it)
+        except OSError:
+            self._entries.pop(path, None)
+            return []
+        self._entries[path] = (mtime, now, entries)
+        self._entries.move_to_end(path)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entries
+
+
+class PathIndex:
+    """
+    Nomes dos executáveis do $PATH, ordenados para busca por prefixo. O índice é montado
+    numa thread (a primeira vez quando o console abre) e refeito quando o PATH muda ou,
+    passados PATH_REVALIDATE segundos, quando o mtime de algum diretório dele mudou; só os
+    diretórios alterados são listados de novo. Enquanto isso o Tab usa o índice anterior.
+    """
+
+    def __init__(self):
+        self.names: List[str] = []
+        self._directories = {} # Diretório -> (mtime_ns, nomes)
+        self._path: Optional[str] = None
+        self._checked = 0.0
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self):
+        path = os.environ.get("PATH", "")
+        now = time.monotonic()
+        if self._thread is not None and self._thread.is_alive():
+            return
+        if path == self._path and now - self._checked < PATH_REVALIDATE:
+            return
+        self._path, self._checked = path, now
+        self._thread = threading.Thread(target=self._scan, args=(path,), name="ecte-path-index", daemon=True)
+        self._thread.start()
+
+    def _scan(self, path: str):
+        directories = {}
+        for directory in dict.fromkeys(filter(None, path.split(os.pathsep))): # Sem repetidos, na ordem
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+            cached = self._directories.get(directory)
+            if cached and cached[0] == mtime:
+                directories[directory] = cached
+                continue
+            names = []
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_file() and os.access(entry.path, os.X_OK):
+                                names.append(entry.name)
+                        except OSError:
+                            pass
+            except OSError:
+                continue
+            directories[directory] = (mtime, names)
+        self._directories = directories
+        self.names = sorted(set().union(*(names for _, names in directories.values())))
+
+    def candidates(self, prefix: str) -> List[str]:
+        self.refresh()
+        names = self.names
+        found = []
+        for i in range(bisect.bisect_left(names, prefix), len(names)):
+            if not names[i].startswith(prefix):
+                break
+            found.append(names[i])
+        return found
+
+
+class Completion(NamedTuple):
+    start: int # Trecho da linha que os candidatos substituem
+    end: int
+    head: int # Caracteres iniciais comuns a todos (o diretório), omitidos na listagem
+    candidates: List[str]
+
+
+def complete(line: str, cursor: int, cwd: Path, commands: Iterable[str]) -> Completion:
+    """
+    Candidatos para a palavra que termina no cursor: na primeira palavra, builtins, aliases
+    e executáveis do $PATH; nas demais (ou com '/', '.' ou '~'), caminhos, só diretórios
+    depois de 'cd'.
+    """
+    start = line.rfind(" ", 0, cursor) + 1
+    word = line[start:cursor]
+    before = line[:start].split()
+    if not before and "/" not in word and not word.startswith((".", "~")):
+        names = {name for name in commands if name.startswith(word)}
+        names.update(path_index.candidates(word))
+        return Completion(start, cursor, 0, sorted(names))
+
+    head = word[:word.rfind("/") + 1]
+    prefix = word[len(head):]
+    directory = cwd / Path(head).expanduser() if head else cwd
+    only_dirs = before == ["cd"]
+    candidates = [head + entry.name + ("/" if entry.is_dir else "")
+                  for entry in directory_cache.listing(directory)
+                  if entry.name.startswith(prefix) and (entry.is_dir or not only_dirs)]
+    return Completion(start, cursor, len(head), candidates)
+
+
+def listing_line(completion: Completion) -> str:
+    names = [candidate[completion.head:] for candidate in completion.candidates[:LISTING_LIMIT]]
+    extra = len(completion.candidates) - len(names)
+    return "  ".join(names) + (f"  … (+{extra})" if extra > 0 else "")
+
+
+class CompletionCycle:
+    """Tabs seguidos, sem editar a linha, trocam a palavra pelo próximo candidato."""
+
+    def __init__(self, line: str, completion: Completion, cursor: int):
+        self.line = line
+        self.completion = completion
+        word = line[completion.start:completion.end]
+        # Se a palavra já é um candidato ('python' entre 'python3'...), o próximo Tab vai para o seguinte
+        self.index = completion.candidates.index(word) if word in completion.candidates else -1
+        self.result: Tuple[str, int] = (line, cursor) # Linha e cursor depois do último Tab
+
+    def step(self, delta: int) -> Tuple[str, int]:
+        completion = self.completion
+        if self.index < 0 and delta < 0: # Shift+Tab logo de cara: o último
+            self.index = len(completion.candidates) - 1
+        else:
+            self.index = (self.index + delta) % len(completion.candidates)
+        text = completion.candidates[self.index]
+        self.result = (self.line[:completion.start] + text + self.line[completion.end:], completion.start + len(text))
+        return self.result
+
+
+directory_cache = DirectoryCache()
+path_index = PathIndex()
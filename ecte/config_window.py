@@ -10,23 +10,32 @@ class ConfigWindow:
 
         self.selected_option_index = 0
         self.scroll_offset = 0
+        self.version = 0 # Incrementada a cada alteração salva
         self.settings = {
             "Geral": {
                 "Suporte ao Mouse": ["Ativado", "Desativado"],
                 "Exibir Números de Linha": ["Ativado", "Desativado"],
+                "Restaurar Sessão": ["Ativado", "Desativado"],
+                "Orçamento de Memória das Abas": ["256 MB", "512 MB", "1024 MB", "64 MB", "128 MB"],
             },
             "Aparência": {
                 "Indicador de Linha Vazia (~)": ["Ativado", "Desativado"],
                 "Animação do Ponteiro": ["Ativado", "Desativado"],
                 "Destacar Linha com Erro": ["Desativado", "Ativado"],
+                "Quebra de Linha Suave": ["Desativado", "Ativado"],
             },
             "Edição": {
                 "Auto Indentação Inteligente": ["Ativado", "Desativado"],
                 "Autocompletar Tags HTML": ["Ativado", "Desativado"],
+                "Diário de Recuperação (Swap)": ["Ativado", "Desativado"],
             },
             "Navegação": {
                 "Modo de Navegação (Vim)": ["Padrão", "Vim (h,j,k,l)"],
             },
+            "Servidor Local": {
+                "Porta do Servidor Local": ["Automática", "8000", "8080", "5500", "3000"],
+                "Servir Arquivos .gz Pré-comprimidos": ["Ativado", "Desativado"],
+            },
         }
         self._discover_extensions()
         self._load_settings()
@@ -67,6 +76,7 @@ class ConfigWindow:
             name: values[0] for category in self.settings.values() for name, values in category.items()
         }
         self.config_file.write_text(json.dumps(settings_to_save, indent=4), encoding='utf-8')
+        self.version += 1
 
     def get_setting(self, setting_name: str) -> str:
         for category in self.settings.values():
@@ -1,9 +1,78 @@
+import signal
 import subprocess
 import shlex
-from threading import Thread
+import time
+from threading import Thread, Timer
 from pathlib import Path
 import os
 import json
+from typing import Callable, Optional
+try:
+    import resource
+except ImportError: # Windows: sem os.wait4 nem resource, só o tempo de parede
+    resource = None
+
+from ecte.completion import CompletionCycle, complete, listing_line, path_index
+from ecte.execution_handler import BuildStep, RunUsage, build_cache
+from ecte.instrumentation import profiler, span
+from ecte.latency import tracker as latency_tracker
+from ecte.self_profile import MODES as PROFILE_MODES, self_profiler
+
+RUN_TIMEOUT = 30 # Segundos
+BUILTINS = ("cd", "clear", "exit", "history", "alias", "trace", "profile", "latency", "record", "help") # Ver _handle_builtins
+
+
+def _kill_group(process: subprocess.Popen):
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _wait(process: subprocess.Popen, args):
+    """
+    communicate() que colhe o processo com os.wait4, para ter o rusage só dele (o de
+    RUSAGE_CHILDREN mistura as execuções que rodam ao mesmo tempo); devolve também o do
+    editor, cujo pico de RSS o filho herda no fork. Passado RUN_TIMEOUT, o grupo é derrubado
+    e TimeoutExpired sobe como no subprocess.run.
+    """
+    if resource is None or not hasattr(os, "wait4"):
+        try:
+            stdout, stderr = process.communicate(timeout=RUN_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            _kill_group(process)
+            process.communicate()
+            raise
+        return stdout, stderr, None, None
+    parent_rusage = resource.getrusage(resource.RUSAGE_SELF)
+    outputs = {}
+    readers = [Thread(target=lambda name=name, pipe=pipe: outputs.__setitem__(name, pipe.read()), daemon=True)
+               for name, pipe in (("stdout", process.stdout), ("stderr", process.stderr))]
+    for reader in readers:
+        reader.start()
+    expired = []
+
+    def expire():
+        expired.append(True)
+        _kill_group(process)
+    timer = Timer(RUN_TIMEOUT, expire)
+    timer.start()
+    try:
+        _, status, rusage = os.wait4(process.pid, 0)
+    finally:
+        timer.cancel()
+    process.returncode = os.waitstatus_to_exitcode(status)
+    for reader in readers:
+        reader.join()
+    process.stdout.close()
+    process.stderr.close()
+    if expired:
+        raise subprocess.TimeoutExpired(args, RUN_TIMEOUT)
+    return outputs.get("stdout", ""), outputs.get("stderr", ""), rusage, parent_rusage
+
 
 class Console:
     def __init__(self):
@@ -13,10 +82,13 @@ class Console:
         self.output = []
         self.output_scroll_offset = 0
         self.running = False
+        self._generation = 0 # Muda a cada execução; a de uma execução cancelada fica para trás
+        self._process: Optional[subprocess.Popen] = None
         self.command_history = []
         self.history_index = -1
         self.cwd = Path.cwd()
         self.aliases = {}
+        self._completion: Optional[CompletionCycle] = None
         self._aliases_file = Path.home() / ".config" / "ecte" / "aliases.json"
 
         self._load_aliases()
@@ -26,6 +98,7 @@ class Console:
         if self.visible:
             if not self.output:
                 self.output = ["Console aberto. Digite comandos..."]
+            path_index.refresh() # O índice do $PATH fica pronto antes do primeiro Tab
         self.output_scroll_offset = 0 
 
     def set_cwd(self, new_path: Path):
@@ -41,11 +114,34 @@ class Console:
             return self.aliases[alias_cmd] + " " + " ".join(parts[1:])
         return cmd_str
 
-    def run_command(self, cmd: str):
+    def run_command(self, cmd: str, build: Optional[BuildStep] = None, label: Optional[str] = None,
+                    on_exit: Optional[Callable[[int, RunUsage], None]] = None):
+        """
+        Roda o comando numa thread; `build` (Ctrl+E em linguagens compiladas) compila antes,
+        pelo cache. Com `label`, o tempo de parede da execução é informado no fim, e on_exit
+        recebe o código de saída e o consumo do processo (tempo de parede, CPU, RSS máximo)
+        quando ele termina sem ser cancelado. Uma execução nova não espera a anterior: quem
+        quiser trocar uma pela outra chama cancel_run.
+        """
+        self._generation += 1
+        generation = self._generation
+
+        def current():
+            return generation == self._generation
+
         def worker():
             self.running = True
             args = []
+            start = time.perf_counter()
+            returncode = None
             try:
+                if build:
+                    built, lines = build_cache.build(build, self.cwd)
+                    if not current():
+                        return # Cancelada durante a compilação; o binário fica no cache
+                    self.output.extend(lines)
+                    if not built:
+                        return
                 cmd_with_alias = self._apply_aliases(cmd)
                 if isinstance(cmd, str):
                     parts = cmd_with_alias.split()
@@ -59,30 +155,54 @@ class Console:
                         else:
                             args = shlex.split(cmd_with_alias)
                     else:
-                        args = parts
+                        args = shlex.split(cmd_with_alias) # Tira as aspas de '"/caminho/com espaço"'
                 else:
                     args = cmd
 
-                result = subprocess.run(
-                    args,
-                    capture_output=True,
-                    text=True,
-                    timeout=30,
-                    check=False,
-                    cwd=self.cwd 
-                )
-
-                if result.stdout:
-                    self.output.extend(result.stdout.splitlines())
-                if result.stderr:
-                    self.output.extend(f"[ERRO] {line}" for line in result.stderr.splitlines())
+                with span("console.run"):
+                    # Grupo de processos próprio: cancelar derruba também os filhos (compilador, shell)
+                    process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                               text=True, cwd=self.cwd, start_new_session=True)
+                    self._process = process
+                    if not current(): # cancel_run chegou antes do processo existir
+                        _kill_group(process)
+                    run_start = time.perf_counter()
+                    stdout, stderr, rusage, parent_rusage = _wait(process, args)
+                    usage = RunUsage.from_rusage(time.perf_counter() - run_start, rusage, parent_rusage)
+                    returncode = process.returncode
+
+                if not current():
+                    return
+                if stdout:
+                    self.output.extend(stdout.splitlines())
+                if stderr:
+                    self.output.extend(f"[ERRO] {line}" for line in stderr.splitlines())
+                if on_exit:
+                    on_exit(returncode, usage)
             except Exception as e:
                 self.output.append(f"[EXCEÇÃO] {e}")
             finally:
-                self.running = False
+                if current():
+                    self.running = False
+                    self._process = None
+                    if label and returncode is not None:
+                        self.output.append(f"--- {label}: {time.perf_counter() - start:.2f} s (código {returncode})")
+                elif label:
+                    self.output.append(f"--- {label}: cancelada após {time.perf_counter() - start:.2f} s")
 
         Thread(target=worker, daemon=True).start()
 
+    def cancel_run(self) -> bool:
+        """Interrompe a execução em andamento (a saída dela é descartada). Devolve se havia uma."""
+        if not self.running:
+            return False
+        self._generation += 1
+        process, self._process = self._process, None
+        if process is not None:
+            _kill_group(process)
+        self.running = False
+        return True
+
     def get_prompt(self) -> str:
         try:
             project_root = Path.cwd() 
@@ -138,6 +258,27 @@ class Console:
                 self.output.append("Nenhum alias definido.")
             self.output.extend(f"  {name} = '{value}'" for name, value in self.aliases.items())
             return True
+        if cmd == "trace" or cmd.startswith("trace "):
+            self._trace_command(cmd[6:].strip())
+            return True
+        if cmd == "profile" or cmd.startswith("profile "):
+            self._profile_command(cmd[8:].strip())
+            return True
+        if cmd == "latency" or cmd == "latency reset":
+            if cmd.endswith("reset"):
+                latency_tracker.reset()
+                self.output.append("Histogramas de latência zerados.")
+            else:
+                self.output.append("Latência tecla → tela, por classe de tecla:")
+                self.output.extend(latency_tracker.report_lines())
+            return True
+        if cmd == "record" or cmd.startswith("record "):
+            arg = cmd[7:].strip()
+            if arg in ("", "stop"):
+                self.output.append(latency_tracker.stop_recording() or "Nenhuma gravação em andamento. Uso: record ARQUIVO")
+            else:
+                self.output.append(latency_tracker.start_recording((self.cwd / arg).expanduser()))
+            return True
         if cmd == "help":
             self.output.append("Comandos embutidos do console:")
             self.output.append("  cd [caminho] - Muda o diretório atual. 'cd' ou 'cd ~' vai para o home.")
@@ -145,10 +286,33 @@ class Console:
             self.output.append("  history        - Mostra o histórico de comandos.")
             self.output.append("  alias          - Lista todos os aliases.")
             self.output.append("  alias NOME=VALOR - Cria um novo alias.")
+            self.output.append("  trace ARQUIVO  - Grava um trace de desempenho (.json ou .jsonl). 'trace stop' encerra.")
+            self.output.append("  profile [cprofile|sample] ARQUIVO - Perfil do próprio editor (.prof: pstats; outros: pilhas colapsadas). 'profile stop' salva.")
+            self.output.append("  latency [reset] - Histogramas de latência tecla → tela (p50/p90/p99).")
+            self.output.append("  record ARQUIVO - Grava as teclas para reproduzir depois. 'record stop' encerra.")
             self.output.append("  exit           - Fecha o console.")
             return True
         return False
 
+    def _trace_command(self, arg: str):
+        if arg in ("", "stop"):
+            message = profiler.stop_trace()
+            self.output.append(message or "Nenhum trace em gravação. Uso: trace ARQUIVO")
+            return
+        self.output.append(profiler.start_trace((self.cwd / arg).expanduser()))
+
+    def _profile_command(self, arg: str):
+        if arg in ("", "stop"):
+            message = self_profiler.stop()
+            self.output.append(message or "Nenhum perfil em gravação. Uso: profile [cprofile|sample] ARQUIVO")
+            return
+        mode, _, rest = arg.partition(" ")
+        if mode in PROFILE_MODES and rest.strip():
+            arg = rest.strip()
+        else:
+            mode = None
+        self.output.append(self_profiler.start((self.cwd / arg).expanduser(), mode))
+
     def insert_char(self, char: str):
         self.command = self.command[:self.cursor_x] + char + self.command[self.cursor_x:]
         self.cursor_x += 1
@@ -196,39 +360,28 @@ class Console:
             self.command = ""
             self.cursor_x = 0
 
-    def autocomplete(self):
-        cmd_part = self.command.split()
-        if not cmd_part:
+    def autocomplete(self, delta: int = 1):
+        """
+        Tab: completa até o prefixo comum e lista os candidatos uma vez; Tabs seguidos
+        (Shift+Tab volta) percorrem os candidatos. Qualquer edição recomeça.
+        """
+        cycle = self._completion
+        if cycle is not None and cycle.result == (self.command, self.cursor_x):
+            self.command, self.cursor_x = cycle.step(delta)
             return
-
-        to_complete = cmd_part[-1]
-        path_to_complete = Path(to_complete)
-        
-        search_dir = self.cwd / path_to_complete.parent
-        prefix = path_to_complete.name
-
-        try:
-            matches = [
-                p.name for p in search_dir.iterdir()
-                if p.name.startswith(prefix)
-            ]
-            if len(matches) == 1:
-                completed_path = path_to_complete.parent / matches[0]
-                if (search_dir / matches[0]).is_dir():
-                    completed_path = f"{completed_path}/"
-                cmd_part[-1] = str(completed_path)
-                self.command = " ".join(cmd_part)
-                self.cursor_x = len(self.command)
-            elif len(matches) > 1:
-                common_prefix = os.path.commonprefix(matches)
-                if common_prefix:
-                    completed_path = path_to_complete.parent / common_prefix
-                    cmd_part[-1] = str(completed_path)
-                    self.command = " ".join(cmd_part)
-                    self.cursor_x = len(self.command)
-                self.output.append(" ".join(matches))
-        except FileNotFoundError:
-            pass 
+        self._completion = None
+        completion = complete(self.command, self.cursor_x, self.cwd, BUILTINS + tuple(self.aliases))
+        candidates = completion.candidates
+        if not candidates:
+            return
+        common = candidates[0] if len(candidates) == 1 else os.path.commonprefix(candidates)
+        if len(common) > completion.end - completion.start:
+            self.command = self.command[:completion.start] + common + self.command[completion.end:]
+            self.cursor_x = completion.start + len(common)
+        if len(candidates) > 1:
+            self.output.append(listing_line(completion))
+            self.output_scroll_offset = 0
+            self._completion = CompletionCycle(self.command, completion._replace(end=self.cursor_x), self.cursor_x)
 
     def _change_directory(self, path_str: str):
         try:
@@ -0,0 +1,201 @@
+import ast
+import json
+import re
+import shutil
+import subprocess
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from ecte.instrumentation import cache_hit, cache_miss, span
+
+DEBOUNCE_SECONDS = 0.4 # Tempo sem digitação antes de analisar o buffer
+LINTER_TIMEOUT = 10
+
+_LINTER_LINE_RE = re.compile(r"^[^:]*:(\d+):(?:(\d+):)?\s*(.*)$")
+
+
+class Diagnostic(NamedTuple):
+    line: int # 0-based, como Buffer.cursor_y
+    col: int
+    message: str
+    severity: str # "error" ou "warning"
+    source: str
+
+
+def check_python_syntax(text: str, path: Optional[Path]) -> List[Diagnostic]:
+    try:
+        compile(text, str(path or "<buffer>"), "exec", flags=ast.PyCF_ONLY_AST, dont_inherit=True)
+    except SyntaxError as e:
+        line = max(0, (e.lineno or 1) - 1)
+        col = max(0, (e.offset or 1) - 1)
+        return [Diagnostic(line, col, e.msg, "error", "python")]
+    except (ValueError, OverflowError) as e:
+        return [Diagnostic(0, 0, str(e), "error", "python")]
+    return []
+
+
+def check_json(text: str, path: Optional[Path]) -> List[Diagnostic]:
+    if not text.strip():
+        return []
+    try:
+        json.loads(text)
+    except json.JSONDecodeError as e:
+        return [Diagnostic(e.lineno - 1, e.colno - 1, e.msg, "error", "json")]
+    return []
+
+
+def _find_python_linter() -> Optional[List[str]]:
+    if shutil.which("ruff"):
+        return ["ruff", "check", "--quiet", "--output-format=concise", "--stdin-filename", "{name}", "-"]
+    if shutil.which("pyflakes"):
+        return ["pyflakes"]
+    return None
+
+_python_linter_command: Optional[List[str]] = None
+_python_linter_checked = False
+
+def check_python_linter(text: str, path: Optional[Path]) -> List[Diagnostic]:
+    """Roda ruff ou pyflakes, se algum estiver instalado, lendo o código pela stdin."""
+    global _python_linter_command, _python_linter_checked
+    if not _python_linter_checked:
+        _python_linter_command = _find_python_linter()
+        _python_linter_checked = True
+    if not _python_linter_command:
+        return []
+
+    name = path.name if path else "buffer.py"
+    command = [part.replace("{name}", name) for part in _python_linter_command]
+    try:
+        result = subprocess.run(command, input=text, capture_output=True, text=True,
+                                timeout=LINTER_TIMEOUT, check=False)
+    except (OSError, subprocess.TimeoutExpired):
+        return []
+
+    diagnostics = []
+    for output_line in result.stdout.splitlines():
+        match = _LINTER_LINE_RE.match(output_line)
+        if match:
+            line, col, message = match.groups()
+            diagnostics.append(Diagnostic(int(line) - 1, int(col or 1) - 1, message, "warning", command[0]))
+    return diagnostics
+
+
+CHECKERS: Dict[str, List[Callable[[str, Optional[Path]], List[Diagnostic]]]] = {
+    ".py": [check_python_syntax, check_python_linter],
+    ".json": [check_json],
+}
+
+
+def get_checkers(path: Optional[Path]):
+    if not path:
+        return []
+    return CHECKERS.get(path.suffix.lower(), [])
+
+
+def run_checkers(checkers, lines: List[str], path: Optional[Path]) -> List[Diagnostic]:
+    text = "\n".join(lines)
+    diagnostics = []
+    for checker in checkers:
+        found = checker(text, path)
+        diagnostics.extend(found)
+        if any(d.severity == "error" for d in found):
+            break # Com erro de sintaxe, o linter só repetiria o problema
+    diagnostics.sort(key=lambda d: (d.line, d.col))
+    return diagnostics
+
+
+class BufferDiagnostics:
+    def __init__(self, version: int, diagnostics: List[Diagnostic]):
+        self.version = version
+        self.diagnostics = diagnostics
+        self.by_line: Dict[int, Diagnostic] = {}
+        for d in diagnostics:
+            current = self.by_line.get(d.line)
+            if current is None or (current.severity != "error" and d.severity == "error"):
+                self.by_line[d.line] = d
+
+
+class DiagnosticsService:
+    """
+    Analisa buffers em um pool de threads fora do loop da interface.
+    Os resultados ficam em cache por versão do buffer; o desenho só lê o cache.
+    """
+
+    def __init__(self, max_workers: int = 2, debounce: float = DEBOUNCE_SECONDS):
+        self.debounce = debounce
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="diagnostics")
+        self._lock = threading.Lock()
+        self._results = weakref.WeakKeyDictionary() # buffer -> BufferDiagnostics
+        self._pending = weakref.WeakKeyDictionary() # buffer -> versão em análise
+        self._last_change = weakref.WeakKeyDictionary() # buffer -> (versão, instante)
+
+    def update(self, buf, now: float | None = None):
+        """Chamado a cada volta do loop principal; agenda a análise depois do debounce."""
+        if buf is None:
+            return
+        now = time.monotonic() if now is None else now
+        version = buf.version
+
+        with self._lock:
+            result = self._results.get(buf)
+            if (result and result.version == version) or self._pending.get(buf) == version:
+                return
+
+        last = self._last_change.get(buf)
+        if not last or last[0] != version:
+            self._last_change[buf] = (version, now)
+            if last is not None:
+                return # Ainda digitando: espera o debounce
+        elif now - last[1] < self.debounce:
+            return
+
+        checkers = get_checkers(buf.filepath)
+        if not checkers:
+            with self._lock:
+                self._results[buf] = BufferDiagnostics(version, [])
+            return
+
+        with self._lock:
+            self._pending[buf] = version
+        lines = list(buf.lines) # Cópia rasa: as strings são imutáveis
+        future = self._executor.submit(self._run, checkers, lines, buf.filepath)
+        buf_ref = weakref.ref(buf)
+        future.add_done_callback(lambda f: self._store(buf_ref, version, f))
+
+    def _run(self, checkers, lines, path):
+        with span("diagnostics.check"):
+            return run_checkers(checkers, lines, path)
+
+    def _store(self, buf_ref, version: int, future):
+        buf = buf_ref()
+        if buf is None or future.cancelled():
+            return
+        try:
+            diagnostics = future.result()
+        except Exception as e:
+            diagnostics = [Diagnostic(0, 0, f"Falha na análise: {e}", "warning", "diagnostics")]
+        with self._lock:
+            if self._pending.get(buf) == version:
+                del self._pending[buf]
+            current = self._results.get(buf)
+            if current is None or current.version <= version:
+                self._results[buf] = BufferDiagnostics(version, diagnostics)
+
+    def get(self, buf) -> Optional[BufferDiagnostics]:
+        """Último resultado conhecido (pode ser de uma versão anterior enquanto a nova é analisada)."""
+        if buf is None:
+            return None
+        with self._lock:
+            result = self._results.get(buf)
+        if result is not None and result.version == buf.version:
+            cache_hit("diagnóstico")
+        else:
+            cache_miss("diagnóstico")
+        return result
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,259 @@
+import bisect
+import re
+import unicodedata
+from typing import List, Optional, Tuple
+
+TAB_WIDTH = 4
+
+_PAGE_BITS = 8 # A tabela de larguras é montada em páginas de 256 pontos de código, na primeira consulta
+_pages: List[Optional[bytes]] = [None] * (0x110000 >> _PAGE_BITS)
+_SPECIAL = re.compile(r"[^\x20-\x7e]") # Tudo o que pode não ocupar exatamente uma coluna
+
+
+def _build_page(page: int) -> bytes:
+    widths = bytearray(1 << _PAGE_BITS)
+    base = page << _PAGE_BITS
+    for i in range(len(widths)):
+        cp = base + i
+        ch = chr(cp)
+        if cp < 0x20 or cp == 0x7f:
+            widths[i] = 2 # Desenhado como ^X
+        elif 0x80 <= cp < 0xa0 or 0xd800 <= cp < 0xe000:
+            widths[i] = 1 # Desenhado como '?'
+        elif unicodedata.category(ch) in ("Mn", "Me", "Cf") and cp != 0xad or 0x1160 <= cp < 0x1200:
+            widths[i] = 0 # Acentos combinantes, ZWJ, seletores de variação, vogais do hangul
+        elif unicodedata.east_asian_width(ch) in ("W", "F"):
+            widths[i] = 2
+        else:
+            widths[i] = 1
+    _pages[page] = bytes(widths)
+    return _pages[page]
+
+
+_build_page(0)
+
+
+def char_width(ch: str) -> int:
+    """Colunas ocupadas por um caractere (tabs dependem da coluna: veja ColumnMap)."""
+    cp = ord(ch)
+    page = _pages[cp >> _PAGE_BITS] or _build_page(cp >> _PAGE_BITS)
+    return page[cp & 0xff]
+
+
+def is_zero_width(ch: str) -> bool:
+    return ch != "\t" and char_width(ch) == 0
+
+
+def is_simple(text: str) -> bool:
+    """Uma coluna por caractere: ASCII imprimível, sem tabs."""
+    return text.isascii() and text.isprintable()
+
+
+def glyph(ch: str) -> str:
+    """O que vai para o curses no lugar de um caractere de controle."""
+    cp = ord(ch)
+    if cp < 0x20 or cp == 0x7f:
+        return "^" + chr(cp ^ 0x40)
+    if 0x80 <= cp < 0xa0 or 0xd800 <= cp < 0xe000:
+        return "?"
+    return ch
+
+
+class ColumnMap:
+    """
+    Colunas de tela de uma linha. Só os caracteres que não ocupam exatamente uma coluna
+    (tabs, largos, combinantes, controles) são guardados, com a coluna onde começam; entre
+    eles a conversão é aritmética. Uma linha ASCII sem tabs não guarda nada.
+    """
+
+    __slots__ = ("source", "length", "phase", "width", "simple", "_indexes", "_starts", "_widths", "_rows")
+
+    def __init__(self, text: str, start_column: int = 0):
+        self.source = text
+        self.length = len(text)
+        self.phase = start_column % TAB_WIDTH # Onde caem as paradas de tab, para trechos de linhas longas
+        self._indexes: List[int] = []
+        self._starts: List[int] = []
+        self._widths: List[int] = []
+        self._rows = None
+        column = 0
+        last = 0
+        if not is_simple(text):
+            for match in _SPECIAL.finditer(text):
+                i = match.start()
+                ch = text[i]
+                if ch == "\t":
+                    width = TAB_WIDTH - (column + i - last + self.phase) % TAB_WIDTH
+                else:
+                    width = char_width(ch)
+                    if width == 1:
+                        continue
+                column += i - last
+                self._indexes.append(i)
+                self._starts.append(column)
+                self._widths.append(width)
+                column += width
+                last = i + 1
+        self.width = column + self.length - last
+        self.simple = not self._indexes
+
+    def column(self, x: int) -> int:
+        """Coluna onde começa o caractere x (x == length: logo depois do último)."""
+        k = bisect.bisect_left(self._indexes, x)
+        if k == 0:
+            return x
+        k -= 1
+        return self._starts[k] + self._widths[k] + x - self._indexes[k] - 1
+
+    def index(self, column: int) -> int:
+        """Caractere que ocupa a coluna (o primeiro, se mais de um); depois do fim, length."""
+        if column < 0:
+            return 0
+        k = bisect.bisect_right(self._starts, column) - 1
+        if k < 0:
+            return min(column, self.length)
+        start, width = self._starts[k], self._widths[k]
+        if column < start + width:
+            return self._indexes[k]
+        return min(self._indexes[k] + 1 + column - start - width, self.length)
+
+
+class SegmentColumns:
+    """
+    ColumnMap de uma linha longa (SegmentedLine), um por trecho. Depois de uma edição só os
+    trechos novos são medidos de novo (ou os que tiveram a parada de tab deslocada).
+    """
+
+    def __init__(self, line, previous: Optional["SegmentColumns"] = None):
+        self.edits = line.edits
+        self.chunks = line.snapshot()
+        # Uma edição só desde a versão anterior: row_starts reaproveita as linhas visuais de fora dela
+        self._previous = previous if previous is not None and line.edits == previous.edits + 1 else None
+        self._edit = line.last_edit
+        if previous is not None:
+            previous._previous = None
+        reuse = {id(chunk): cmap for chunk, cmap in zip(previous.chunks, previous.maps)} if previous else {}
+        self.maps: List[ColumnMap] = []
+        self._positions: List[int] = []
+        self._columns: List[int] = []
+        self._rows = None
+        position = column = 0
+        for chunk in self.chunks:
+            cmap = reuse.get(id(chunk))
+            if cmap is None or cmap.source is not chunk or not cmap.simple and cmap.phase != column % TAB_WIDTH:
+                cmap = ColumnMap(chunk, column)
+            self.maps.append(cmap)
+            self._positions.append(position)
+            self._columns.append(column)
+            position += cmap.length
+            column += cmap.width
+        self.length = position
+        self.width = column
+        self.simple = all(cmap.simple for cmap in self.maps)
+
+    def column(self, x: int) -> int:
+        if x >= self.length:
+            return self.width + x - self.length
+        k = bisect.bisect_right(self._positions, x) - 1
+        return self._columns[k] + self.maps[k].column(x - self._positions[k])
+
+    def index(self, column: int) -> int:
+        if column >= self.width:
+            return self.length
+        k = max(0, bisect.bisect_right(self._columns, column) - 1)
+        return self._positions[k] + self.maps[k].index(column - self._columns[k])
+
+
+def line_columns(line) -> "ColumnMap | SegmentColumns":
+    """Mapa de colunas de uma linha (str ou SegmentedLine); o das linhas longas fica guardado nelas."""
+    if isinstance(line, str):
+        return ColumnMap(line)
+    cached = line.column_cache
+    if cached is None or cached.edits != line.edits:
+        cached = line.column_cache = SegmentColumns(line, cached)
+    return cached
+
+
+def row_starts(columns, width: int):
+    """
+    Índices onde começa cada linha visual com a quebra suave em `width` colunas. Um caractere
+    que não cabe inteiro no fim de uma linha visual (largo ou tab) passa para a seguinte.
+    Quando o texto enche a última, sobra uma linha vazia para o cursor depois do fim.
+    """
+    width = max(1, width)
+    if columns.simple:
+        return range(0, columns.length + 1, width)
+    cached = columns._rows
+    if cached is not None and cached[0] == width:
+        return cached[1]
+    starts = [0]
+    row_column = 0
+    old = old_starts = None
+    previous = getattr(columns, "_previous", None)
+    if previous is not None and previous._rows is not None and previous._rows[0] == width:
+        old, old_starts = previous, previous._rows[1]
+        edit_start, edit_end, inserted = columns._edit
+        delta = inserted - (edit_end - edit_start)
+        keep = bisect.bisect_left(old_starts, edit_start) # Refaz a partir da linha visual onde a edição cai
+        if keep > 1 and not isinstance(old_starts, range):
+            starts = old_starts[:keep]
+            row_column = columns.column(starts[-1])
+        columns._previous = None
+    while True:
+        limit = row_column + width
+        if limit > columns.width:
+            break
+        if limit == columns.width:
+            starts.append(columns.length)
+            break
+        i = columns.index(limit)
+        start = columns.column(i)
+        if i <= starts[-1]: # Caractere mais largo que a linha inteira: fica sozinho
+            i += 1
+            start = columns.column(i)
+        if i >= columns.length:
+            break
+        starts.append(i)
+        row_column = start
+        if old is not None and i >= edit_start + inserted:
+            # Depois da edição, quando uma linha visual começa no mesmo ponto (e na mesma fase
+            # das paradas de tab) que antes, o resto é igual, só deslocado
+            j = bisect.bisect_left(old_starts, i - delta)
+            if j < len(old_starts) and old_starts[j] == i - delta and \
+                    (start - old.column(i - delta)) % TAB_WIDTH == 0:
+                starts.extend(s + delta for s in old_starts[j + 1:])
+                break
+    columns._rows = (width, starts)
+    return starts
+
+
+def render(text: str, column: int, left: int, right: int) -> Tuple[str, int]:
+    """
+    `text` começando na coluna `column`, pronto para o curses e recortado às colunas
+    [left, right): tabs viram espaços e caracteres cortados pela borda viram espaços.
+    Devolve o texto e a coluna logo depois de `text`.
+    """
+    if is_simple(text):
+        end = column + len(text)
+        return text[max(0, left - column):max(0, right - column)], end
+    parts = []
+    visible = False # Se o último caractere com largura apareceu inteiro
+    for ch in text:
+        if ch == "\t":
+            width = TAB_WIDTH - column % TAB_WIDTH
+            shown = " " * width
+        else:
+            width = char_width(ch)
+            shown = glyph(ch)
+        if width == 0:
+            if visible: # Combina com o caractere anterior
+                parts.append(ch)
+            continue
+        end = column + width
+        visible = column >= left and end <= right
+        if visible:
+            parts.append(shown)
+        elif end > left and column < right:
+            parts.append(" " * (min(end, right) - max(column, left)))
+        column = end
+    return "".join(parts), column
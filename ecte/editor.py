@@ -1,9 +1,18 @@
+import bisect
+from contextlib import contextmanager
 from pathlib import Path
 import curses
 import re
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 import sys
 import importlib
+from ecte.theme import Theme, DEFAULT_TOKEN_COLORS
+from ecte.tab_registry import TabRegistry
+from ecte.wrap import WrapIndex
+from ecte.longline import LONG_LINE_CHARS, LineEdit, SegmentedLine
+from ecte.display import ColumnMap, line_columns
+from ecte.sniff import TEXT_FORMAT, FileFormat, encode_text, read_text_file, sniff_file
+import os
 
 try:
     import pyclip
@@ -26,9 +35,9 @@ SYNTAX_REGEX = re.compile(
     r"|(?P<KEYWORD>\b(" + "|".join(PYTHON_KEYWORDS) + r")\b)"
 )
 class Buffer:
-    def __init__(self, path: Optional[Path] = None):
+    def __init__(self, path: Optional[Path] = None, lazy: bool = False):
         self.filepath: Optional[Path] = path
-        self.lines: List[str] = [""]
+        self._lines: Optional[List[str]] = None
         self.cursor_x = 0
         self.cursor_y = 0
         self.offset_y = 0
@@ -36,34 +45,322 @@ class Buffer:
         self.selecting = False
         self.selection_anchor_x = -1
         self.selection_anchor_y = -1
-        self._undo_stack = []
-        self._redo_stack = []
+        self._undo_states = []
+        self._redo_states = []
+        self._frozen: Optional[bytes] = None # Conteúdo compactado pela TabMemoryManager
+        self._disk_stamp = None # (mtime_ns, tamanho) do arquivo quando foi lido ou salvo
+        self._memory_estimate = None
         self.dirty = False
+        self.version = 0 # Incrementado a cada alteração; usado pelos caches (diagnósticos etc.)
+        self.outline_cache = None # (versão, itens da Structbar)
+        self.change_listeners = [] # Chamados como listener(buffer, [(início, fim, novas_linhas), ...])
+        self._pending_changes: Optional[list] = None # Edições da transação aberta (Editor.transaction)
+        self._pending_marked = False
+        self.wrap_index = None # WrapIndex da quebra suave (Editor.wrap_index_for)
+        self.offset_row = 0 # Primeira linha visual na tela com a quebra suave
+        self.screen_cursor = (0, 0) # Posição do cursor na tela calculada pelo último draw
+        self._segments: Dict[int, SegmentedLine] = {} # Linhas longas, editadas em trechos
+        self._stale_lines = set() # Linhas de _segments cujo texto em _lines está desatualizado
+        self._column_maps: Dict[int, ColumnMap] = {} # Colunas de tela por linha (ver column_map)
+        self.file_format: FileFormat = TEXT_FORMAT # Codificação, BOM e quebra de linha em que o arquivo foi lido
+
+        if not lazy:
+            self._load()
 
-        if path and path.exists():
-            self.lines = path.read_text(encoding="utf-8").splitlines() or [""]
+    @property
+    def lines(self) -> List[str]:
+        if self._lines is None:
+            if self._frozen is not None:
+                self.thaw()
+            else:
+                self._load() # Abas restauradas da sessão só leem o arquivo quando usadas
+        if self._stale_lines:
+            self._sync_segments()
+        return self._lines
+
+    @lines.setter
+    def lines(self, value: List[str]):
+        if self._stale_lines:
+            self._sync_segments()
+        old_lines = self._lines
+        self._lines = value
+        self._segments.clear()
+        self._column_maps.clear()
+        if (self.change_listeners or self._pending_changes is not None) and old_lines is not None:
+            changed = _changed_range(old_lines, value)
+            if changed:
+                start, end, new_end = changed
+                self._record_change(start, end, value[start:new_end])
+
+    @property
+    def _undo_stack(self) -> list:
+        if self._frozen is not None:
+            self.thaw()
+        return self._undo_states
+
+    @property
+    def _redo_stack(self) -> list:
+        if self._frozen is not None:
+            self.thaw()
+        return self._redo_states
+
+    @property
+    def loaded(self) -> bool:
+        return self._lines is not None
+
+    @property
+    def frozen(self) -> bool:
+        return self._frozen is not None
+
+    def freeze(self):
+        """Libera a memória de uma aba inativa (ver ecte.tab_memory)."""
+        if self._frozen is not None or self._lines is None:
+            return
+        if any('segments' in state for state in self._undo_states + self._redo_states):
+            return # O histórico guarda trechos de linhas longas: compactá-lo custaria mais do que libera
+        self._sync_segments()
+        self._segments.clear()
+        self._column_maps.clear()
+        from ecte.tab_memory import freeze_state
+        self._frozen = freeze_state(self)
+        self._lines = None
+        self._undo_states = []
+        self._redo_states = []
+        if self.wrap_index is not None: # Refeito no próximo draw; o arquivo pode mudar enquanto a aba dorme
+            self.wrap_index.detach()
+            self.wrap_index = None
+
+    def thaw(self):
+        if self._frozen is None:
+            return
+        from ecte.tab_memory import thaw_state
+        frame, self._frozen = self._frozen, None
+        thaw_state(self, frame)
+
+    def disk_stamp(self):
+        try:
+            st = self.filepath.stat()
+            return (st.st_mtime_ns, st.st_size)
+        except (OSError, AttributeError):
+            return None
+
+    def _load(self):
+        lines = [""]
+        if self.filepath and self.filepath.exists():
+            lines, self.file_format = read_text_file(self.filepath)
+            self._disk_stamp = self.disk_stamp()
+        self._lines = lines
+        self._segments.clear()
+        self._column_maps.clear()
+        self._stale_lines.clear()
+        self.cursor_y = min(self.cursor_y, len(lines) - 1)
+        self.cursor_x = min(self.cursor_x, len(lines[self.cursor_y]))
 
     def save(self) -> bool:
-        if not self.filepath:
+        if not self.filepath or self.file_format.binary:
             return False
         try:
+            try:
+                data = encode_text(self.lines, self.file_format)
+            except UnicodeEncodeError: # Texto novo que a codificação original não representa
+                self.file_format = self.file_format._replace(encoding="utf-8", bom=b"")
+                data = encode_text(self.lines, self.file_format)
             self.filepath.parent.mkdir(parents=True, exist_ok=True)
-            self.filepath.write_text("\n".join(self.lines), encoding="utf-8")
+            self.filepath.write_bytes(data)
+            self._disk_stamp = self.disk_stamp()
             self.dirty = False
             return True
         except:
             return False
 
+    def mark_changed(self):
+        if self._pending_changes is not None:
+            self._pending_marked = True # A versão sobe uma vez só, no fim da transação
+            return
+        self.version += 1
+        self.dirty = True
+
+    def set_line(self, y: int, text: str):
+        self.lines[y] = text
+        self._segments.pop(y, None)
+        self._column_maps.pop(y, None)
+        self.mark_changed()
+        self._record_change(y, y + 1, [text])
+
+    def splice(self, start: int, end: int, new_lines: List[str]):
+        """Substitui as linhas [start:end] por new_lines em uma única operação."""
+        self.lines[start:end] = new_lines
+        if self._segments:
+            self._segments.clear() # Os índices das linhas seguintes mudaram
+        self._column_maps.clear()
+        self.mark_changed()
+        self._record_change(start, end, new_lines)
+
+    # --- Linhas longas (ver ecte.longline) ---
+
+    def _raw_lines(self) -> List[str]:
+        """_lines sem montar as linhas longas editadas (as de _stale_lines ficam desatualizadas)."""
+        return self._lines if self._lines is not None else self.lines
+
+    def _sync_segments(self):
+        for y in self._stale_lines:
+            self._lines[y] = self._segments[y].text()
+        self._stale_lines.clear()
+
+    @property
+    def line_count(self) -> int:
+        return len(self._raw_lines())
+
+    def line_length(self, y: int) -> int:
+        segment = self._segments.get(y)
+        return len(segment) if segment is not None else len(self._raw_lines()[y])
+
+    def line_slice(self, y: int, start: int, end: int) -> str:
+        """lines[y][start:end] sem montar a linha inteira quando ela é longa."""
+        segment = self._segments.get(y)
+        if segment is not None:
+            return segment.slice(start, end)
+        return self._raw_lines()[y][max(0, start):max(0, end)]
+
+    def long_line(self, y: int) -> Optional[SegmentedLine]:
+        """A linha y em trechos, se ela passa de LONG_LINE_CHARS; None para as linhas comuns."""
+        segment = self._segments.get(y)
+        if segment is None:
+            text = self._raw_lines()[y]
+            if len(text) <= LONG_LINE_CHARS:
+                return None
+            segment = self._segments[y] = SegmentedLine(text)
+        return segment
+
+    # --- Colunas de tela (ver ecte.display) ---
+
+    def column_map(self, y: int):
+        """Mapa índice <-> coluna de tela da linha y, refeito só quando a linha muda."""
+        segment = self._segments.get(y)
+        if segment is not None:
+            return line_columns(segment)
+        text = self._raw_lines()[y]
+        cached = self._column_maps.get(y)
+        if cached is None or cached.source is not text:
+            cached = self._column_maps[y] = ColumnMap(text)
+        return cached
+
+    def column_of(self, y: int, x: int) -> int:
+        return self.column_map(y).column(x)
+
+    def index_at_column(self, y: int, column: int) -> int:
+        return self.column_map(y).index(column)
+
+    def edit_in_line(self, y: int, x: int, removed: int, text: str):
+        """lines[y][x:x + removed] = text. Em linhas longas, o custo acompanha o trecho, não a linha."""
+        segment = self.long_line(y)
+        if segment is None:
+            line = self._raw_lines()[y]
+            self.set_line(y, line[:x] + text + line[x + removed:])
+            return
+        segment.replace(x, x + removed, text)
+        self._stale_lines.add(y)
+        self.mark_changed()
+        self._record_change(y, y + 1, LineEdit(segment, x, removed, text))
+
+    def _record_change(self, start: int, end: int, new_lines: List[str]):
+        if self._pending_changes is not None:
+            self._pending_changes.append((start, end, new_lines))
+        elif self.change_listeners:
+            self._notify_change([(start, end, new_lines)])
+
+    def _notify_change(self, changes: list):
+        for listener in self.change_listeners:
+            listener(self, changes)
+
+    def begin_changes(self):
+        """Passa a acumular as edições em vez de notificar e mudar a versão a cada uma."""
+        self._pending_changes = []
+        self._pending_marked = False
+
+    def end_changes(self) -> bool:
+        """Fecha o acúmulo: uma mudança de versão e uma notificação com todas as edições. Diz se houve alguma."""
+        changes, self._pending_changes = self._pending_changes, None
+        if not changes and not self._pending_marked:
+            return False
+        self.version += 1
+        self.dirty = True
+        if changes and self.change_listeners:
+            self._notify_change(changes)
+        return True
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._pending_changes is not None
+
+
+def changed_line_ranges(changes: list) -> List[Tuple[int, int]]:
+    """
+    Linhas afetadas por uma lista de edições (início, fim, novas_linhas), em coordenadas do
+    buffer depois de todas elas: intervalos [início, fim) ordenados e sem sobreposição (uma
+    remoção pura aparece como intervalo vazio). Serve aos caches por linha (realce,
+    estrutura, busca) para invalidar só o que mudou.
+    """
+    starts: List[int] = []
+    ends: List[int] = []
+    for start, end, new_lines in changes:
+        delta = len(new_lines) - (end - start)
+        lo, hi = start, start + len(new_lines)
+        i = j = bisect.bisect_right(ends, start)
+        while j < len(starts) and starts[j] < end:
+            lo = min(lo, starts[j])
+            if ends[j] > end:
+                hi = max(hi, ends[j] + delta)
+            j += 1
+        for k in range(j, len(starts)): # Edições em ordem crescente quase nunca deslocam nada
+            starts[k] += delta
+            ends[k] += delta
+        starts[i:j] = [lo]
+        ends[i:j] = [hi]
+
+    ranges: List[Tuple[int, int]] = []
+    for r_start, r_end in zip(starts, ends):
+        if ranges and r_start <= ranges[-1][1]:
+            ranges[-1] = (ranges[-1][0], max(ranges[-1][1], r_end))
+        else:
+            ranges.append((r_start, r_end))
+    return ranges
+
+def _changed_range(old: List[str], new: List[str]):
+    """
+    Menor intervalo que difere entre duas versões das linhas: (início, fim_antigo, fim_novo).
+    Snapshots de undo compartilham as strings, então a comparação por identidade resolve quase tudo.
+    """
+    limit = min(len(old), len(new))
+    start = 0
+    while start < limit and (old[start] is new[start] or old[start] == new[start]):
+        start += 1
+    if start == len(old) == len(new):
+        return None
+    old_end, new_end = len(old), len(new)
+    while old_end > start and new_end > start and \
+            (old[old_end - 1] is new[new_end - 1] or old[old_end - 1] == new[new_end - 1]):
+        old_end -= 1
+        new_end -= 1
+    return start, old_end, new_end
+
 class Editor:
     def __init__(self):
         self.tabs: List[Buffer] = []
         self.active_tab_index = -1
+        self.registry = TabRegistry()
+        self.swap = None # SwapJournal, quando o diário de recuperação está ativo
+        self.pending_recoveries: List[Buffer] = [] # Abas com diário de uma sessão anterior, a perguntar
         self.new_file() # Começa com uma aba vazia
         self.autocomplete_pairs = {}
         self.smart_auto_indent = True
         self.html_tag_autocomplete = True
         self.autocomplete_words = {}
         self.html_void_tags = set()
+        self.soft_wrap = False
+        self._soft_wrap_setting = None # Último valor da configuração aplicado (reload_config)
+        self.theme = Theme()
+        self._theme_colors = None
 
     def reload_config(self, config):
         autocomplete_status = config.get_setting("autocomplete_config.py")
@@ -84,19 +381,89 @@ class Editor:
         html_status = config.get_setting("Autocompletar Tags HTML")
         self.html_tag_autocomplete = (html_status == "Ativado")
 
+        soft_wrap_setting = config.get_setting("Quebra de Linha Suave")
+        if soft_wrap_setting != self._soft_wrap_setting: # Só quando a opção muda: não desfaz o Alt+Z
+            self._soft_wrap_setting = soft_wrap_setting
+            self.set_soft_wrap(soft_wrap_setting == "Ativado")
+
+        theme_colors = None
+        if config.get_setting("tema.py") == "Ativado":
+            try:
+                module = importlib.import_module("extension.tema")
+                theme_colors = getattr(module, 'TOKEN_COLORS', None)
+            except ImportError:
+                theme_colors = None
+        if theme_colors is not self._theme_colors: # Só troca a tabela quando o tema muda
+            self._theme_colors = theme_colors
+            self.theme.set_token_colors(theme_colors or DEFAULT_TOKEN_COLORS)
+
+    def set_soft_wrap(self, enabled: bool):
+        if enabled == self.soft_wrap:
+            return
+        self.soft_wrap = enabled
+        if not enabled: # Sem a quebra, os índices só custariam tempo a cada edição
+            for buf in self.tabs:
+                if buf.wrap_index is not None:
+                    buf.wrap_index.detach()
+                    buf.wrap_index = None
+
+    def wrap_index_for(self, buf: Buffer, width: int) -> WrapIndex:
+        """Índice de linhas visuais do buffer para a largura dada, criado no primeiro uso."""
+        if buf.wrap_index is None:
+            buf.wrap_index = WrapIndex(width)
+            buf.wrap_index.attach(buf)
+        else:
+            buf.wrap_index.set_width(width)
+        return buf.wrap_index
+
     @property
     def active_buffer(self) -> Optional[Buffer]:
         if 0 <= self.active_tab_index < len(self.tabs):
             return self.tabs[self.active_tab_index]
         return None
 
-    def open_file(self, path: Path):
-        for i, tab in enumerate(self.tabs):
-            if tab.filepath == path:
-                self.active_tab_index = i
-                return
+    def enable_swap(self, journal):
+        self.swap = journal
+        for buf in self.tabs:
+            journal.track(buf)
+
+    def attach_buffer(self, buf: Buffer, opened_as: Optional[Path] = None):
+        """Liga um buffer recém-criado aos serviços do editor (registro de abas, diário de recuperação)."""
+        self.registry.register(buf, opened_as)
+        if self.swap:
+            self.swap.track(buf)
+            if buf.filepath and not buf.file_format.binary and self.swap.has_recovery(buf.filepath):
+                self.swap.hold(buf.filepath) # Até o usuário responder, editar não apaga o diário antigo
+                self.pending_recoveries.append(buf)
+
+    def find_tab(self, path: Path) -> Optional[Buffer]:
+        return self.registry.lookup(path)
+
+    def open_file(self, path: Path, hex_view: bool = False) -> Optional[str]:
+        """
+        Abre (ou ativa) a aba do arquivo. Binários (ou hex_view=True) abrem no visualizador
+        hexadecimal somente leitura. Devolve o motivo quando o arquivo não pode ser aberto.
+        """
+        existing = self.registry.lookup(path)
+        if existing is not None:
+            self.active_tab_index = self.tabs.index(existing)
+            return None
+        try:
+            binary = hex_view or Path(path).exists() and sniff_file(path).binary # Só o primeiro bloco é lido
+        except OSError as e:
+            return f"Erro ao abrir '{Path(path).name}': {e.strerror}"
 
-        new_buffer = Buffer(path)
+        if binary:
+            from ecte.hexview import HexView
+            new_buffer = HexView(Path(os.path.abspath(path)))
+            try:
+                new_buffer.data # mmap: só o sistema de arquivos decide se dá para abrir
+            except (OSError, ValueError) as e:
+                return f"Erro ao abrir '{Path(path).name}': {getattr(e, 'strerror', None) or e}"
+            self.attach_buffer(new_buffer, path)
+        else:
+            new_buffer = Buffer(Path(os.path.abspath(path)))
+            self.attach_buffer(new_buffer, path)
         if len(self.tabs) == 1 and not self.tabs[0].filepath and not self.tabs[0].dirty:
             self.tabs[0] = new_buffer
             self.active_tab_index = 0
@@ -106,227 +473,302 @@ class Editor:
 
     def save_file(self) -> bool:
         if self.active_buffer:
-            return self.active_buffer.save()
+            saved = self.active_buffer.save()
+            if saved:
+                self.registry.refresh(self.active_buffer)
+                if self.swap:
+                    self.swap.discard(self.active_buffer)
+            return saved
         return False
 
     def new_file(self):
         new_buffer = Buffer()
+        self.attach_buffer(new_buffer)
         self.tabs.append(new_buffer)
         self.active_tab_index = len(self.tabs) - 1
 
-    def _save_state_for_undo(self):
-        if not self.active_buffer: return
+    def close_active_tab(self):
         buf = self.active_buffer
+        if not buf: return
+        self.registry.unregister(buf)
+        if self.swap:
+            self.swap.discard(buf)
+            self.swap.untrack(buf)
+        if hasattr(buf, "close"): # Visualizador hexadecimal: libera o mmap
+            buf.close()
+        self.tabs.pop(self.active_tab_index)
+        if not self.tabs: # Se fechou a última aba, cria uma nova
+            self.new_file()
+        else:
+            self.active_tab_index = min(self.active_tab_index, len(self.tabs) - 1)
+
+    def recover_buffer(self, buf: Buffer) -> str:
+        """Aplica o diário de recuperação ao buffer (a versão do disco fica no undo)."""
+        name = buf.filepath.name
+        lines = self.swap.recover(buf.filepath) if self.swap else None
+        if self.swap:
+            self.swap.release(buf.filepath) # A recuperação abaixo já entra no diário novo
+        if lines is None:
+            self.discard_recovery(buf)
+            return f"Não foi possível recuperar '{name}': o arquivo mudou no disco."
+        if buf in self.tabs:
+            self.active_tab_index = self.tabs.index(buf)
+        with self.transaction(buf):
+            buf.lines = lines
+            buf.mark_changed()
+        buf.cursor_y = min(buf.cursor_y, len(lines) - 1)
+        buf.cursor_x = min(buf.cursor_x, len(lines[buf.cursor_y]))
+        return f"Alterações de '{name}' recuperadas (Ctrl+Z volta à versão do disco)."
+
+    def discard_recovery(self, buf: Buffer):
+        if self.swap and buf.filepath:
+            self.swap.discard(buf)
+
+    def discard_unsaved_changes(self):
+        """Saída sem salvar: o usuário abriu mão das alterações, então os diários são apagados."""
+        for buf in self.tabs:
+            if buf.dirty:
+                self.discard_recovery(buf)
+
+    @contextmanager
+    def transaction(self, buf: Optional[Buffer] = None):
+        """
+        `with editor.transaction(buf):` junta todas as edições do bloco em um único registro
+        de desfazer, um único incremento de versão e uma única notificação aos
+        change_listeners com a lista de edições (veja changed_line_ranges). Transações
+        aninhadas se juntam à de fora; um bloco que não altera nada não deixa registro.
+        """
+        buf = buf or self.active_buffer
+        if buf is None or buf.in_transaction:
+            yield buf
+            return
+        state = self._undo_state(buf)
+        buf.begin_changes()
+        try:
+            yield buf
+        finally:
+            if buf.end_changes():
+                buf._undo_stack.append(state)
+                buf._redo_stack.clear()
+
+    @staticmethod
+    def _undo_state(buf: Buffer) -> dict:
         state = {
-            'lines': [line for line in buf.lines],
+            'lines': list(buf._raw_lines()),
             'cursor_x': buf.cursor_x,
             'cursor_y': buf.cursor_y,
         }
-        buf._undo_stack.append(state)
-        buf._redo_stack.clear()
-        buf.dirty = True
+        if buf._stale_lines: # Linhas longas editadas: guarda os trechos, não a linha montada
+            state['segments'] = {y: buf._segments[y].snapshot() for y in buf._stale_lines}
+        return state
+
+    @staticmethod
+    def _restore_state(buf: Buffer, state: dict):
+        lines = state['lines']
+        if 'segments' in state:
+            lines = list(lines)
+            for y, chunks in state['segments'].items():
+                lines[y] = "".join(chunks)
+        buf.lines = lines
+        buf.cursor_x = state['cursor_x']
+        buf.cursor_y = state['cursor_y']
 
     def insert_char(self, char: str):
         if not self.active_buffer: return
+        buf = self.active_buffer
 
-        if self.has_selection() and char in self.autocomplete_pairs:
-            buf = self.active_buffer
-            self._save_state_for_undo()
-            selected_text = self.get_selected_text()
-            closing_char = self.autocomplete_pairs[char]
-            wrapped_text = char + selected_text + closing_char
-            
-            self.delete_selection() # Limpa a seleção e posiciona o cursor
-            self.insert_text_at_cursor(wrapped_text) # Insere o texto envolvido
-            return
+        with self.transaction(buf):
+            if self.has_selection() and char in self.autocomplete_pairs:
+                selected_text = self.get_selected_text()
+                closing_char = self.autocomplete_pairs[char]
+                wrapped_text = char + selected_text + closing_char
 
-        if self.has_selection():
-            self.delete_selection()
-        
-        buf = self.active_buffer
-        y, x = buf.cursor_y, buf.cursor_x
-        current_line = buf.lines[y]
+                self.delete_selection() # Limpa a seleção e posiciona o cursor
+                self.insert_text_at_cursor(wrapped_text) # Insere o texto envolvido
+                return
 
-        closing_chars = self.autocomplete_pairs.values()
-        if char in closing_chars and x < len(current_line) and current_line[x] == char:
-            buf.cursor_x += 1
-            return
+            if self.has_selection():
+                self.delete_selection()
 
-        is_html = buf.filepath and buf.filepath.suffix.lower() in ['.html', '.htm']
-        if self.html_tag_autocomplete and is_html and char == '>':
-            line_before_cursor = current_line[:x]
-            last_open_bracket = line_before_cursor.rfind('<')
-            if last_open_bracket != -1:
-                tag_content = line_before_cursor[last_open_bracket + 1:]
-                tag_name = tag_content.split()[0]
-                
-                if tag_name and not tag_name.startswith('/') and tag_name not in self.html_void_tags:
-                    self._save_state_for_undo()
-                    closing_tag = f"</{tag_name}>"
-                    buf.lines[y] = current_line[:x] + '>' + closing_tag + current_line[x:]
-                    buf.cursor_x += 1
-                    return
+            # Só lê em volta do cursor: em linhas longas, montar a linha inteira custaria mais que a edição
+            y, x = buf.cursor_y, buf.cursor_x
 
-        self._save_state_for_undo()
+            closing_chars = self.autocomplete_pairs.values()
+            if char in closing_chars and buf.line_slice(y, x, x + 1) == char:
+                buf.cursor_x += 1
+                return
 
-        if char in self.autocomplete_pairs:
-            closing_char = self.autocomplete_pairs[char]
-            buf.lines[y] = current_line[:x] + char + closing_char + current_line[x:]
-            buf.cursor_x += 1
-        else:
-            buf.lines[y] = current_line[:x] + char + current_line[x:]
+            is_html = buf.filepath and buf.filepath.suffix.lower() in ['.html', '.htm']
+            if self.html_tag_autocomplete and is_html and char == '>':
+                line_before_cursor = buf.line_slice(y, 0, x)
+                last_open_bracket = line_before_cursor.rfind('<')
+                if last_open_bracket != -1:
+                    tag_content = line_before_cursor[last_open_bracket + 1:]
+                    tag_name = tag_content.split()[0]
+
+                    if tag_name and not tag_name.startswith('/') and tag_name not in self.html_void_tags:
+                        closing_tag = f"</{tag_name}>"
+                        buf.edit_in_line(y, x, 0, '>' + closing_tag)
+                        buf.cursor_x += 1
+                        return
+
+            if char in self.autocomplete_pairs:
+                closing_char = self.autocomplete_pairs[char]
+                buf.edit_in_line(y, x, 0, char + closing_char)
+            else:
+                buf.edit_in_line(y, x, 0, char)
             buf.cursor_x += 1
 
     def insert_text_at_cursor(self, text: str):
-        if not self.active_buffer: return
+        if not self.active_buffer or not text: return
         buf = self.active_buffer
-        y, x = buf.cursor_y, buf.cursor_x
-        
-        lines_to_insert = text.split('\n')
-        
-        if len(lines_to_insert) == 1:
-            buf.lines[y] = buf.lines[y][:x] + lines_to_insert[0] + buf.lines[y][x:]
-            buf.cursor_x += len(lines_to_insert[0])
-        else:
-            self._save_state_for_undo()
-
-            line_remainder = buf.lines[y][x:]
-
-            buf.lines[y] = buf.lines[y][:x] + lines_to_insert[0]
-            
-            for i, line in enumerate(lines_to_insert[1:-1], start=y + 1):
-                buf.lines.insert(i, line)
+        with self.transaction(buf):
+            y, x = buf.cursor_y, buf.cursor_x
+            current_line = buf.lines[y]
 
-            last_line_index = y + len(lines_to_insert) - 1
-            buf.lines.insert(last_line_index, lines_to_insert[-1] + line_remainder)
+            lines_to_insert = text.split('\n')
+            if len(lines_to_insert) == 1:
+                buf.cursor_x = x + len(lines_to_insert[0])
+            else:
+                buf.cursor_x = len(lines_to_insert[-1])
+            buf.cursor_y = y + len(lines_to_insert) - 1
 
-            buf.cursor_y += len(lines_to_insert) - 1
-            buf.cursor_x = len(lines_to_insert[-1])
-        buf.dirty = True
+            # Monta o bloco final e aplica com um único splice, mesmo para colagens enormes
+            lines_to_insert[0] = current_line[:x] + lines_to_insert[0]
+            lines_to_insert[-1] = lines_to_insert[-1] + current_line[x:]
+            buf.splice(y, y + 1, lines_to_insert)
 
     def delete_char(self):
         if not self.active_buffer: return
         if self.has_selection():
             return self.delete_selection()
         buf = self.active_buffer
-        self._save_state_for_undo()
         y, x = buf.cursor_y, buf.cursor_x
-        if x > 0:
-            buf.lines[y] = buf.lines[y][:x-1] + buf.lines[y][x:]
-            buf.cursor_x -= 1
-        elif y > 0:
-            prev_len = len(buf.lines[y-1])
-            current_line = buf.lines.pop(y)
-            buf.lines[y-1] += current_line
-            buf.cursor_y -= 1
-            buf.cursor_x = prev_len
-        
-        line = buf.lines[buf.cursor_y]
-        if x > 0 and x < len(line):
-            char_before = line[x-1]
-            char_after = line[x]
-            if char_before in self.autocomplete_pairs and self.autocomplete_pairs[char_before] == char_after:
-                buf.lines[buf.cursor_y] = line[:x] + line[x+1:]
-
+        with self.transaction(buf):
+            if x > 0:
+                buf.edit_in_line(y, x - 1, 1, "")
+                buf.cursor_x -= 1
+            elif y > 0:
+                prev_len = len(buf.lines[y-1])
+                buf.splice(y - 1, y + 1, [buf.lines[y-1] + buf.lines[y]])
+                buf.cursor_y -= 1
+                buf.cursor_x = prev_len
+
+            if x > 0 and x < buf.line_length(buf.cursor_y):
+                char_before, char_after = buf.line_slice(buf.cursor_y, x - 1, x + 1)
+                if char_before in self.autocomplete_pairs and self.autocomplete_pairs[char_before] == char_after:
+                    buf.edit_in_line(buf.cursor_y, x, 1, "")
 
     def new_line_with_indent(self):
         if not self.active_buffer: return
-        if self.has_selection():
-            self.delete_selection()
-        self._save_state_for_undo()
         buf = self.active_buffer
-        y, x = buf.cursor_y, buf.cursor_x
-        current_line = buf.lines[y]
-        
-        if self.smart_auto_indent and x > 0 and x < len(current_line):
-            char_before = current_line[x-1]
-            char_after = current_line[x]
-            if char_before in self.autocomplete_pairs and self.autocomplete_pairs[char_before] == char_after:
-                indentation = "".join(char for char in current_line if char.isspace())
-                
-                buf.lines[y] = current_line[:x]
-                buf.lines.insert(y + 1, indentation + "    ") # Linha do meio, indentada
-                buf.lines.insert(y + 2, indentation + char_after) # Linha de baixo com o fechamento
-                buf.lines[y+2] = buf.lines[y+2][:len(indentation)] + char_after + current_line[x+1:]
-                buf.cursor_y += 1
-                buf.cursor_x = len(indentation) + 4
-                return
+        with self.transaction(buf):
+            if self.has_selection():
+                self.delete_selection()
+            y, x = buf.cursor_y, buf.cursor_x
+            current_line = buf.lines[y]
+
+            if self.smart_auto_indent and x > 0 and x < len(current_line):
+                char_before = current_line[x-1]
+                char_after = current_line[x]
+                if char_before in self.autocomplete_pairs and self.autocomplete_pairs[char_before] == char_after:
+                    indentation = "".join(char for char in current_line if char.isspace())
+
+                    buf.splice(y, y + 1, [
+                        current_line[:x],
+                        indentation + "    ", # Linha do meio, indentada
+                        indentation + char_after + current_line[x+1:], # Linha de baixo com o fechamento
+                    ])
+                    buf.cursor_y += 1
+                    buf.cursor_x = len(indentation) + 4
+                    return
 
-        indentation = ""
-        for char in current_line:
-            if char.isspace():
-                indentation += char
-            else:
-                break
-        
-        remaining_text = current_line[x:]
-        buf.lines[y] = current_line[:x]
-        
-        buf.lines.insert(y + 1, indentation + remaining_text)
-        buf.cursor_y += 1
-        buf.cursor_x = len(indentation)
+            indentation = ""
+            for char in current_line:
+                if char.isspace():
+                    indentation += char
+                else:
+                    break
+
+            remaining_text = current_line[x:]
+            buf.splice(y, y + 1, [current_line[:x], indentation + remaining_text])
+            buf.cursor_y += 1
+            buf.cursor_x = len(indentation)
+
+    def unindent(self):
+        """Shift+Tab: tira um nível (até 4 espaços ou um tab) do começo da linha atual ou das selecionadas."""
+        if not self.active_buffer: return
+        buf = self.active_buffer
+        coords = self.get_selection_coords()
+        first, last = (coords[0], coords[2]) if coords else (buf.cursor_y, buf.cursor_y)
+        with self.transaction(buf):
+            for y in range(first, last + 1):
+                head = buf.line_slice(y, 0, 4)
+                removed = 1 if head.startswith("\t") else len(head) - len(head.lstrip(" "))
+                if not removed:
+                    continue
+                buf.edit_in_line(y, 0, removed, "")
+                if y == buf.cursor_y:
+                    buf.cursor_x = max(0, buf.cursor_x - removed)
+                if coords and y == buf.selection_anchor_y:
+                    buf.selection_anchor_x = max(0, buf.selection_anchor_x - removed)
 
     def duplicate_line(self):
         if not self.active_buffer: return
-        self._save_state_for_undo()
         buf = self.active_buffer
         if 0 <= buf.cursor_y < len(buf.lines):
-            buf.lines.insert(buf.cursor_y + 1, buf.lines[buf.cursor_y])
+            with self.transaction(buf):
+                buf.splice(buf.cursor_y + 1, buf.cursor_y + 1, [buf.lines[buf.cursor_y]])
             buf.cursor_y += 1
 
     def move_line_up(self):
         if not self.active_buffer: return
         buf = self.active_buffer
         if buf.cursor_y > 0:
-            self._save_state_for_undo()
-            buf.lines[buf.cursor_y], buf.lines[buf.cursor_y - 1] = buf.lines[buf.cursor_y - 1], buf.lines[buf.cursor_y]
+            y = buf.cursor_y
+            with self.transaction(buf):
+                buf.splice(y - 1, y + 1, [buf.lines[y], buf.lines[y - 1]])
             buf.cursor_y -= 1
 
     def move_line_down(self):
         if not self.active_buffer: return
         buf = self.active_buffer
         if buf.cursor_y < len(buf.lines) - 1:
-            self._save_state_for_undo()
-            buf.lines[buf.cursor_y], buf.lines[buf.cursor_y + 1] = buf.lines[buf.cursor_y + 1], buf.lines[buf.cursor_y]
+            y = buf.cursor_y
+            with self.transaction(buf):
+                buf.splice(y, y + 2, [buf.lines[y + 1], buf.lines[y]])
             buf.cursor_y += 1
 
     def toggle_comment(self):
         if not self.active_buffer: return
         buf = self.active_buffer
         if 0 <= buf.cursor_y < len(buf.lines):
-            self._save_state_for_undo()
             line = buf.lines[buf.cursor_y]
-            if line.lstrip().startswith("# "):
-                buf.lines[buf.cursor_y] = line.replace("# ", "", 1)
-            else:
-                buf.lines[buf.cursor_y] = "# " + line
+            with self.transaction(buf):
+                if line.lstrip().startswith("# "):
+                    buf.set_line(buf.cursor_y, line.replace("# ", "", 1))
+                else:
+                    buf.set_line(buf.cursor_y, "# " + line)
 
     def undo(self):
         if not self.active_buffer or not self.active_buffer._undo_stack:
             return False
         buf = self.active_buffer
-        current_state = { 'lines': [l for l in buf.lines], 'cursor_x': buf.cursor_x, 'cursor_y': buf.cursor_y }
-        buf._redo_stack.append(current_state)
+        buf._redo_stack.append(self._undo_state(buf))
         
         # Restaura o estado anterior
-        last_state = buf._undo_stack.pop()
-        buf.lines = last_state['lines']
-        buf.cursor_x = last_state['cursor_x']
-        buf.cursor_y = last_state['cursor_y']
-        buf.dirty = True
+        self._restore_state(buf, buf._undo_stack.pop())
+        buf.mark_changed()
         return True
 
     def redo(self):
         if not self.active_buffer or not self.active_buffer._redo_stack:
             return False
         buf = self.active_buffer
-        buf._undo_stack.append({ 'lines': [l for l in buf.lines], 'cursor_x': buf.cursor_x, 'cursor_y': buf.cursor_y })
+        buf._undo_stack.append(self._undo_state(buf))
         
-        next_state = buf._redo_stack.pop()
-        buf.lines = next_state['lines']
-        buf.cursor_x = next_state['cursor_x']
-        buf.cursor_y = next_state['cursor_y']
-        buf.dirty = True
+        self._restore_state(buf, buf._redo_stack.pop())
+        buf.mark_changed()
         return True
 
     def start_selection(self):
@@ -385,16 +827,14 @@ class Editor:
         coords = self.get_selection_coords()
         if not coords:
             return
-        
-        self._save_state_for_undo()
+
         buf = self.active_buffer
         y1, x1, y2, x2 = coords
-
-        if y1 == y2:
-            buf.lines[y1] = buf.lines[y1][:x1] + buf.lines[y1][x2:]
-        else:
-            buf.lines[y1] = buf.lines[y1][:x1] + buf.lines[y2][x2:]
-            del buf.lines[y1+1:y2+1]
+        with self.transaction(buf):
+            if y1 == y2:
+                buf.set_line(y1, buf.lines[y1][:x1] + buf.lines[y1][x2:])
+            else:
+                buf.splice(y1, y2 + 1, [buf.lines[y1][:x1] + buf.lines[y2][x2:]])
 
         buf.cursor_y, buf.cursor_x = y1, x1
         self.clear_selection()
@@ -436,7 +876,6 @@ class Editor:
     def cut_selection(self) -> str:
         if not self.active_buffer: return "Nenhuma aba ativa."
         if not self.has_selection():
-            self._save_state_for_undo()
             buf = self.active_buffer
             line = buf.lines[buf.cursor_y]
             if PYCLIP_AVAILABLE:
@@ -454,7 +893,7 @@ class Editor:
     def paste(self) -> str:
         if not PYCLIP_AVAILABLE:
             return "pyclip não está instalado. Copiar/colar desativado."
-        
+
         import pyclip
         text_to_paste = pyclip.paste()
 
@@ -464,9 +903,10 @@ class Editor:
             except UnicodeDecodeError:
                 return "Erro ao decodificar texto da área de transferência."
 
-        if self.has_selection():
-            self.delete_selection()
-        if text_to_paste:
-            self.insert_text_at_cursor(text_to_paste.replace('\t', '    '))
-            return "Colado."
+        with self.transaction():
+            if self.has_selection():
+                self.delete_selection()
+            if text_to_paste:
+                self.insert_text_at_cursor(text_to_paste)
+                return "Colado."
         return "Área de transferência vazia."
\ No newline at end of file
@@ -1,6 +1,14 @@
+import hashlib
 import os
+import shlex
+import shutil
+import subprocess
+import sys
+import time
 from pathlib import Path
-from typing import Iterator, Tuple
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+from ecte.instrumentation import cache_hit, cache_miss, span
 
 EXECUTION_COMMANDS = {
     ".py": 'python3 "{filepath}"',
@@ -9,16 +17,148 @@ EXECUTION_COMMANDS = {
     ".rb": 'ruby "{filepath}"',
     ".ts": 'ts-node "{filepath}"',
     ".go": 'go run "{filepath}"',
+}
 
-    ".c": 'gcc "{filepath}" -o "/tmp/{filename_no_ext}" && "/tmp/{filename_no_ext}"',
-    ".cpp": 'g++ "{filepath}" -o "/tmp/{filename_no_ext}" && "/tmp/{filename_no_ext}"',
-    ".rs": 'rustc "{filepath}" -o "/tmp/{filename_no_ext}" && "/tmp/{filename_no_ext}"',
-    
-    ".java": 'javac -d "/tmp" "{filepath}" && java -cp "/tmp" "{filename_no_ext}"',
-    
-    ".cs": 'mcs -out:"/tmp/{filename_no_ext}.exe" "{filepath}" && mono "/tmp/{filename_no_ext}.exe"',
+# Linguagens compiladas: (compilação, execução). {build_dir} é a entrada do cache de build,
+# então fontes iguais compiladas com o mesmo comando rodam o binário já pronto
+BUILD_COMMANDS = {
+    ".c": ('gcc "{filepath}" -o "{build_dir}/{filename_no_ext}"', '"{build_dir}/{filename_no_ext}"'),
+    ".cpp": ('g++ "{filepath}" -o "{build_dir}/{filename_no_ext}"', '"{build_dir}/{filename_no_ext}"'),
+    ".rs": ('rustc "{filepath}" -o "{build_dir}/{filename_no_ext}"', '"{build_dir}/{filename_no_ext}"'),
+    ".java": ('javac -d "{build_dir}" "{filepath}"', 'java -cp "{build_dir}" "{filename_no_ext}"'),
+    ".cs": ('mcs -out:"{build_dir}/{filename_no_ext}.exe" "{filepath}"', 'mono "{build_dir}/{filename_no_ext}.exe"'),
 }
 
+# Variante "com perfil" (Alt+E); {profile_path} recebe o arquivo do cProfile
+PROFILE_COMMANDS = {
+    ".py": 'python3 -m cProfile -o "{profile_path}" "{filepath}"',
+}
+
+BUILD_CACHE_DIR = Path.home() / ".config" / "ecte" / "build"
+BUILD_CACHE_MAX_ENTRIES = 64 # As menos usadas saem primeiro
+BUILD_TIMEOUT = 120 # Segundos
+
+
+class RunUsage(NamedTuple):
+    """Consumo de uma execução: tempo de parede, CPU do processo e seus filhos, pico de memória."""
+    wall: float # Segundos
+    user: Optional[float] = None
+    system: Optional[float] = None
+    max_rss: Optional[int] = None # Bytes
+    # O filho herda no fork o pico de RSS do editor: até esse valor, max_rss é só um teto
+    rss_floor: Optional[int] = None
+
+    @classmethod
+    def from_rusage(cls, wall: float, rusage, parent_rusage=None) -> "RunUsage":
+        if rusage is None: # Sem os.wait4 (Windows): só o tempo de parede
+            return cls(wall)
+        scale = 1 if sys.platform == "darwin" else 1024 # ru_maxrss: bytes no macOS, KB no Linux
+        floor = parent_rusage.ru_maxrss * scale if parent_rusage is not None else None
+        return cls(wall, rusage.ru_utime, rusage.ru_stime, rusage.ru_maxrss * scale, floor)
+
+
+class BuildStep(NamedTuple):
+    source: Path
+    key: str # Hash do fonte, do comando de compilação e do compilador
+    template: str # Comando de compilação (BUILD_COMMANDS)
+    build_dir: Path
+
+    @property
+    def command(self) -> str:
+        return _format(self.template, self.source, self.build_dir)
+
+
+class BuildCache:
+    """
+    Binários das linguagens compiladas, um diretório por chave em BUILD_CACHE_DIR. A chave
+    cobre o conteúdo do fonte, o comando de compilação com as flags e o executável do
+    compilador (caminho e mtime), então dois projetos com 'main.c' não se atropelam e um
+    Ctrl+E sem mudanças pula a compilação. Só o arquivo executado entra na chave: headers e
+    módulos ao lado dele não são rastreados.
+    """
+
+    def __init__(self, root: Path = BUILD_CACHE_DIR, max_entries: int = BUILD_CACHE_MAX_ENTRIES):
+        self.root = root
+        self.max_entries = max_entries
+
+    def step_for(self, filepath: Path) -> Optional[BuildStep]:
+        templates = BUILD_COMMANDS.get(filepath.suffix.lower())
+        if not templates:
+            return None
+        compile_template = templates[0]
+        digest = hashlib.blake2b(digest_size=12)
+        digest.update(compile_template.encode("utf-8"))
+        compiler = shutil.which(compile_template.split()[0])
+        if compiler:
+            digest.update(compiler.encode("utf-8", "surrogateescape"))
+            digest.update(str(os.stat(compiler).st_mtime_ns).encode())
+        digest.update(filepath.name.encode("utf-8", "surrogateescape")) # Nome da classe no Java e no C#
+        digest.update(filepath.read_bytes())
+        key = digest.hexdigest()
+        return BuildStep(filepath, key, compile_template, self.root / key)
+
+    def is_built(self, step: BuildStep) -> bool:
+        return step.build_dir.is_dir()
+
+    def build(self, step: BuildStep, cwd: Path) -> Tuple[bool, List[str]]:
+        """Compila, se preciso, e devolve (sucesso, linhas para o console)."""
+        name = step.source.name
+        if self.is_built(step):
+            cache_hit("build")
+            os.utime(step.build_dir) # Marca como usada para a limpeza
+            return True, [f"[cache] {name}: binário em cache ({step.key[:8]}), compilação pulada."]
+        cache_miss("build")
+        # Compila em um diretório temporário e só então publica: uma compilação que falha ou
+        # é interrompida nunca deixa uma entrada pela metade
+        tmp_dir = step.build_dir.with_name(f"{step.key}.tmp-{os.getpid()}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+        start = time.perf_counter()
+        command = _format(step.template, step.source, tmp_dir)
+        try:
+            with span("build"):
+                result = subprocess.run(shlex.split(command), capture_output=True, text=True,
+                                        timeout=BUILD_TIMEOUT, check=False, cwd=cwd)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return False, [f"[ERRO] Compilação de {name}: {e}"]
+        elapsed = time.perf_counter() - start
+        lines = result.stdout.splitlines() + [f"[ERRO] {line}" for line in result.stderr.splitlines()]
+        if result.returncode != 0:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return False, lines + [f"[ERRO] {name}: compilação falhou em {elapsed:.2f} s (código {result.returncode})."]
+        try:
+            os.replace(tmp_dir, step.build_dir)
+        except OSError: # Outra instância publicou a mesma chave primeiro
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        self.prune()
+        return True, lines + [f"[cache] {name}: compilado em {elapsed:.2f} s ({step.key[:8]})."]
+
+    def prune(self):
+        try:
+            entries = [entry for entry in self.root.iterdir() if entry.is_dir() and ".tmp-" not in entry.name]
+        except OSError:
+            return
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_entries]:
+            shutil.rmtree(entry, ignore_errors=True)
+
+
+build_cache = BuildCache()
+
+
+def _format(template: str, filepath: Path, build_dir: Optional[Path] = None) -> str:
+    return template.format(
+        filepath=str(filepath),
+        dirpath=str(filepath.parent),
+        filename=filepath.name,
+        filename_no_ext=filepath.stem,
+        build_dir=str(build_dir),
+    )
+
+
 def search_in_project(directory: Path, search_term: str) -> Iterator[Tuple[Path, int, str]]:
     """
     Busca por um termo em todos os arquivos de um diretório (projeto).
@@ -39,26 +179,41 @@ def search_in_project(directory: Path, search_term: str) -> Iterator[Tuple[Path,
             except Exception:
                 continue # Ignora arquivos que não podem ser lidos
 
-def get_execution_command(filepath: Path) -> str | None:
+def get_execution(filepath: Path) -> Tuple[Optional[str], Optional[BuildStep]]:
     """
-    Determina o comando de execução para um determinado arquivo.
+    Comando de execução de um arquivo e, para linguagens compiladas, a compilação que vem
+    antes (que o cache pula quando o binário já existe).
     """
     if not filepath:
-        return None
+        return None, None
 
     if os.access(filepath, os.X_OK) and not filepath.is_dir():
-        return f'"{filepath}"'
+        return f'"{filepath}"', None
 
-    suffix = filepath.suffix.lower()
-    command_template = EXECUTION_COMMANDS.get(suffix)
+    try:
+        step = build_cache.step_for(filepath)
+    except OSError:
+        step = None
+    if step:
+        return _format(BUILD_COMMANDS[filepath.suffix.lower()][1], filepath, step.build_dir), step
 
+    command_template = EXECUTION_COMMANDS.get(filepath.suffix.lower())
     if command_template:
-        placeholders = {
-            "filepath": str(filepath),
-            "dirpath": str(filepath.parent),
-            "filename": filepath.name,
-            "filename_no_ext": filepath.stem,
-        }
-        return command_template.format(**placeholders)
-
-    return None
\ No newline at end of file
+        return _format(command_template, filepath), None
+
+    return None, None
+
+
+def get_profiled_execution(filepath: Path, profile_path: Path) -> Tuple[Optional[str], Optional[BuildStep]]:
+    """Como get_execution, mas com cProfile gravando em profile_path quando a linguagem permite."""
+    template = PROFILE_COMMANDS.get(filepath.suffix.lower()) if filepath else None
+    if template and not os.access(filepath, os.X_OK):
+        return template.format(filepath=str(filepath), profile_path=str(profile_path)), None
+    return get_execution(filepath)
+
+
+def get_execution_command(filepath: Path) -> str | None:
+    """
+    Determina o comando de execução para um determinado arquivo.
+    """
+    return get_execution(filepath)[0]
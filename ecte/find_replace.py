@@ -16,8 +16,11 @@ def find_all_occurrences(lines: list[str], search_term: str) -> list[tuple[int,
             start_index = index + 1
     return occurrences
 
-def start_find_replace(stdscr, buffer):
-    """Inicia o fluxo de localizar e substituir."""
+def start_find_replace(stdscr, editor, buffer):
+    """
+    Inicia o fluxo de localizar e substituir. A sessão inteira é uma transação do editor:
+    um registro de desfazer e uma versão nova no fim, e Cancelar volta ao texto original.
+    """
     
     # 1. Obter os termos de busca e substituição do usuário
     search_term = prompt_for_input(stdscr, "Localizar:")
@@ -36,71 +39,62 @@ def start_find_replace(stdscr, buffer):
     # 3. Iniciar o processo de substituição interativa
     original_lines = [line for line in buffer.lines]
     original_cursor = (buffer.cursor_y, buffer.cursor_x)
+    original_dirty = buffer.dirty
     
     i = 0
     replacements_count = 0
     
-    while i < len(occurrences):
-        y, x = occurrences[i]
-        
-        # Move o cursor para a ocorrência atual para que o usuário a veja
-        buffer.cursor_y = y
-        buffer.cursor_x = x
-        
-        # Redesenha a tela para mostrar a nova posição do cursor
-        # (Esta é uma simplificação, o ideal seria ter o loop principal redesenhando)
-        stdscr.clear() 
-        # Precisamos de uma forma de redesenhar a UI principal aqui.
-        # Por enquanto, vamos focar na lógica e usar um prompt.
-
-        # Mostra o prompt de opções
-        options = ["Substituir", "Ignorar", "Substituir Tudo", "Cancelar"]
-        choice = prompt_with_options(
-            stdscr, 
-            f"Substituir '{search_term}'? ({i+1}/{len(occurrences)})",
-            options
-        )
-
-        if choice == "Substituir":
-            # Aplica a substituição na linha
-            line = buffer.lines[y]
-            buffer.lines[y] = line[:x] + replace_term + line[x + len(search_term):]
+    with editor.transaction(buffer):
+        while i < len(occurrences):
+            y, x = occurrences[i]
             
-            # Atualiza as coordenadas das ocorrências futuras na mesma linha
-            offset = len(replace_term) - len(search_term)
-            for j in range(i + 1, len(occurrences)):
-                if occurrences[j][0] == y:
-                    occurrences[j] = (y, occurrences[j][1] + offset)
+            # Move o cursor para a ocorrência atual para que o usuário a veja
+            buffer.cursor_y = y
+            buffer.cursor_x = x
             
-            replacements_count += 1
-            i += 1
+            # Redesenha a tela para mostrar a nova posição do cursor
+            # (Esta é uma simplificação, o ideal seria ter o loop principal redesenhando)
+            stdscr.clear() 
 
-        elif choice == "Ignorar":
-            i += 1
+            # Mostra o prompt de opções
+            options = ["Substituir", "Ignorar", "Substituir Tudo", "Cancelar"]
+            choice = prompt_with_options(
+                stdscr, 
+                f"Substituir '{search_term}'? ({i+1}/{len(occurrences)})",
+                options
+            )
 
-        elif choice == "Substituir Tudo":
-            # Salva o estado para undo antes da substituição em massa
-            # A lógica de undo está no editor, não no buffer diretamente.
-            # Esta parte precisaria de uma refatoração maior para suportar undo.
-            # Por enquanto, a substituição em massa não será "desfazível".
-            # Substitui a atual e todas as restantes
-            for j in range(i, len(occurrences)):
-                y_rem, x_rem = occurrences[j]
-                # Recalcula a posição x se já houve substituições na linha
-                line_rem = buffer.lines[y_rem]
-                # Esta lógica de recalcular o x pode ser complexa. Uma abordagem mais simples:
-            
-            # Abordagem mais simples para "Substituir Tudo"
-            new_lines = [line.replace(search_term, replace_term) for line in original_lines]
-            final_replacements = sum(line.count(search_term) for line in original_lines)
-            buffer.lines = new_lines
-            buffer.dirty = True
-            return f"{final_replacements} ocorrências substituídas."
+            if choice == "Substituir":
+                # Aplica a substituição na linha
+                line = buffer.lines[y]
+                buffer.set_line(y, line[:x] + replace_term + line[x + len(search_term):])
+                
+                # Atualiza as coordenadas das ocorrências futuras na mesma linha
+                offset = len(replace_term) - len(search_term)
+                for j in range(i + 1, len(occurrences)):
+                    if occurrences[j][0] == y:
+                        occurrences[j] = (y, occurrences[j][1] + offset)
+                
+                replacements_count += 1
+                i += 1
+
+            elif choice == "Ignorar":
+                i += 1
 
-        elif choice is None or choice == "Cancelar":
-            buffer.lines = original_lines # Restaura o estado original
-            buffer.cursor_y, buffer.cursor_x = original_cursor
-            return "Operação cancelada."
+            elif choice == "Substituir Tudo":
+                # Substitui a atual e todas as restantes (e as ignoradas antes)
+                new_lines = [line.replace(search_term, replace_term) for line in original_lines]
+                final_replacements = sum(line.count(search_term) for line in original_lines)
+                buffer.lines = new_lines
+                buffer.mark_changed()
+                return f"{final_replacements} ocorrências substituídas."
 
-    buffer.dirty = True
-    return f"{replacements_count} ocorrências substituídas."
\ No newline at end of file
+            elif choice is None or choice == "Cancelar":
+                buffer.lines = original_lines # Restaura o estado original (sem alterações, a transação não deixa registro)
+                break
+
+    if i < len(occurrences): # Cancelada
+        buffer.cursor_y, buffer.cursor_x = original_cursor
+        buffer.dirty = original_dirty
+        return "Operação cancelada."
+    return f"{replacements_count} ocorrências substituídas."
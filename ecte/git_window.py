@@ -3,6 +3,7 @@ import subprocess
 from pathlib import Path
 import textwrap
 from .utils import prompt_for_input
+from .instrumentation import span
 
 class GitWindow:
     def __init__(self, stdscr, project_path: Path | None):
@@ -43,12 +44,13 @@ class GitWindow:
         if not self.project_path or not (self.project_path / ".git").is_dir():
             return "", "Não é um repositório Git ou nenhum projeto aberto.", 1
         try:
-            process = subprocess.run(
-                ["git", "-C", str(self.project_path)] + command,
-                capture_output=True,
-                text=True,
-                check=False
-            )
+            with span(f"git.{command[0]}"):
+                process = subprocess.run(
+                    ["git", "-C", str(self.project_path)] + command,
+                    capture_output=True,
+                    text=True,
+                    check=False
+                )
             return process.stdout, process.stderr, process.returncode
         except FileNotFoundError:
             return "", "Comando 'git' não encontrado. Ele está instalado e no seu PATH?", 1
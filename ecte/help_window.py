@@ -6,26 +6,33 @@ class HelpWindow:
         self.commands = [
             ("Atalhos Globais", ""),
             ("F1", "Mostrar/Esconder esta ajuda"),
+            ("F12", "Mostrar/Esconder o HUD de desempenho"),
             ("Ctrl + Q", "Sair do editor"),
             ("Ctrl + S", "Salvar o arquivo atual"),
             ("Ctrl + N", "Nova aba (arquivo em branco)"),
             ("Ctrl + W", "Fechar aba atual"),
-            ("Ctrl + Tab", "Próxima aba"),
-            ("Shift + Ctrl + Tab", "Aba anterior"),
+            ("Ctrl + PgDn / Alt + .", "Próxima aba"),
+            ("Ctrl + PgUp / Alt + ,", "Aba anterior"),
             ("Ctrl + F", "Mostrar/Esconder a barra lateral"),
             ("Ctrl + E", "Executar arquivo no console"),
+            ("Alt + W", "Observar o arquivo: rodar de novo a cada save"),
+            ("Alt + E", "Executar com perfil (tempo, CPU, memória, cProfile)"),
+            ("F6", "Mostrar/Esconder o painel do último perfil"),
             ("Alt + T", "Mostrar/Esconder o console"),
             ("Alt + N", "Mostrar janela de novidades da versão"),
             ("Alt + S", "Iniciar/Parar servidor local"),
             ("Alt + L", "Mostrar/Esconder a estrutura do código"),
             ("Alt + G", "Abrir painel de controle do Git"),
             ("Alt + C", "Abrir janela de configurações"),
+            ("Alt + Z", "Ligar/Desligar a quebra de linha suave"),
             ("Ctrl + T", "Abrir terminal na pasta do projeto"),
             ("Ctrl + P", "Buscar pastas no projeto"),
             ("Ctrl + Shift + F", "Buscar texto em todo o projeto"),
             ("Shift + S", "Localizar e substituir texto"),
             ("", ""),
             ("Edição de Texto", ""),
+            ("Tab", "Completar a palavra ou indentar"),
+            ("Shift + Tab", "Desindentar a linha (ou as selecionadas)"),
             ("Ctrl + D", "Duplicar a linha atual"),
             ("Shift + Setas", "Selecionar texto"),
             ("Ctrl + C", "Copiar seleção"),
@@ -35,6 +42,20 @@ class HelpWindow:
             ("Ctrl + Z", "Desfazer a última ação"),
             ("Ctrl + Y", "Refazer a última ação"),
             ("Alt + ↑ / ↓", "Mover a linha atual para cima/baixo"),
+            ("Alt + M", "Iniciar/Parar a gravação de uma macro"),
+            ("Alt + R", "Repetir a macro (N vezes ou em cada linha selecionada)"),
+            ("", ""),
+            ("Arquivos Binários (Hexadecimal)", ""),
+            ("Setas / PgUp / PgDn", "Andar pelos bytes"),
+            ("Home / End", "Início/Fim da linha de 16 bytes"),
+            ("Ctrl + Home / End", "Início/Fim do arquivo"),
+            ("G", "Ir para um deslocamento (0x1f40, +16, 50%)"),
+            ("/", "Buscar bytes (7f 45 4c 46) ou texto (\"ELF\")"),
+            ("N / Shift + N", "Próxima/Anterior ocorrência"),
+            ("", ""),
+            ("Console (Alt + T)", ""),
+            ("Tab", "Completar comando, alias ou caminho (de novo: próximo candidato)"),
+            ("Shift + Tab", "Candidato anterior"),
             ("", ""),
             ("Git (Alt + G)",""),
             ("TAB", "Alternar entre painéis"),
@@ -0,0 +1,192 @@
+import curses
+import mmap
+import os
+import re
+from pathlib import Path
+from typing import Callable, Optional
+
+from ecte.editor import Buffer
+from ecte.sniff import FileFormat
+
+BYTES_PER_ROW = 16
+SEARCH_CHUNK = 8 * 1024 * 1024 # Bytes por chamada a mmap.find; entre elas a busca pode ser cancelada
+BINARY_FORMAT = FileFormat("", binary=True)
+
+_PRINTABLE = bytes(b if 0x20 <= b < 0x7f else 0x2e for b in range(256)) # Fora do ASCII imprimível: '.'
+_HEX_PATTERN = re.compile(r"(0x)?[0-9a-fA-F]{2}([\s:]*(0x)?[0-9a-fA-F]{2})*")
+
+
+class HexView(Buffer):
+    """
+    Aba somente leitura com os bytes do arquivo em hexadecimal e ASCII. O arquivo é mapeado
+    (mmap) e só as linhas visíveis são formatadas, então o tamanho não pesa na abertura nem
+    na memória. As linhas do Buffer ficam vazias; a posição é um deslocamento em bytes.
+    """
+
+    def __init__(self, path: Path):
+        super().__init__(path, lazy=True)
+        self._lines = [""]
+        self.file_format = BINARY_FORMAT
+        self.position = 0 # Byte sob o cursor
+        self.top = 0 # Primeira linha (de BYTES_PER_ROW bytes) na tela
+        self.pattern = b"" # Última busca, repetida por find_next
+        self._map: Optional[mmap.mmap] = None
+        self._size = None
+
+    @property
+    def data(self):
+        """O arquivo mapeado, aberto no primeiro uso (abas restauradas da sessão não abrem nada)."""
+        if self._map is None and self._size is None:
+            with open(self.filepath, "rb") as f:
+                self._size = os.fstat(f.fileno()).st_size
+                if self._size: # mmap recusa arquivos vazios
+                    self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map if self._map is not None else b""
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        self._map = None
+        self._size = None
+
+    def _load(self):
+        self._lines = [""] # Nada a ler: os bytes vêm do mmap
+
+    def freeze(self):
+        pass # A memória já é constante; o mmap é do sistema operacional
+
+    def save(self) -> bool:
+        return False
+
+    @property
+    def offset_width(self) -> int:
+        return max(8, len(f"{max(0, self.size - 1):x}"))
+
+    def row_text(self, row: int) -> str:
+        """'00000010  7f 45 4c 46 02 01 01 00  00 00 00 00 00 00 00 00  |.ELF............|'"""
+        start = row * BYTES_PER_ROW
+        chunk = self.data[start:start + BYTES_PER_ROW]
+        cells = [f"{b:02x}" for b in chunk] + ["  "] * (BYTES_PER_ROW - len(chunk))
+        half = BYTES_PER_ROW // 2
+        hex_part = " ".join(cells[:half]) + "  " + " ".join(cells[half:])
+        ascii_part = chunk.translate(_PRINTABLE).decode("ascii")
+        return f"{start:0{self.offset_width}x}  {hex_part}  |{ascii_part.ljust(BYTES_PER_ROW)}|"
+
+    def cell_columns(self, index: int):
+        """Colunas, dentro de row_text, do byte `index` da linha no hexadecimal e no ASCII."""
+        hex_column = self.offset_width + 2 + index * 3 + (1 if index >= BYTES_PER_ROW // 2 else 0)
+        ascii_column = self.offset_width + 2 + BYTES_PER_ROW * 3 + 1 + 2 + index
+        return hex_column, ascii_column
+
+    @property
+    def row_count(self) -> int:
+        return max(1, (self.size + BYTES_PER_ROW - 1) // BYTES_PER_ROW)
+
+    def move(self, delta: int):
+        self.jump_to(self.position + delta)
+
+    def jump_to(self, offset: int):
+        self.position = max(0, min(offset, self.size - 1))
+
+    def scroll_into_view(self, height: int):
+        row = self.position // BYTES_PER_ROW
+        if row < self.top:
+            self.top = row
+        elif row >= self.top + height:
+            self.top = row - height + 1
+        self.top = max(0, min(self.top, self.row_count - 1))
+
+    def find(self, pattern: bytes, start: int, backwards: bool = False,
+             cancelled: Callable[[], bool] = lambda: False) -> Optional[int]:
+        """
+        Próxima ocorrência a partir de `start` (ou a última antes dele), dando a volta no
+        arquivo. Devolve -1 se não houver nenhuma e None se `cancelled()` pedir para parar.
+        """
+        size = self.size
+        if not pattern or not size:
+            return -1
+        before, after = (0, min(size, start + len(pattern) - 1)), (min(start, size), size)
+        for low, high in ((before, after) if backwards else (after, before)):
+            found = self._search(pattern, low, high, backwards, cancelled)
+            if found != -1:
+                return found
+        return -1
+
+    def _search(self, pattern: bytes, low: int, high: int, backwards: bool, cancelled) -> Optional[int]:
+        """Ocorrência inteira em [low, high), em blocos sobrepostos pelo tamanho do padrão."""
+        data = self.data
+        overlap = len(pattern) - 1
+        if backwards:
+            end = high
+            while end - low > overlap:
+                begin = max(low, end - SEARCH_CHUNK - overlap)
+                found = data.rfind(pattern, begin, end)
+                if found != -1 or begin == low:
+                    return found
+                if cancelled():
+                    return None
+                end = begin + overlap
+        else:
+            begin = low
+            while high - begin > overlap:
+                end = min(high, begin + SEARCH_CHUNK + overlap)
+                found = data.find(pattern, begin, end)
+                if found != -1 or end == high:
+                    return found
+                if cancelled():
+                    return None
+                begin = end - overlap
+        return -1
+
+
+def parse_pattern(text: str) -> bytes:
+    """
+    Texto digitado na busca -> bytes. Pares hexadecimais ('7f 45 4c 46', '0x7f454c46',
+    'de:ad:be:ef') viram os próprios bytes; o resto, ou qualquer coisa entre aspas, é
+    procurado como texto UTF-8.
+    """
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+        return text[1:-1].encode("utf-8")
+    if _HEX_PATTERN.fullmatch(text):
+        return bytes.fromhex(re.sub(r"0x|[\s:]", "", text))
+    return text.encode("utf-8")
+
+
+def parse_offset(text: str, current: int, size: int) -> int:
+    """'0x1f40', '8000', '+0x100' / '-16' (relativos ao cursor) ou '50%' do arquivo."""
+    text = text.strip().replace("_", "")
+    if text.endswith("%"):
+        return int(size * float(text[:-1]) / 100)
+    if text[:1] in "+-":
+        return current + int(text, 0)
+    if text[:1] == "0" and text[1:2].isdigit(): # int(…, 0) recusa zeros à esquerda
+        text = text.lstrip("0") or "0"
+    return int(text, 0)
+
+
+def draw_hex_view(stdscr, view: HexView, y: int, height: int, width: int):
+    """Desenha as linhas visíveis a partir da linha de tela `y`; devolve a posição do cursor na tela."""
+    view.jump_to(view.position) # O arquivo pode ter encolhido desde a sessão anterior
+    view.scroll_into_view(height)
+    cursor_row, cursor_index = divmod(view.position, BYTES_PER_ROW)
+    for i in range(height):
+        row = view.top + i
+        if row >= view.row_count:
+            break
+        line = view.row_text(row)
+        try:
+            stdscr.addstr(y + i, 0, line[:view.offset_width], curses.A_DIM)
+            stdscr.addstr(y + i, view.offset_width, line[view.offset_width:width - 1])
+            if row == cursor_row and view.size:
+                for column, length in zip(view.cell_columns(cursor_index), (2, 1)): # Hexadecimal e ASCII
+                    if column + length < width:
+                        stdscr.addstr(y + i, column, line[column:column + length], curses.A_REVERSE)
+        except curses.error:
+            pass
+    hex_column, _ = view.cell_columns(cursor_index)
+    return y + cursor_row - view.top, min(hex_column, max(0, width - 2))
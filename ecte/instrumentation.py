@@ -0,0 +1,274 @@
+import collections
+import curses
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+HUD_FRAMES = 120 # Quadros considerados nas médias do HUD
+TRACE_FLUSH_EVENTS = 2000
+TRACE_FLUSH_INTERVAL = 1.0
+
+# Única verificação feita no caminho quente quando a instrumentação está desligada
+enabled = False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "start", "top_level")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.top_level = profiler.enter()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        profiler.record(self.name, self.start, time.perf_counter_ns(), self.top_level)
+        return False
+
+
+def span(name: str):
+    """`with span("lex"): ...` mede o bloco; com a instrumentação desligada devolve um contexto vazio."""
+    return _Span(name) if enabled else NULL_SPAN
+
+
+def timed(name: str):
+    """Decorador equivalente a envolver a função inteira em span(name)."""
+    def decorator(func):
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            with _Span(name):
+                return func(*args, **kwargs)
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        wrapper.__wrapped__ = func
+        return wrapper
+    return decorator
+
+
+def cache_hit(name: str):
+    if enabled:
+        profiler.count_cache(name, True)
+
+
+def cache_miss(name: str):
+    if enabled:
+        profiler.count_cache(name, False)
+
+
+class TraceWriter:
+    """
+    Grava eventos no formato de trace do Chrome (chrome://tracing, Perfetto). Arquivos .jsonl
+    recebem um evento por linha; os demais, um array JSON sem o ']' final, que o formato aceita,
+    para que o arquivo continue válido mesmo se o editor for encerrado no meio.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.jsonl = self.path.suffix == ".jsonl"
+        self._events = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._pid = os.getpid()
+        self._origin_ns = time.perf_counter_ns()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            if not self.jsonl:
+                f.write("[\n")
+        self.add_metadata("process_name", {"name": "tasmacode"})
+
+    def add_metadata(self, name: str, args: dict):
+        with self._lock:
+            self._events.append({"name": name, "ph": "M", "pid": self._pid, "tid": threading.get_ident(), "args": args})
+
+    def add_complete(self, name: str, start_ns: int, end_ns: int):
+        event = {
+            "name": name, "cat": name.split(".")[0], "ph": "X", "pid": self._pid, "tid": threading.get_ident(),
+            "ts": (start_ns - self._origin_ns) / 1000, "dur": (end_ns - start_ns) / 1000,
+        }
+        with self._lock:
+            self._events.append(event)
+
+    def add_counter(self, name: str, values: dict):
+        event = {"name": name, "ph": "C", "pid": self._pid, "tid": 0,
+                 "ts": (time.perf_counter_ns() - self._origin_ns) / 1000, "args": values}
+        with self._lock:
+            self._events.append(event)
+
+    def maybe_flush(self):
+        if len(self._events) >= TRACE_FLUSH_EVENTS or time.monotonic() - self._last_flush >= TRACE_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            events, self._events = self._events, []
+        self._last_flush = time.monotonic()
+        if not events:
+            return
+        separator = "\n" if self.jsonl else ",\n"
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(e, ensure_ascii=False) + separator for e in events))
+
+
+class Profiler:
+    """
+    Acumula os tempos por subsistema a cada volta do loop principal (um "quadro"),
+    as teclas por segundo e as taxas de acerto dos caches. Alimenta o HUD e,
+    quando há um TraceWriter, o arquivo de trace.
+    """
+
+    def __init__(self):
+        self.hud_visible = False
+        self.trace: Optional[TraceWriter] = None
+        self.frames = collections.deque(maxlen=HUD_FRAMES) # (total_ns, {subsistema: ns})
+        self.caches = {} # nome -> [acertos, falhas]
+        self._current = collections.defaultdict(int)
+        self._frame_total = 0
+        self._key_times = collections.deque()
+        self._main_thread = threading.get_ident()
+        self._depth = 0
+
+    def _update_enabled(self):
+        global enabled
+        enabled = self.hud_visible or self.trace is not None
+
+    # --- Coleta ---
+
+    def enter(self) -> bool:
+        """Marca a entrada em um span; só os de primeiro nível na thread principal somam no quadro."""
+        if threading.get_ident() != self._main_thread:
+            return False
+        self._depth += 1
+        return self._depth == 1
+
+    def record(self, name: str, start_ns: int, end_ns: int, top_level: bool):
+        elapsed = end_ns - start_ns
+        if threading.get_ident() == self._main_thread:
+            self._depth -= 1
+            self._current[name] += elapsed
+            if top_level:
+                self._frame_total += elapsed
+        else:
+            self._current[name] += elapsed # Threads de fundo (console, diagnósticos) entram no quadro em que terminam
+        if self.trace:
+            self.trace.add_complete(name, start_ns, end_ns)
+
+    def count_cache(self, name: str, hit: bool):
+        counts = self.caches.setdefault(name, [0, 0])
+        counts[0 if hit else 1] += 1
+
+    def key_pressed(self):
+        if enabled:
+            self._key_times.append(time.monotonic())
+
+    def end_frame(self):
+        """Chamado no fim de cada volta do loop principal."""
+        if not enabled:
+            return
+        if self._frame_total or self._current:
+            self.frames.append((self._frame_total, dict(self._current)))
+            if self.trace:
+                self.trace.add_counter("frame_ms", {"ms": round(self._frame_total / 1e6, 3)})
+        self._current.clear()
+        self._frame_total = 0
+        if self.trace:
+            self.trace.maybe_flush()
+
+    # --- Controle ---
+
+    def toggle_hud(self) -> str:
+        self.hud_visible = not self.hud_visible
+        self._update_enabled()
+        return "HUD de desempenho ativado (F12 para esconder)." if self.hud_visible else "HUD de desempenho desativado."
+
+    def start_trace(self, path: Path) -> str:
+        self.stop_trace()
+        try:
+            self.trace = TraceWriter(path)
+        except OSError as e:
+            return f"Não foi possível criar o trace: {e}"
+        self._update_enabled()
+        return f"Gravando trace em {path}"
+
+    def stop_trace(self) -> Optional[str]:
+        if not self.trace:
+            return None
+        trace, self.trace = self.trace, None
+        self._update_enabled()
+        trace.flush()
+        return f"Trace salvo em {trace.path}"
+
+    # --- Leitura ---
+
+    def keys_per_second(self) -> float:
+        now = time.monotonic()
+        while self._key_times and now - self._key_times[0] > 1.0:
+            self._key_times.popleft()
+        return float(len(self._key_times))
+
+    def summary(self) -> dict:
+        frames = list(self.frames)
+        totals = [total for total, _ in frames]
+        subsystems = collections.defaultdict(int)
+        for _, parts in frames:
+            for name, ns in parts.items():
+                subsystems[name] += ns
+        count = max(1, len(frames))
+        return {
+            "last_ms": totals[-1] / 1e6 if totals else 0.0,
+            "avg_ms": sum(totals) / count / 1e6,
+            "max_ms": max(totals) / 1e6 if totals else 0.0,
+            "keys_per_second": self.keys_per_second(),
+            "subsystems": sorted(((name, ns / count / 1e6) for name, ns in subsystems.items()),
+                                 key=lambda item: item[1], reverse=True),
+            "caches": {name: hits / (hits + misses) for name, (hits, misses) in self.caches.items() if hits + misses},
+        }
+
+    def draw_hud(self, stdscr):
+        """Painel no canto superior direito com o tempo de quadro, teclas/s, subsistemas e caches."""
+        if not self.hud_visible:
+            return
+        info = self.summary()
+        lines = [
+            f"quadro {info['last_ms']:6.2f} ms",
+            f"média  {info['avg_ms']:6.2f}  máx {info['max_ms']:6.1f}",
+            f"teclas/s {info['keys_per_second']:4.0f}",
+        ]
+        lines += [f"{name[:14]:<14} {ms:7.2f} ms" for name, ms in info["subsystems"][:8]]
+        lines += [f"cache {name[:10]:<10} {rate * 100:5.1f}%" for name, rate in sorted(info["caches"].items())]
+        if self.trace:
+            lines.append(f"● trace {self.trace.path.name}"[:28])
+
+        h, w = stdscr.getmaxyx()
+        win_w = 30
+        win_h = len(lines) + 2
+        if w < win_w or h < win_h + 2:
+            return
+        win = curses.newwin(win_h, win_w, 2, w - win_w)
+        win.bkgd(' ', curses.color_pair(7))
+        win.box()
+        win.addstr(0, 2, " Desempenho ", curses.A_BOLD)
+        for i, line in enumerate(lines):
+            win.addstr(i + 1, 1, line[:win_w - 2])
+        win.noutrefresh()
+
+
+profiler = Profiler()
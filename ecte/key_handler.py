@@ -1,4 +1,7 @@
 import curses
+import os
+import select
+import sys
 import time
 import random
 from ecte.editor import Editor
@@ -8,11 +11,20 @@ from ecte.structbar import Structbar
 from ecte.git_window import GitWindow
 from ecte.whats_new_window import WhatsNewWindow
 
-from ecte.utils import open_terminal_at_path, prompt_for_confirmation, prompt_with_options
+from ecte.utils import open_terminal_at_path, prompt_for_confirmation, prompt_for_input, prompt_with_options
 from ecte.help_window import HelpWindow
 from ecte.config_window import ConfigWindow
 from ecte.find_replace import start_find_replace
-from ecte.execution_handler import get_execution_command, search_in_project
+from ecte.execution_handler import get_execution, search_in_project
+from ecte.instrumentation import profiler, span
+from ecte.keymap import Keymap, read_key_name
+from ecte.latency import read_key, tracker as latency_tracker
+from ecte.macro import parse_repeat_count, recorder as macro_recorder
+from ecte.run_watch import watcher as run_watcher
+from ecte.run_profile import run_profiler
+from ecte.wrap import move_cursor_rows
+from ecte.display import is_zero_width
+from ecte.hexview import BYTES_PER_ROW, HexView, parse_offset, parse_pattern
 
 def play_teleport_animation(stdscr, y, x):
     try:
@@ -40,400 +52,969 @@ def play_teleport_animation(stdscr, y, x):
     except curses.error:
         pass # Ignora erros se a animação tentar desenhar fora da tela
 
-def handle_bracketed_paste(stdscr, editor: Editor):
-    pasted_text = ""
-    while True:
-        try:
-            char = stdscr.get_wch()
-            if isinstance(char, str) and char.startswith('\x1b[201~'):
-                pasted_text += char.split('\x1b[201~')[0]
+PASTE_END_MARKER = b"\x1b[201~"
+PASTE_CHUNK_SIZE = 64 * 1024
+PASTE_TIMEOUT = 0.5 # Segundos sem dados antes de considerar a colagem encerrada
+
+def _read_paste_data(stdscr) -> bytes:
+    """
+    Lê todo o conteúdo de uma colagem entre colchetes até o marcador de fim.
+    Primeiro esvazia a fila interna do curses e depois lê o terminal em blocos,
+    acumulando tudo em um bytearray (custo linear, sem concatenação de strings).
+    """
+    data = bytearray()
+    end = -1
+    marker_len = len(PASTE_END_MARKER)
+
+    stdscr.nodelay(True)
+    direct_start = None
+    try:
+        while True:
+            key = read_key(stdscr)
+            if key == -1:
                 break
-            pasted_text += str(char)
-        except Exception:
+            if 0 <= key <= 255:
+                data.append(key)
+                end = data.find(PASTE_END_MARKER, max(0, len(data) - marker_len))
+                if end != -1:
+                    break
+
+        if end == -1:
+            # A fila do curses está vazia: o restante pode ser lido direto do terminal
+            fd = sys.stdin.fileno()
+            direct_start = len(data)
+            while True:
+                ready, _, _ = select.select([fd], [], [], PASTE_TIMEOUT)
+                if not ready:
+                    break
+                chunk = os.read(fd, PASTE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                scan_from = max(0, len(data) - marker_len + 1)
+                data += chunk
+                end = data.find(PASTE_END_MARKER, scan_from)
+                if end != -1:
+                    break
+    except (OSError, ValueError):
+        pass
+    finally:
+        stdscr.nodelay(False)
+        if direct_start is not None:
+            # Só até o marcador: o que sobra volta ao curses e é gravado quando for lido de novo
+            latency_tracker.input_bytes(bytes(data[direct_start : len(data) if end == -1 else end + marker_len]))
+
+    if end == -1:
+        return bytes(data)
+
+    # Devolve ao curses o que foi digitado depois do fim da colagem
+    for byte in reversed(data[end + marker_len:]):
+        try:
+            curses.ungetch(byte)
+        except curses.error:
             break
-    
-    if pasted_text:
-        editor.insert_text_at_cursor(pasted_text)
-    return "Texto colado."
+    return bytes(data[:end])
 
-def handle_key(key, stdscr, editor: Editor, sidebar: Sidebar, console: Console, structbar: Structbar, help_window: HelpWindow, git_window: GitWindow, whats_new_window: WhatsNewWindow, config_window: ConfigWindow):
-    editor.reload_config(config_window)
-
-    if key == curses.KEY_MOUSE:
-        if config_window.get_setting("Suporte ao Mouse") == "Ativado":
-            try:
-                _, mx, my, _, bstate = curses.getmouse()
-                
-                if bstate & curses.BUTTON1_PRESSED:
-                    h, w = stdscr.getmaxyx()
-                    active_buffer = editor.active_buffer
-                    tabs_bar_h = 2
-                    sidebar_w = 25 if sidebar.visible else 0
-
-                    if my < 1:
-                        x_offset = 0
-                        for i, tab in enumerate(editor.tabs):
-                            name = tab.filepath.name if tab.filepath else "[Novo]"
-                            dirty_indicator = " ◉" if tab.dirty else ""
-                            tab_text = f" {name}{dirty_indicator} "
-                            if x_offset <= mx < x_offset + len(tab_text):
-                                editor.active_tab_index = i
-                                return f"Aba '{name}' selecionada"
-                            x_offset += len(tab_text)
-                        return None
-
-                    elif sidebar.visible and mx >= w - sidebar_w:
-                        clicked_line = my - 1 # Desconta a linha do título da sidebar
-                        if 0 <= clicked_line < len(sidebar.items):
-                            sidebar.selected = sidebar.scroll_offset + clicked_line
-                            return sidebar.enter(editor, console, stdscr)
-                        return None
-
-                    elif active_buffer:
-                        show_line_numbers = config_window.get_setting("Exibir Números de Linha") == "Ativado"
-                        line_number_width = len(str(len(active_buffer.lines))) + 2 if show_line_numbers else 0
-
-                        if my >= tabs_bar_h and mx >= line_number_width:
-                            new_cursor_y = my - tabs_bar_h + active_buffer.offset_y
-                            new_cursor_x = mx - line_number_width
-
-                            if config_window.get_setting("Animação do Ponteiro") == "Ativado":
-                                play_teleport_animation(stdscr, my, mx)
-
-                            active_buffer.cursor_y = min(len(active_buffer.lines) - 1, max(0, new_cursor_y))
-                            active_buffer.cursor_x = min(len(active_buffer.lines[active_buffer.cursor_y]), max(0, new_cursor_x))
-                            return None
-
-            except curses.error:
-                pass # Ignora erros de getmouse() se não houver evento
+def handle_bracketed_paste(stdscr, editor: Editor):
+    latency_tracker.reclassify("colagem")
+    pasted_text = _read_paste_data(stdscr).decode('utf-8', errors='replace')
+    pasted_text = pasted_text.replace('\r\n', '\n').replace('\r', '\n')
+
+    if not pasted_text:
         return None
+    if editor.has_selection():
+        editor.delete_selection()
+    editor.insert_text_at_cursor(pasted_text)
+    return f"Texto colado ({pasted_text.count(chr(10)) + 1} linhas)."
+
+
+
+class KeyContext:
+    """O que uma ação recebe: a tecla lida e os componentes da interface."""
+    __slots__ = ("key", "stdscr", "editor", "sidebar", "console", "structbar",
+                 "help_window", "git_window", "whats_new_window", "config_window")
+
+    def __init__(self, key, stdscr, editor, sidebar, console, structbar, help_window, git_window, whats_new_window, config_window):
+        self.key = key
+        self.stdscr = stdscr
+        self.editor = editor
+        self.sidebar = sidebar
+        self.console = console
+        self.structbar = structbar
+        self.help_window = help_window
+        self.git_window = git_window
+        self.whats_new_window = whats_new_window
+        self.config_window = config_window
+
+# --- Ações globais ---
+
+def _mouse_click(c):
+    editor, sidebar, stdscr = c.editor, c.sidebar, c.stdscr
+    if c.config_window.get_setting("Suporte ao Mouse") != "Ativado":
+        return None
+    try:
+        _, mx, my, _, bstate = curses.getmouse()
+        if not bstate & curses.BUTTON1_PRESSED:
+            return None
+        h, w = stdscr.getmaxyx()
+        active_buffer = editor.active_buffer
+        tabs_bar_h = 2
+        sidebar_w = 25 if sidebar.visible else 0
+
+        if my < 1:
+            x_offset = 0
+            for i, tab in enumerate(editor.tabs):
+                name = tab.filepath.name if tab.filepath else "[Novo]"
+                dirty_indicator = " ◉" if tab.dirty else ""
+                tab_text = f" {name}{dirty_indicator} "
+                if x_offset <= mx < x_offset + len(tab_text):
+                    editor.active_tab_index = i
+                    return f"Aba '{name}' selecionada"
+                x_offset += len(tab_text)
+            return None
 
-    if key == '\x1b[200~':
-        return handle_bracketed_paste(stdscr, editor)
-
-    if key == 17:
-        if any(t.dirty for t in editor.tabs):
-            options = ["Salvar e Sair", "Sair sem Salvar", "Cancelar"]
-            choice = prompt_with_options(stdscr, "Você tem alterações não salvas. O que deseja fazer?", options)
-            
-            if choice == "Salvar e Sair":
-                if editor.save_file():
-                    return "exit"
-                else:
-                    return "Erro ao salvar. A saída foi cancelada."
-            elif choice == "Sair sem Salvar":
-                return "exit"
-            else: # Cancelar ou ESC
-                return None # Não faz nada
-        elif prompt_for_confirmation(stdscr, "Tem certeza que quer sair?"):
+        elif sidebar.visible and mx >= w - sidebar_w:
+            clicked_line = my - 1 # Desconta a linha do título da sidebar
+            if 0 <= clicked_line < len(sidebar.items):
+                sidebar.selected = sidebar.scroll_offset + clicked_line
+                return sidebar.enter(editor, c.console, stdscr)
+            return None
+
+        elif isinstance(active_buffer, HexView):
+            if my >= tabs_bar_h:
+                row = min(active_buffer.top + my - tabs_bar_h, active_buffer.row_count - 1)
+                index = active_buffer.position % BYTES_PER_ROW # Fora das células, mantém o byte na linha
+                for i in range(BYTES_PER_ROW):
+                    hex_column, ascii_column = active_buffer.cell_columns(i)
+                    if hex_column <= mx < hex_column + 2 or mx == ascii_column:
+                        index = i
+                active_buffer.jump_to(row * BYTES_PER_ROW + index)
+            return None
+
+        elif active_buffer:
+            show_line_numbers = c.config_window.get_setting("Exibir Números de Linha") == "Ativado"
+            line_number_width = len(str(active_buffer.line_count)) + 2 if show_line_numbers else 0
+
+            if my >= tabs_bar_h and mx >= line_number_width:
+                new_cursor_y = my - tabs_bar_h + active_buffer.offset_y
+                new_cursor_x = mx - line_number_width
+
+                if c.config_window.get_setting("Animação do Ponteiro") == "Ativado":
+                    play_teleport_animation(stdscr, my, mx)
+
+                if editor.soft_wrap and active_buffer.wrap_index is not None:
+                    active_buffer.cursor_y, active_buffer.cursor_x = active_buffer.wrap_index.row_to_position(
+                        my - tabs_bar_h + active_buffer.offset_row, new_cursor_x)
+                    return None
+                active_buffer.cursor_y = min(active_buffer.line_count - 1, max(0, new_cursor_y))
+                active_buffer.cursor_x = active_buffer.index_at_column(
+                    active_buffer.cursor_y, active_buffer.offset_x + max(0, new_cursor_x))
+    except curses.error:
+        pass # Ignora erros de getmouse() se não houver evento
+    return None
+
+def _quit(c):
+    editor, stdscr = c.editor, c.stdscr
+    if any(t.dirty for t in editor.tabs):
+        options = ["Salvar e Sair", "Sair sem Salvar", "Cancelar"]
+        choice = prompt_with_options(stdscr, "Você tem alterações não salvas. O que deseja fazer?", options)
+
+        if choice == "Salvar e Sair":
+            if _save_active(c):
                 return "exit"
+            return "Erro ao salvar. A saída foi cancelada."
+        elif choice == "Sair sem Salvar":
+            editor.discard_unsaved_changes()
+            return "exit"
+        return None # Cancelar ou ESC
+    elif prompt_for_confirmation(stdscr, "Tem certeza que quer sair?"):
+        return "exit"
+    return None
+
+def _save_active(c) -> bool:
+    """Salva a aba ativa e avisa quem acompanha os saves (recarga ao vivo do navegador, Alt+W)."""
+    saved = c.editor.save_file()
+    if saved:
+        c.sidebar.notify_file_saved(c.editor.active_buffer.filepath)
+        run_watcher.notify_saved(c.editor.active_buffer.filepath)
+    return saved
+
+def _save(c):
+    editor = c.editor
+    if not editor.active_buffer or not editor.active_buffer.dirty:
+        return "Nenhuma mudança para salvar."
+    encoding = editor.active_buffer.file_format.encoding
+    saved = _save_active(c)
+    if saved:
+        if editor.active_buffer.file_format.encoding != encoding:
+            return f"Salvo em UTF-8 ({encoding} não representa o texto)"
+    return "Salvo!" if saved else "Erro ao salvar"
+
+def _new_file(c):
+    c.editor.new_file()
+    return "Novo arquivo"
+
+def _close_tab(c):
+    editor = c.editor
+    if not editor.active_buffer: return None
+    if editor.active_buffer.dirty:
+        choice = prompt_for_confirmation(c.stdscr, f"Salvar alterações em '{editor.active_buffer.filepath.name if editor.active_buffer.filepath else '[Novo]'}'?")
+        if choice:
+            _save_active(c)
+    editor.close_active_tab()
+    return "Aba fechada"
+
+def _next_tab(c):
+    editor = c.editor
+    if editor.active_tab_index < len(editor.tabs) - 1:
+        editor.active_tab_index += 1
+    else:
+        editor.active_tab_index = 0
+    return "Próxima aba"
+
+def _previous_tab(c):
+    editor = c.editor
+    if editor.active_tab_index > 0:
+        editor.active_tab_index -= 1
+    else:
+        editor.active_tab_index = len(editor.tabs) - 1
+    return "Aba anterior"
+
+def _duplicate_line(c):
+    c.editor.duplicate_line()
+    c.editor.dirty = True
+    return None
+
+def _cut(c):
+    status = c.editor.cut_selection()
+    c.editor.dirty = True
+    return status
+
+def _copy(c):
+    return c.editor.copy_selection()
+
+def _paste(c):
+    status = c.editor.paste()
+    c.editor.dirty = True
+    return status
+
+def _bracketed_paste(c):
+    return handle_bracketed_paste(c.stdscr, c.editor)
+
+def _undo(c):
+    if c.editor.undo():
+        c.editor.dirty = True
+        return "Desfeito"
+    return None
+
+def _redo(c):
+    if c.editor.redo():
+        return "Refeito"
+    return None
+
+def _toggle_comment(c):
+    c.editor.toggle_comment()
+    c.editor.dirty = True
+    return None
+
+def _move_line_up(c):
+    c.editor.move_line_up()
+    c.editor.dirty = True
+    return None
+
+def _move_line_down(c):
+    c.editor.move_line_down()
+    c.editor.dirty = True
+    return None
+
+def _run_file(c):
+    editor = c.editor
+    if not editor.active_buffer or not editor.active_buffer.filepath:
+        return "Salve o arquivo antes de executá-lo."
+    command, build = get_execution(editor.active_buffer.filepath)
+    if command:
+        c.console.cancel_run() # Ctrl+E de novo reinicia em vez de empilhar execuções
+        c.console.run_command(command, build, label=editor.active_buffer.filepath.name)
+        c.console.visible = True
+        return f"Executando {editor.active_buffer.filepath.name}..."
+    return f"Não há um comando de execução definido para arquivos '{editor.active_buffer.filepath.suffix}'."
+
+def _run_file_profiled(c):
+    buf = c.editor.active_buffer
+    if not buf or not buf.filepath:
+        return "Salve o arquivo antes de executá-lo."
+    return run_profiler.start(buf.filepath, c.console)
+
+def _profile_move(delta):
+    def action(c):
+        run_profiler.move(delta)
         return None
-    if key == 19:
-        if not editor.active_buffer or not editor.active_buffer.dirty:
-            return "Nenhuma mudança para salvar."
-        saved = editor.save_file()
-        return "Salvo!" if saved else "Erro ao salvar"
-    elif key == 14:
-        editor.new_file()
-        return "Novo arquivo"
-    elif key == 23: # Ctrl + W para fechar aba
-        if not editor.active_buffer: return None
-        if editor.active_buffer.dirty:
-            choice = prompt_for_confirmation(stdscr, f"Salvar alterações em '{editor.active_buffer.filepath.name if editor.active_buffer.filepath else '[Novo]'}'?")
-            if choice:
-                editor.save_file()
-        
-        editor.tabs.pop(editor.active_tab_index)
-        if not editor.tabs: # Se fechou a última aba, cria uma nova
-            editor.new_file()
-        else:
-            editor.active_tab_index = min(editor.active_tab_index, len(editor.tabs) - 1)
-        return "Aba fechada"
-
-    elif key == 4:
-        editor.duplicate_line()
-        editor.dirty = True
+    return action
+
+def _toggle_run_watch(c):
+    if run_watcher.active:
+        return run_watcher.stop(c.console)
+    buf = c.editor.active_buffer
+    if not buf or not buf.filepath or not buf.filepath.exists():
+        return "Salve o arquivo antes de observá-lo."
+    return run_watcher.start(buf.filepath, c.console, c.editor.registry.paths())
+
+def _open_terminal(c):
+    if c.sidebar.current_path:
+        if open_terminal_at_path(c.sidebar.current_path):
+            return "Abrindo terminal no projeto..."
+        return "Erro: Não foi possível encontrar um terminal compatível."
+    return "Abra um projeto para usar o terminal."
+
+def _project_search(c):
+    if c.sidebar.current_path:
+        return c.sidebar.start_project_search(c.stdscr, c.console)
+    return "Abra um projeto para buscar."
+
+def _find_replace(c):
+    if c.editor.active_buffer:
+        return start_find_replace(c.stdscr, c.editor, c.editor.active_buffer)
+    return "Nenhuma aba ativa para localizar e substituir."
+
+# --- Painéis ---
+
+def _toggle_sidebar(c):
+    c.sidebar.toggle()
+    return "Sidebar: " + ("visível" if c.sidebar.visible else "oculta")
+
+def _toggle_console(c):
+    c.console.toggle()
+    return "Console: " + ("visível" if c.console.visible else "oculto")
+
+def _toggle_git(c):
+    c.git_window.toggle(c.sidebar.current_path)
+    return "Janela Git: " + ("visível" if c.git_window.visible else "oculta")
+
+def _toggle_whats_new(c):
+    c.whats_new_window.toggle()
+    return "Novidades: " + ("visível" if c.whats_new_window.visible else "oculta")
+
+def _close_whats_new(c):
+    c.whats_new_window.toggle()
+    return None
+
+def _toggle_config(c):
+    c.config_window.toggle()
+    return "Configurações: " + ("visível" if c.config_window.visible else "oculta")
+
+def _toggle_structbar(c):
+    c.structbar.toggle()
+    return "Estrutura: " + ("visível" if c.structbar.visible else "oculta")
+
+def _toggle_help(c):
+    c.help_window.toggle()
+    return None
+
+def _toggle_hud(c):
+    return profiler.toggle_hud()
+
+def _toggle_local_server(c):
+    return c.sidebar.toggle_local_server(
+        c.config_window.get_setting("Porta do Servidor Local"),
+        c.config_window.get_setting("Servir Arquivos .gz Pré-comprimidos") == "Ativado",
+    )
+
+# --- Estrutura ---
+
+def _structbar_up(c):
+    structbar = c.structbar
+    structbar.selected = max(0, structbar.selected - 1)
+    if structbar.selected < structbar.scroll_offset:
+        structbar.scroll_offset = structbar.selected
+    return "Navegando na estrutura"
+
+def _structbar_down(c):
+    structbar = c.structbar
+    content_h = c.stdscr.getmaxyx()[0] - 2
+    if structbar.items:
+        structbar.selected = min(len(structbar.items) - 1, structbar.selected + 1)
+        if structbar.selected >= structbar.scroll_offset + content_h:
+            structbar.scroll_offset = structbar.selected - content_h + 1
+    return "Navegando na estrutura"
+
+def _structbar_jump(c):
+    if c.editor.active_buffer and c.structbar.items:
+        _, _, line_num = c.structbar.items[c.structbar.selected]
+        c.editor.active_buffer.cursor_y = line_num
+    return "Navegando na estrutura"
+
+# --- Console ---
+
+def _console_action(method, *args):
+    def action(c):
+        getattr(c.console, method)(*args)
+        return "Entrada do console" # Impede que a tecla vaze para o editor
+    return action
+
+def _console_submit(c):
+    c.console.submit_command()
+    return "Comando executado"
+
+def _console_home(c):
+    c.console.cursor_x = 0
+    return "Entrada do console"
+
+def _console_end(c):
+    c.console.cursor_x = len(c.console.command)
+    return "Entrada do console"
+
+def _console_scroll_up(c):
+    c.console.output_scroll_offset = min(c.console.output_scroll_offset + 1, len(c.console.output) - 1)
+    return "Entrada do console"
+
+def _console_scroll_down(c):
+    c.console.output_scroll_offset = max(0, c.console.output_scroll_offset - 1)
+    return "Entrada do console"
+
+# --- Sidebar ---
+
+def _sidebar_up(c):
+    sidebar = c.sidebar
+    sidebar.up()
+    if sidebar.selected < sidebar.scroll_offset:
+        sidebar.scroll_offset = sidebar.selected
+    return "Navegando no projeto"
+
+def _sidebar_down(c):
+    sidebar = c.sidebar
+    content_h = c.stdscr.getmaxyx()[0] - 2 # Altura visível para itens, descontando título e borda
+    sidebar.down()
+    if sidebar.selected >= sidebar.scroll_offset + content_h:
+        sidebar.scroll_offset = sidebar.selected - content_h + 1
+    return "Navegando no projeto"
+
+def _sidebar_enter(c):
+    return c.sidebar.enter(c.editor, c.console, c.stdscr)
+
+def _sidebar_exit_search(c):
+    if c.sidebar.mode == "search":
+        return c.sidebar.exit_search_mode()
+    return None
+
+def _sidebar_search_backspace(c):
+    c.sidebar.search_query = c.sidebar.search_query[:-1]
+    c.sidebar.refresh()
+    return None
+
+def _sidebar_search_up(c):
+    c.sidebar.up()
+    return None
+
+def _sidebar_search_down(c):
+    c.sidebar.down()
+    return None
+
+# --- Editor ---
+
+def _complete_or_indent(c):
+    """Tab: completa a palavra sob o cursor; sem sugestão, indenta."""
+    if not c.editor.attempt_autocomplete_word():
+        c.editor.insert_text_at_cursor("    ")
+    return None
+
+def _unindent(c):
+    c.editor.unindent()
+    return None
+
+def _backspace(c):
+    c.editor.delete_char()
+    return None
+
+def _new_line(c):
+    c.editor.new_line_with_indent()
+    c.editor.dirty = True
+    return None
+
+def _cursor_action(dy, dx, select=False):
+    def action(c):
+        buf = c.editor.active_buffer
+        if not buf:
+            return None
+        if select and not buf.selecting:
+            c.editor.start_selection()
+        if dy and c.editor.soft_wrap and buf.wrap_index is not None:
+            move_cursor_rows(buf, buf.wrap_index, dy) # Anda pelas linhas visuais
+        elif dy: # Mantém a coluna de tela, não o índice (tabs, caracteres largos)
+            column = buf.column_of(buf.cursor_y, buf.cursor_x)
+            buf.cursor_y = min(buf.line_count - 1, max(0, buf.cursor_y + dy))
+            buf.cursor_x = buf.index_at_column(buf.cursor_y, column)
+        if dx:
+            length = buf.line_length(buf.cursor_y)
+            buf.cursor_x = min(length, max(0, buf.cursor_x + dx))
+            # Acentos combinantes andam junto com a letra
+            while 0 < buf.cursor_x < length and is_zero_width(buf.line_slice(buf.cursor_y, buf.cursor_x, buf.cursor_x + 1)):
+                buf.cursor_x += 1 if dx > 0 else -1
         return None
-    elif key == 24:
-        status = editor.cut_selection()
-        editor.dirty = True
-        return status
-    elif key == 3:
-        return editor.copy_selection()
-    elif key == 22:
-        status = editor.paste()
-        editor.dirty = True
-        return status
-    elif key == 26:
-        if editor.undo():
-            editor.dirty = True
-            return "Desfeito"
-    elif key == 25:
-        if editor.redo():
-            return "Refeito"
-    elif key == 5: # Ctrl + E para executar
-        if not editor.active_buffer or not editor.active_buffer.filepath:
-            return "Salve o arquivo antes de executá-lo."
-        command = get_execution_command(editor.active_buffer.filepath)
-        if command:
-            console.run_command(command)
-            console.visible = True
-            return f"Executando {editor.active_buffer.filepath.name}..."
-        return f"Não há um comando de execução definido para arquivos '{editor.active_buffer.filepath.suffix}'."
-    elif key == 6:
-        sidebar.toggle()
-        return "Sidebar: " + ("visível" if sidebar.visible else "oculta")
-    elif key == 20:
-        if sidebar.current_path:
-            if open_terminal_at_path(sidebar.current_path):
-                return "Abrindo terminal no projeto..."
-            return "Erro: Não foi possível encontrar um terminal compatível."
-        return "Abra um projeto para usar o terminal."
-    elif key == 16:
-        return sidebar.toggle_search_mode()
-    elif key == 335: # Ctrl + Shift + F
-        if sidebar.current_path:
-            return sidebar.start_project_search(stdscr, console)
-        return "Abra um projeto para buscar."
-
-    elif key == 15:
-        if sidebar.mode == "search":
-            return sidebar.exit_search_mode()
-    elif key == curses.KEY_F1:
-        help_window.toggle()
+    action.keeps_selection = select
+    return action
+
+def _clear_selection(editor):
+    buf = editor.active_buffer
+    if buf and buf.selecting:
+        editor.clear_selection()
+
+def _toggle_soft_wrap(c):
+    c.editor.set_soft_wrap(not c.editor.soft_wrap)
+    return "Quebra de linha suave " + ("ativada" if c.editor.soft_wrap else "desativada")
+
+def _toggle_macro_recording(c):
+    return macro_recorder.toggle_recording()
+
+def _replay_macro(c):
+    """Com várias linhas selecionadas, uma vez por linha; senão, pergunta quantas vezes."""
+    if isinstance(c.editor.active_buffer, HexView):
+        return _hex_read_only(c) # As ações da macro não passam pelo contexto "hex"
+    if macro_recorder.recording or not macro_recorder.last:
+        return macro_recorder.replay(c.editor, None)
+
+    def perform(step):
+        c.key = step.key
+        ACTIONS[step.action](c)
+        if step.clears_selection:
+            _clear_selection(c.editor)
+
+    coords = c.editor.get_selection_coords()
+    if coords and coords[0] != coords[2]:
+        return macro_recorder.replay_per_line(c.editor, perform, coords[0], coords[2])
+    times = parse_repeat_count(prompt_for_input(c.stdscr, "Repetir a macro quantas vezes? (Enter = 1)"))
+    if times is None:
+        return "Número de repetições inválido."
+    return macro_recorder.replay(c.editor, perform, times)
+
+# --- Visualizador hexadecimal ---
+
+def _hex_move(rows=0, delta=0, page=0):
+    def action(c):
+        view = c.editor.active_buffer
+        page_rows = max(1, c.stdscr.getmaxyx()[0] - 4) # Linhas de bytes na tela
+        view.move(delta + (rows + page * page_rows) * BYTES_PER_ROW)
         return None
-    elif key == 31:
-        editor.toggle_comment()
-        editor.dirty = True
+    return action
+
+def _hex_row_edge(end):
+    def action(c):
+        view = c.editor.active_buffer
+        view.jump_to(view.position - view.position % BYTES_PER_ROW + (BYTES_PER_ROW - 1 if end else 0))
         return None
+    return action
 
-    if key == 27:
-        stdscr.nodelay(True)
-        next_key = stdscr.getch()
+def _hex_jump(c):
+    view = c.editor.active_buffer
+    text = prompt_for_input(c.stdscr, "Ir para o deslocamento (0x1f40, 8000, +16, 50%):")
+    if not text:
+        return None
+    try:
+        offset = parse_offset(text, view.position, view.size)
+    except ValueError:
+        return f"Deslocamento inválido: '{text}'"
+    if not 0 <= offset < max(1, view.size):
+        return f"Fora do arquivo ({view.size} bytes)."
+    view.jump_to(offset)
+    return f"Em 0x{view.position:x}"
+
+def _escape_pressed(stdscr) -> bool:
+    stdscr.nodelay(True)
+    try:
+        return read_key(stdscr) == 27
+    finally:
         stdscr.nodelay(False)
 
-        if next_key != -1:
-            if next_key in (ord('p'), ord('P')):
-                return sidebar.add_folder(stdscr)
-            elif next_key in (ord('t'), ord('T')):
-                console.toggle()
-                return "Console: " + ("visível" if console.visible else "oculto")
-            elif next_key == curses.KEY_LEFT:
-                return sidebar.go_back()
-            elif next_key == curses.KEY_RIGHT:
-                return sidebar.go_forward()
-            elif next_key == curses.KEY_UP and not sidebar.visible and not console.visible:
-                editor.move_line_up()
-                editor.dirty = True
-            elif next_key == curses.KEY_DOWN and not sidebar.visible and not console.visible:
-                editor.move_line_down()
-                editor.dirty = True
-            elif next_key in (ord('g'), ord('G')):
-                git_window.toggle(sidebar.current_path)
-                return "Janela Git: " + ("visível" if git_window.visible else "oculta")
-            elif next_key in (ord('n'), ord('N')):
-                whats_new_window.toggle()
-                return "Novidades: " + ("visível" if whats_new_window.visible else "oculta")
-            elif next_key in (ord('s'), ord('S')):
-                return sidebar.toggle_local_server()
-            elif next_key in (ord('c'), ord('C')):
-                config_window.toggle()
-                return "Configurações: " + ("visível" if config_window.visible else "oculta")
-            elif next_key in (ord('l'), ord('L')):
-                structbar.toggle()
-                return "Estrutura: " + ("visível" if structbar.visible else "oculta")
-            return None
-        if sidebar.mode == "search":
-            return sidebar.exit_search_mode()
-
-    if whats_new_window.visible:
-        if key == 27 or key == curses.KEY_F1:
-            whats_new_window.toggle()
-    if help_window.visible:
-        help_window.handle_key(key)
-        return "Navegando na ajuda"
-    
-    if config_window.visible:
-        config_window.handle_key(key)
-        return "Configuração alterada"
-
-    if structbar.visible:
-        h, _ = stdscr.getmaxyx()
-        content_h = h - 2
-
-        if key == curses.KEY_UP:
-            structbar.selected = max(0, structbar.selected - 1)
-            if structbar.selected < structbar.scroll_offset:
-                structbar.scroll_offset = structbar.selected
-        elif key == curses.KEY_DOWN:
-            if structbar.items:
-                structbar.selected = min(len(structbar.items) - 1, structbar.selected + 1)
-                if structbar.selected >= structbar.scroll_offset + content_h:
-                    structbar.scroll_offset = structbar.selected - content_h + 1
-        elif key == 10: # Enter
-            if editor.active_buffer and structbar.items:
-                _, _, line_num = structbar.items[structbar.selected]
-                editor.active_buffer.cursor_y = line_num
-        return "Navegando na estrutura"
-
-    elif git_window.visible:
-        git_window.handle_key(key)
+def _hex_find(c, start, backwards=False):
+    view = c.editor.active_buffer
+    if not view.pattern:
+        return "Nenhuma busca anterior (/ para buscar)."
+    found = view.find(view.pattern, start, backwards, cancelled=lambda: _escape_pressed(c.stdscr))
+    if found is None:
+        return "Busca cancelada."
+    if found == -1:
+        return "Padrão não encontrado."
+    view.jump_to(found)
+    wrapped = found >= start if backwards else found < start
+    return f"Encontrado em 0x{found:x}" + (" (deu a volta no arquivo)" if wrapped else "")
+
+def _hex_search(c):
+    text = prompt_for_input(c.stdscr, "Buscar bytes (7f 45 4c 46) ou texto (\"ELF\"); ESC cancela:")
+    if not text:
         return None
+    view = c.editor.active_buffer
+    view.pattern = parse_pattern(text)
+    return _hex_find(c, view.position) # A ocorrência no próprio cursor também conta
+
+def _hex_read_only(c):
+    return "Visualizador hexadecimal: somente leitura."
+
+def _ignore(c):
+    return None
+
+_move_line_up.keeps_selection = True
+_move_line_down.keeps_selection = True
+_find_replace.keeps_selection = True
+
+ACTIONS = {
+    "mouse.click": _mouse_click,
+    "app.quit": _quit,
+    "file.save": _save,
+    "file.new": _new_file,
+    "file.run": _run_file,
+    "file.watch_run": _toggle_run_watch,
+    "file.run_profiled": _run_file_profiled,
+    "profile.toggle": lambda c: run_profiler.toggle(),
+    "profile.up": _profile_move(-1),
+    "profile.down": _profile_move(1),
+    "profile.page_up": _profile_move(-10),
+    "profile.page_down": _profile_move(10),
+    "profile.sort": lambda c: run_profiler.cycle_sort(),
+    "profile.jump": lambda c: run_profiler.jump(c.editor),
+    "tab.close": _close_tab,
+    "tab.next": _next_tab,
+    "tab.previous": _previous_tab,
+    "edit.duplicate_line": _duplicate_line,
+    "edit.cut": _cut,
+    "edit.copy": _copy,
+    "edit.paste": _paste,
+    "edit.bracketed_paste": _bracketed_paste,
+    "edit.undo": _undo,
+    "edit.redo": _redo,
+    "edit.toggle_comment": _toggle_comment,
+    "edit.move_line_up": _move_line_up,
+    "edit.move_line_down": _move_line_down,
+    "edit.find_replace": _find_replace,
+    "edit.complete_or_indent": _complete_or_indent,
+    "edit.unindent": _unindent,
+    "edit.backspace": _backspace,
+    "edit.new_line": _new_line,
+    "cursor.left": _cursor_action(0, -1),
+    "cursor.right": _cursor_action(0, 1),
+    "cursor.up": _cursor_action(-1, 0),
+    "cursor.down": _cursor_action(1, 0),
+    "select.left": _cursor_action(0, -1, select=True),
+    "select.right": _cursor_action(0, 1, select=True),
+    "select.up": _cursor_action(-1, 0, select=True),
+    "select.down": _cursor_action(1, 0, select=True),
+    "terminal.open": _open_terminal,
+    "project.search": _project_search,
+    "sidebar.toggle": _toggle_sidebar,
+    "sidebar.search_mode": lambda c: c.sidebar.toggle_search_mode(),
+    "sidebar.exit_search": _sidebar_exit_search,
+    "sidebar.new_file": lambda c: c.sidebar.add_file(c.stdscr),
+    "sidebar.new_folder": lambda c: c.sidebar.add_folder(c.stdscr),
+    "sidebar.rename": lambda c: c.sidebar.rename_item(c.stdscr),
+    "sidebar.delete": lambda c: c.sidebar.delete_item(c.stdscr),
+    "sidebar.parent": lambda c: c.sidebar.go_to_parent(c.console),
+    "sidebar.back": lambda c: c.sidebar.go_back(),
+    "sidebar.forward": lambda c: c.sidebar.go_forward(),
+    "sidebar.up": _sidebar_up,
+    "sidebar.down": _sidebar_down,
+    "sidebar.open": _sidebar_enter,
+    "sidebar.search_backspace": _sidebar_search_backspace,
+    "sidebar.search_up": _sidebar_search_up,
+    "sidebar.search_down": _sidebar_search_down,
+    "console.toggle": _toggle_console,
+    "console.submit": _console_submit,
+    "console.backspace": _console_action("delete_char"),
+    "console.delete": _console_action("delete_forward"),
+    "console.history_previous": _console_action("previous_command"),
+    "console.history_next": _console_action("next_command"),
+    "console.left": _console_action("move_cursor", -1),
+    "console.right": _console_action("move_cursor", 1),
+    "console.home": _console_home,
+    "console.end": _console_end,
+    "console.complete": _console_action("autocomplete"),
+    "console.complete_previous": _console_action("autocomplete", -1),
+    "console.scroll_up": _console_scroll_up,
+    "console.scroll_down": _console_scroll_down,
+    "structbar.toggle": _toggle_structbar,
+    "structbar.up": _structbar_up,
+    "structbar.down": _structbar_down,
+    "structbar.jump": _structbar_jump,
+    "git.toggle": _toggle_git,
+    "config.toggle": _toggle_config,
+    "help.toggle": _toggle_help,
+    "whats_new.toggle": _toggle_whats_new,
+    "whats_new.close": _close_whats_new,
+    "hud.toggle": _toggle_hud,
+    "view.soft_wrap": _toggle_soft_wrap,
+    "macro.record": _toggle_macro_recording,
+    "macro.replay": _replay_macro,
+    "server.toggle": _toggle_local_server,
+    "hex.left": _hex_move(delta=-1),
+    "hex.right": _hex_move(delta=1),
+    "hex.up": _hex_move(rows=-1),
+    "hex.down": _hex_move(rows=1),
+    "hex.page_up": _hex_move(page=-1),
+    "hex.page_down": _hex_move(page=1),
+    "hex.row_start": _hex_row_edge(end=False),
+    "hex.row_end": _hex_row_edge(end=True),
+    "hex.file_start": lambda c: c.editor.active_buffer.jump_to(0),
+    "hex.file_end": lambda c: c.editor.active_buffer.jump_to(c.editor.active_buffer.size - 1),
+    "hex.jump": _hex_jump,
+    "hex.search": _hex_search,
+    "hex.find_next": lambda c: _hex_find(c, c.editor.active_buffer.position + 1),
+    "hex.find_previous": lambda c: _hex_find(c, c.editor.active_buffer.position, backwards=True),
+    "hex.read_only": _hex_read_only,
+    "ignore": _ignore,
+}
+
+def _both_cases(bindings):
+    """{'alt+t': ação} -> também 'alt+T', já que Alt+Shift+letra chega em maiúscula."""
+    result = dict(bindings)
+    for key, action in bindings.items():
+        prefix, _, letter = key.rpartition("+")
+        if len(letter) == 1 and letter.isalpha():
+            result[f"{prefix}+{letter.upper()}" if prefix else letter.upper()] = action
+    return result
+
+_MOVE_LINE_BINDINGS = {"alt+up": "edit.move_line_up", "alt+down": "edit.move_line_down", "S": "edit.find_replace"}
+
+DEFAULT_BINDINGS = {
+    "global": {
+        "mouse": "mouse.click",
+        "ctrl+q": "app.quit",
+        "ctrl+s": "file.save",
+        "ctrl+n": "file.new",
+        "ctrl+w": "tab.close",
+        "ctrl+d": "edit.duplicate_line",
+        "ctrl+x": "edit.cut",
+        "ctrl+c": "edit.copy",
+        "ctrl+v": "edit.paste",
+        "ctrl+z": "edit.undo",
+        "ctrl+y": "edit.redo",
+        "ctrl+e": "file.run",
+        "ctrl+f": "sidebar.toggle",
+        "ctrl+t": "terminal.open",
+        "ctrl+p": "sidebar.search_mode",
+        "ctrl+shift+f": "project.search",
+        "ctrl+o": "sidebar.exit_search",
+        "ctrl+/": "edit.toggle_comment",
+        "ctrl+pagedown": "tab.next",
+        "ctrl+pageup": "tab.previous",
+        "alt+.": "tab.next",
+        "alt+,": "tab.previous",
+        "f1": "help.toggle",
+        "f6": "profile.toggle",
+        "f12": "hud.toggle",
+        "paste": "edit.bracketed_paste",
+        "alt+left": "sidebar.back",
+        "alt+right": "sidebar.forward",
+        **_both_cases({
+            "alt+p": "sidebar.new_folder",
+            "alt+t": "console.toggle",
+            "alt+g": "git.toggle",
+            "alt+n": "whats_new.toggle",
+            "alt+s": "server.toggle",
+            "alt+c": "config.toggle",
+            "alt+l": "structbar.toggle",
+            "alt+m": "macro.record",
+            "alt+r": "macro.replay",
+            "alt+z": "view.soft_wrap",
+            "alt+w": "file.watch_run",
+            "alt+e": "file.run_profiled",
+        }),
+    },
+    "whats_new": {"esc": "whats_new.close"},
+    "profile": {
+        "up": "profile.up",
+        "down": "profile.down",
+        "pageup": "profile.page_up",
+        "pagedown": "profile.page_down",
+        "enter": "profile.jump",
+        **_both_cases({"s": "profile.sort"}),
+        "esc": "profile.toggle",
+    },
+    "structbar": {"up": "structbar.up", "down": "structbar.down", "enter": "structbar.jump"},
+    "console": {
+        "enter": "console.submit",
+        "backspace": "console.backspace",
+        "delete": "console.delete",
+        "up": "console.history_previous",
+        "down": "console.history_next",
+        "left": "console.left",
+        "right": "console.right",
+        "home": "console.home",
+        "end": "console.end",
+        "tab": "console.complete",
+        "shift+tab": "console.complete_previous",
+        "pageup": "console.scroll_up",
+        "pagedown": "console.scroll_down",
+    },
+    "sidebar": {
+        "A": "sidebar.new_file",
+        "F": "sidebar.new_file",
+        **_both_cases({"r": "sidebar.rename", "d": "sidebar.delete"}),
+        "backspace": "sidebar.parent",
+        "up": "sidebar.up",
+        "down": "sidebar.down",
+        "enter": "sidebar.open",
+    },
+    "sidebar_search": {
+        "esc": "sidebar.exit_search",
+        "backspace": "sidebar.search_backspace",
+        "up": "sidebar.search_up",
+        "down": "sidebar.search_down",
+        "enter": "sidebar.open",
+    },
+    "editor": {
+        **_MOVE_LINE_BINDINGS,
+        "tab": "edit.complete_or_indent",
+        "shift+tab": "edit.unindent",
+        "backspace": "edit.backspace",
+        "enter": "edit.new_line",
+        "left": "cursor.left",
+        "right": "cursor.right",
+        "up": "cursor.up",
+        "down": "cursor.down",
+        "shift+left": "select.left",
+        "shift+right": "select.right",
+        "shift+up": "select.up",
+        "shift+down": "select.down",
+    },
+    "hex": {
+        "left": "hex.left",
+        "right": "hex.right",
+        "up": "hex.up",
+        "down": "hex.down",
+        "pageup": "hex.page_up",
+        "pagedown": "hex.page_down",
+        "home": "hex.row_start",
+        "end": "hex.row_end",
+        "ctrl+home": "hex.file_start",
+        "ctrl+end": "hex.file_end",
+        "g": "hex.jump",
+        "/": "hex.search",
+        "n": "hex.find_next",
+        "N": "hex.find_previous",
+        # As ações de edição globais não se aplicam a uma aba somente leitura
+        **{key: "hex.read_only" for key in ("ctrl+d", "ctrl+x", "ctrl+v", "ctrl+z", "ctrl+y", "ctrl+/", "paste")},
+    },
+    "vim": {
+        **_MOVE_LINE_BINDINGS,
+        "h": "cursor.left",
+        "j": "cursor.down",
+        "k": "cursor.up",
+        "l": "cursor.right",
+    },
+}
+
+keymap = Keymap(ACTIONS, DEFAULT_BINDINGS)
+
+# --- Teclas sem ligação: o que cada contexto faz com elas ---
+
+def _printable(key):
+    return 32 <= key <= 126
+
+def _help_default(c):
+    c.help_window.handle_key(c.key)
+    return "Navegando na ajuda"
+
+def _config_default(c):
+    c.config_window.handle_key(c.key)
+    return "Configuração alterada"
+
+def _git_default(c):
+    c.git_window.handle_key(c.key)
+    return None
+
+def _console_default(c):
+    if _printable(c.key):
+        c.console.insert_char(chr(c.key))
+    return "Entrada do console"
+
+def _sidebar_search_default(c):
+    if _printable(c.key):
+        c.sidebar.search_query += chr(c.key)
+        c.sidebar.refresh()
+    return None
+
+def _editor_default(c):
+    if _printable(c.key):
+        c.editor.insert_char(chr(c.key))
+    return None
+
+ACTIONS.update({
+    "help.key": _help_default,
+    "config.key": _config_default,
+    "structbar.idle": lambda c: "Navegando na estrutura",
+    "git.key": _git_default,
+    "console.insert_char": _console_default,
+    "sidebar.idle": lambda c: "Navegando no projeto",
+    "sidebar.search_type": _sidebar_search_default,
+    "edit.insert_char": _editor_default,
+})
+
+CONTEXT_DEFAULTS = {
+    "help": "help.key",
+    "config": "config.key",
+    "structbar": "structbar.idle",
+    "git": "git.key",
+    "console": "console.insert_char",
+    "sidebar": "sidebar.idle",
+    "sidebar_search": "sidebar.search_type",
+    "editor": "edit.insert_char",
+    "vim": "ignore",
+    "hex": "ignore",
+    "profile": "ignore",
+}
+
+class _ConfigState:
+    """Evita reler as configurações a cada tecla: só recarrega quando a janela de configurações salva algo."""
+    version = None
+    vim_mode = False
+
+_config_state = _ConfigState()
+
+def _active_contexts(c):
+    """Contextos que recebem a tecla, do mais específico ao global (mesma prioridade dos painéis na tela)."""
+    contexts = ["whats_new"] if c.whats_new_window.visible else []
+    if run_profiler.visible:
+        contexts.append("profile")
+    elif c.help_window.visible:
+        contexts.append("help")
+    elif c.config_window.visible:
+        contexts.append("config")
+    elif c.structbar.visible:
+        contexts.append("structbar")
+    elif c.git_window.visible:
+        contexts.append("git")
+    elif c.console.visible:
+        contexts.append("console")
+    elif c.sidebar.visible:
+        contexts.append("sidebar_search" if c.sidebar.mode == "search" else "sidebar")
+    elif isinstance(c.editor.active_buffer, HexView):
+        contexts.append("hex")
+    elif _config_state.vim_mode and c.editor.active_buffer:
+        contexts.append("vim")
+    else:
+        contexts.append("editor")
+    contexts.append("global")
+    return contexts
 
-    elif console.visible:
-        if key == 10:
-            console.submit_command()
-            return "Comando executado"
-        elif key in (curses.KEY_BACKSPACE, 127, 8):
-            console.delete_char()
-        elif key == curses.KEY_UP:
-            console.previous_command()
-        elif key == curses.KEY_DOWN:
-            console.next_command()
-        elif key == curses.KEY_LEFT:
-            console.move_cursor(-1)
-        elif key == curses.KEY_RIGHT:
-            console.move_cursor(1)
-        elif key == curses.KEY_HOME:
-            console.cursor_x = 0
-        elif key == curses.KEY_END:
-            console.cursor_x = len(console.command)
-        elif key == 9: # Tab
-            console.autocomplete()
-        elif key == curses.KEY_PPAGE: # PageUp
-            console.output_scroll_offset = min(console.output_scroll_offset + 1, len(console.output) - 1)
-        elif key == curses.KEY_NPAGE: # PageDown
-            console.output_scroll_offset = max(0, console.output_scroll_offset - 1)
-        elif 32 <= key <= 126:
-            console.insert_char(chr(key))
-        elif key == curses.KEY_DC: # Tecla Delete
-            console.delete_forward()
-        
-        return "Entrada do console" # Impede que a tecla vaze para o editor
-
-    elif sidebar.visible:
-        if sidebar.mode == "search":
-            if key in (curses.KEY_BACKSPACE, 127, 8): # Backspace
-                sidebar.search_query = sidebar.search_query[:-1]
-                sidebar.refresh()
-            elif 32 <= key <= 126:
-                sidebar.search_query += chr(key)
-                sidebar.refresh()
-            elif key == curses.KEY_UP: sidebar.up()
-            elif key == curses.KEY_DOWN: sidebar.down()
-            elif key == 10:
-                return sidebar.enter(editor, console, stdscr)
-            return None
-
-        if key == ord('A') or key == ord('F'):
-            return sidebar.add_file(stdscr)
-
-        if key in (ord('r'), ord('R')):
-            return sidebar.rename_item(stdscr)
-
-        if key in (ord('d'), ord('D')):
-            return sidebar.delete_item(stdscr)
-
-        if key in (curses.KEY_BACKSPACE, 127, 8):
-            return sidebar.go_to_parent(console)
-
-        h, _ = stdscr.getmaxyx()
-        content_h = h - 2 # Altura visível para itens, descontando título e borda
-
-        if key == curses.KEY_UP:
-            sidebar.up()
-            if sidebar.selected < sidebar.scroll_offset:
-                sidebar.scroll_offset = sidebar.selected
-        elif key == curses.KEY_DOWN:
-            sidebar.down()
-            if sidebar.selected >= sidebar.scroll_offset + content_h:
-                sidebar.scroll_offset = sidebar.selected - content_h + 1
-        elif key == 10:
-            return sidebar.enter(editor, console, stdscr)
-        return "Navegando no projeto"
-
-    elif key == ord('S') and not (sidebar.visible or console.visible or git_window.visible or help_window.visible): # Shift + S
-        if editor.active_buffer:
-            return start_find_replace(stdscr, editor.active_buffer)
-        return "Nenhuma aba ativa para localizar e substituir."
-    is_vim_mode = config_window.get_setting("Modo de Navegação (Vim)") == "Vim (h,j,k,l)"
-    if is_vim_mode and editor.active_buffer and not any([sidebar.visible, console.visible, git_window.visible, help_window.visible, structbar.visible]):
-        if key == ord('k'): # Cima
-            editor.active_buffer.cursor_y = max(0, editor.active_buffer.cursor_y - 1)
-            editor.active_buffer.cursor_x = min(editor.active_buffer.cursor_x, len(editor.active_buffer.lines[editor.active_buffer.cursor_y]))
-            return None
-        elif key == ord('j'): # Baixo
-            editor.active_buffer.cursor_y = min(len(editor.active_buffer.lines) - 1, editor.active_buffer.cursor_y + 1)
-            editor.active_buffer.cursor_x = min(editor.active_buffer.cursor_x, len(editor.active_buffer.lines[editor.active_buffer.cursor_y]))
-            return None
-        elif key == ord('h'): # Esquerda
-            editor.active_buffer.cursor_x = max(0, editor.active_buffer.cursor_x - 1)
-            return None
-        elif key == ord('l'): # Direita
-            editor.active_buffer.cursor_x = min(len(editor.active_buffer.lines[editor.active_buffer.cursor_y]), editor.active_buffer.cursor_x + 1)
-            return None
+def handle_key(key, stdscr, editor: Editor, sidebar: Sidebar, console: Console, structbar: Structbar, help_window: HelpWindow, git_window: GitWindow, whats_new_window: WhatsNewWindow, config_window: ConfigWindow):
+    if _config_state.version != config_window.version:
+        with span("reload_config"):
+            editor.reload_config(config_window)
+        _config_state.version = config_window.version
+        _config_state.vim_mode = config_window.get_setting("Modo de Navegação (Vim)") == "Vim (h,j,k,l)"
+
+    name = read_key_name(key, stdscr)
+    if name is None: # Sequência ESC desconhecida
+        return None
 
-    else:
-        if key in (curses.KEY_BACKSPACE, 127, 8):
-            editor.delete_char()
-        elif key == 10:
-            editor.new_line_with_indent()
-            editor.dirty = True
-        elif key == curses.KEY_RESIZE:
-            pass
-        elif key == 9: # Tab
-            if not editor.attempt_autocomplete_word():
-                if editor.active_tab_index < len(editor.tabs) - 1:
-                    editor.active_tab_index += 1
-                else:
-                    editor.active_tab_index = 0
-                return "Próxima aba"
-        elif key == 353: # Shift + Tab
-            if editor.active_tab_index > 0:
-                editor.active_tab_index -= 1
-            else:
-                editor.active_tab_index = len(editor.tabs) - 1
-            return "Aba anterior"
-        elif 32 <= key <= 126:
-            editor.insert_char(chr(key))
-        elif key == curses.KEY_LEFT:
-            if editor.active_buffer:
-                editor.active_buffer.cursor_x = max(0, editor.active_buffer.cursor_x - 1)
-        elif key == curses.KEY_RIGHT:
-            if editor.active_buffer:
-                editor.active_buffer.cursor_x = min(len(editor.active_buffer.lines[editor.active_buffer.cursor_y]), editor.active_buffer.cursor_x + 1)
-        elif key == curses.KEY_UP:
-            if editor.active_buffer:
-                editor.active_buffer.cursor_y = max(0, editor.active_buffer.cursor_y - 1)
-                editor.active_buffer.cursor_x = min(editor.active_buffer.cursor_x, len(editor.active_buffer.lines[editor.active_buffer.cursor_y]))
-        elif key == curses.KEY_DOWN:
-            if editor.active_buffer:
-                editor.active_buffer.cursor_y = min(len(editor.active_buffer.lines) - 1, editor.active_buffer.cursor_y + 1)
-                editor.active_buffer.cursor_x = min(editor.active_buffer.cursor_x, len(editor.active_buffer.lines[editor.active_buffer.cursor_y]))
-
-        sleft = getattr(curses, 'KEY_SLEFT', -1)
-        sright = getattr(curses, 'KEY_SRIGHT', -1)
-        sup = getattr(curses, 'KEY_SUP', -1)
-        sdown = getattr(curses, 'KEY_SDOWN', -1)
-        if not editor.active_buffer: return None
-
-        selection_keys = [k for k in (sleft, sright, sup, sdown) if k != -1]
-
-        if key in selection_keys:
-            if not editor.active_buffer.selecting:
-                editor.start_selection()
-
-            if key == sleft:
-                editor.active_buffer.cursor_x = max(0, editor.active_buffer.cursor_x - 1)
-            elif key == sright:
-                editor.active_buffer.cursor_x = min(len(editor.active_buffer.lines[editor.active_buffer.cursor_y]), editor.active_buffer.cursor_x + 1)
-            elif key == sup:
-                editor.active_buffer.cursor_y = max(0, editor.active_buffer.cursor_y - 1)
-                editor.active_buffer.cursor_x = min(editor.active_buffer.cursor_x, len(editor.active_buffer.lines[editor.active_buffer.cursor_y]))
-            elif key == sdown:
-                editor.active_buffer.cursor_y = min(len(editor.active_buffer.lines) - 1, editor.active_buffer.cursor_y + 1)
-                editor.active_buffer.cursor_x = min(editor.active_buffer.cursor_x, len(editor.active_buffer.lines[editor.active_buffer.cursor_y]))
-        else:
-            if editor.active_buffer.selecting:
-                editor.clear_selection()
-    return None
\ No newline at end of file
+    c = KeyContext(key, stdscr, editor, sidebar, console, structbar, help_window, git_window, whats_new_window, config_window)
+    contexts = _active_contexts(c)
+    context, action_name, action = keymap.lookup(contexts, name)
+    if action is None:
+        context = next(ctx for ctx in contexts if ctx in CONTEXT_DEFAULTS or ctx == "global")
+        action_name = CONTEXT_DEFAULTS.get(context, "ignore")
+        action = ACTIONS[action_name]
+
+    clears_selection = context == "editor" and not getattr(action, "keeps_selection", False)
+    if macro_recorder.recording:
+        macro_recorder.record(action_name, key, clears_selection)
+    status = action(c)
+    if clears_selection:
+        _clear_selection(editor)
+    return status
@@ -0,0 +1,219 @@
+import curses
+import json
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ecte.latency import read_key
+
+USER_KEYMAP_FILE = Path.home() / ".config" / "ecte" / "keymap.json"
+ESCAPE_SEQUENCE_MAX_LEN = 8
+
+# Contextos em que uma tecla pode ser ligada; "global" vale em qualquer um deles
+CONTEXTS = ("global", "whats_new", "help", "config", "structbar", "git", "console",
+            "sidebar", "sidebar_search", "editor", "vim", "hex", "profile")
+
+_NAMED_KEYS = {
+    0: "ctrl+space", 9: "tab", 10: "enter", 13: "enter", 27: "esc", 32: "space",
+    8: "backspace", 127: "backspace", 31: "ctrl+/", 28: "ctrl+\\", 29: "ctrl+]", 30: "ctrl+^",
+    335: "ctrl+shift+f",
+    curses.KEY_ENTER: "enter", curses.KEY_BACKSPACE: "backspace",
+    curses.KEY_DC: "delete", curses.KEY_IC: "insert",
+    curses.KEY_UP: "up", curses.KEY_DOWN: "down", curses.KEY_LEFT: "left", curses.KEY_RIGHT: "right",
+    curses.KEY_HOME: "home", curses.KEY_END: "end", curses.KEY_PPAGE: "pageup", curses.KEY_NPAGE: "pagedown",
+    curses.KEY_SLEFT: "shift+left", curses.KEY_SRIGHT: "shift+right",
+    curses.KEY_SR: "shift+up", curses.KEY_SF: "shift+down",
+    curses.KEY_SHOME: "shift+home", curses.KEY_SEND: "shift+end",
+    curses.KEY_BTAB: "shift+tab", curses.KEY_RESIZE: "resize", curses.KEY_MOUSE: "mouse",
+}
+_NAMED_KEYS.update({curses.KEY_F0 + n: f"f{n}" for n in range(1, 13)})
+_NAMED_KEYS.update({code: f"ctrl+{chr(code + 96)}" for code in range(1, 27) if code not in _NAMED_KEYS})
+
+# Teclas com modificador que o ncurses entrega como códigos estendidos (nomes do terminfo)
+_TERMINFO_NAMES = {
+    "kUP3": "alt+up", "kDN3": "alt+down", "kLFT3": "alt+left", "kRIT3": "alt+right",
+    "kUP5": "ctrl+up", "kDN5": "ctrl+down", "kLFT5": "ctrl+left", "kRIT5": "ctrl+right",
+    "kPRV5": "ctrl+pageup", "kNXT5": "ctrl+pagedown", "kHOM5": "ctrl+home", "kEND5": "ctrl+end",
+    "kDC5": "ctrl+delete", "kUP": "shift+up", "kDN": "shift+down",
+}
+
+# Sequências ESC que o terminal não traduziu (as que começam com '[' depois do ESC)
+ESCAPE_SEQUENCES: Dict[str, str] = {
+    "[200~": "paste",
+    "[1;3A": "alt+up", "[1;3B": "alt+down", "[1;3C": "alt+right", "[1;3D": "alt+left",
+    "[1;5A": "ctrl+up", "[1;5B": "ctrl+down", "[1;5C": "ctrl+right", "[1;5D": "ctrl+left",
+    "[5;5~": "ctrl+pageup", "[6;5~": "ctrl+pagedown",
+}
+
+_escape_decoders: List[Callable[[str], Optional[str]]] = []
+_name_cache: Dict[int, str] = {}
+
+
+def register_escape_decoder(decoder: Callable[[str], Optional[str]]):
+    """Acrescenta um decodificador para sequências fora de ESCAPE_SEQUENCES; ele devolve o nome da tecla ou None."""
+    _escape_decoders.append(decoder)
+
+
+def key_name(key: int) -> str:
+    """Nome canônico de um código do getch(): 'ctrl+s', 'shift+tab', 'f12', 'a', 'A'..."""
+    name = _name_cache.get(key)
+    if name is not None:
+        return name
+    if key in _NAMED_KEYS:
+        name = _NAMED_KEYS[key]
+    elif 33 <= key <= 126:
+        name = chr(key)
+    else:
+        name = f"key{key}"
+        if key > 255:
+            try:
+                name = _TERMINFO_NAMES.get(curses.keyname(key).decode(), name)
+            except (curses.error, ValueError):
+                return name # Sem terminal inicializado: não guarda, o nome real pode aparecer depois
+    _name_cache[key] = name
+    return name
+
+
+def normalize_key_name(name: str) -> str:
+    """'Ctrl+S' -> 'ctrl+s'; teclas de um caractere mantêm a caixa ('alt+T' ≠ 'alt+t')."""
+    *modifiers, base = name.strip().split("+") if name.strip() != "+" else ["+"]
+    if base == "" and modifiers: # 'ctrl++'
+        modifiers, base = modifiers[:-1], "+"
+    if len(base) > 1:
+        base = base.lower()
+    if modifiers == ["ctrl"] and len(base) == 1 and base.isalpha():
+        base = base.lower() # Ctrl não distingue caixa no terminal
+    return "+".join([m.lower() for m in modifiers] + [base])
+
+
+def decode_escape(sequence: str) -> Optional[str]:
+    name = ESCAPE_SEQUENCES.get(sequence)
+    if name is None:
+        for decoder in _escape_decoders:
+            name = decoder(sequence)
+            if name:
+                break
+    return name
+
+
+def _read_escape_sequence(stdscr, first_key: int, max_len: int = ESCAPE_SEQUENCE_MAX_LEN) -> str:
+    """Lê, sem bloquear, o restante de uma sequência ESC já iniciada por first_key."""
+    sequence = chr(first_key)
+    while len(sequence) < max_len and not (len(sequence) > 1 and (sequence[-1] == '~' or sequence[-1].isalpha())):
+        key = read_key(stdscr)
+        if key == -1 or not (0 <= key <= 255):
+            break
+        sequence += chr(key)
+    return sequence
+
+
+def read_key_name(key: int, stdscr) -> Optional[str]:
+    """
+    Converte a tecla lida em nome. Um ESC consome, sem bloquear, o que vier logo depois:
+    nada ('esc'), uma sequência ('[...', decodificada por decode_escape) ou uma tecla (Alt+tecla).
+    Devolve None para sequências desconhecidas, que são ignoradas.
+    """
+    if key != 27:
+        return key_name(key)
+    stdscr.nodelay(True)
+    try:
+        next_key = read_key(stdscr)
+        if next_key == -1:
+            return "esc"
+        if next_key == ord('['):
+            return decode_escape(_read_escape_sequence(stdscr, next_key))
+    finally:
+        stdscr.nodelay(False)
+    return "alt+" + key_name(next_key)
+
+
+class Keymap:
+    """
+    Tabela (contexto, nome da tecla) -> ação. As ligações padrão vêm do key_handler e o
+    arquivo do usuário (~/.config/ecte/keymap.json) sobrepõe por contexto, por exemplo:
+
+        {"editor": {"ctrl+k": "edit.duplicate_line", "tab": null},
+         "global": {"f5": "file.run"}}
+
+    Uma ação null (ou "") desfaz a ligação padrão. A consulta percorre os contextos ativos,
+    do mais específico ao "global", então cada tecla custa poucas buscas em dicionário.
+    """
+
+    def __init__(self, actions: Dict[str, Callable], defaults: Dict[str, Dict[str, str]]):
+        self.actions = actions
+        self.defaults = defaults
+        self.bindings: Dict[str, Dict[str, str]] = {}
+        self.table: Dict[Tuple[str, str], Tuple[str, Callable]] = {}
+        self.reset()
+
+    def reset(self):
+        self.bindings = {context: dict(keys) for context, keys in self.defaults.items()}
+        self.compile()
+
+    def compile(self):
+        self.table = {
+            (context, key): (action, self.actions[action])
+            for context, keys in self.bindings.items()
+            for key, action in keys.items() if action
+        }
+
+    def bind(self, context: str, key: str, action: Optional[str]):
+        self._set(context, key, action)
+        self.compile()
+
+    def _set(self, context: str, key: str, action: Optional[str]):
+        """bind sem refazer a tabela: apply liga tudo e compila uma vez só."""
+        if context not in CONTEXTS:
+            raise ValueError(f"contexto desconhecido '{context}'")
+        if action and action not in self.actions:
+            raise ValueError(f"ação desconhecida '{action}'")
+        self.bindings.setdefault(context, {})[normalize_key_name(key)] = action or None
+
+    def lookup(self, contexts, name: str):
+        """Devolve (contexto, nome da ação, ação) da primeira ligação encontrada, ou (None, None, None)."""
+        table = self.table
+        for context in contexts:
+            bound = table.get((context, name))
+            if bound is not None:
+                return (context,) + bound
+        return None, None, None
+
+    def keys_for(self, action: str) -> List[str]:
+        return [key for keys in self.bindings.values() for key, bound in keys.items() if bound == action]
+
+    def load(self, path: Path = USER_KEYMAP_FILE) -> List[str]:
+        """Volta às ligações padrão e aplica o arquivo do usuário. Devolve os problemas encontrados."""
+        self.reset()
+        path = Path(path)
+        if not path.is_file():
+            return []
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            return [f"{path}: {e}"]
+        if not isinstance(data, dict):
+            return [f"{path}: esperado um objeto {{contexto: {{tecla: ação}}}}"]
+        return [f"{path}: {error}" for error in self.apply(data)]
+
+    def apply(self, overrides: Dict[str, Dict[str, Optional[str]]]) -> List[str]:
+        errors = []
+        for context, keys in overrides.items():
+            if not isinstance(keys, dict):
+                errors.append(f"'{context}' deve ser um objeto {{tecla: ação}}")
+                continue
+            for key, action in keys.items():
+                try:
+                    self._set(context, key, action)
+                except ValueError as e:
+                    errors.append(f"{context}/{key}: {e}")
+        self.compile()
+        return errors
+
+    def overrides(self) -> Dict[str, Dict[str, Optional[str]]]:
+        """Diferença em relação às ligações padrão, no mesmo formato do arquivo do usuário."""
+        result = {}
+        for context, keys in self.bindings.items():
+            defaults = self.defaults.get(context, {})
+            changed = {key: action for key, action in keys.items() if defaults.get(key) != action}
+            if changed:
+                result[context] = changed
+        return result
@@ -0,0 +1,245 @@
+import curses
+import json
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+RECORDING_FORMAT = "tasmacode-keys"
+RECORDING_VERSION = 1
+RECORDER_FLUSH_KEYS = 256
+
+SUB_BUCKET_BITS = 7 # 128 sub-baldes por potência de 2: erro relativo < 1,6%
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT // 2
+
+KEY_CLASSES = ("digitação", "navegação", "colagem", "atalho")
+
+_TYPING_KEYS = {9, 10, 13, 8, 127, curses.KEY_BACKSPACE, curses.KEY_DC, curses.KEY_ENTER}
+_NAVIGATION_KEYS = {
+    curses.KEY_UP, curses.KEY_DOWN, curses.KEY_LEFT, curses.KEY_RIGHT,
+    curses.KEY_HOME, curses.KEY_END, curses.KEY_PPAGE, curses.KEY_NPAGE,
+    curses.KEY_SLEFT, curses.KEY_SRIGHT, curses.KEY_SR, curses.KEY_SF,
+    curses.KEY_SHOME, curses.KEY_SEND, curses.KEY_MOUSE,
+}
+
+
+def classify_key(key: int) -> str:
+    if 32 <= key <= 255 and key != 127 or key in _TYPING_KEYS: # 128-255: bytes de caracteres UTF-8
+        return "digitação"
+    if key in _NAVIGATION_KEYS:
+        return "navegação"
+    return "atalho"
+
+
+class LatencyHistogram:
+    """
+    Histograma no estilo HDR: baldes lineares dentro de cada potência de 2, então a
+    precisão relativa é a mesma de microssegundos a segundos e a memória é fixa.
+    Os valores são registrados em microssegundos.
+    """
+
+    def __init__(self):
+        self.counts: List[int] = []
+        self.total_count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    @staticmethod
+    def bucket_index(value: int) -> int:
+        if value < SUB_BUCKET_COUNT:
+            return value
+        shift = value.bit_length() - SUB_BUCKET_BITS
+        return SUB_BUCKET_COUNT + (shift - 1) * SUB_BUCKET_HALF + (value >> shift) - SUB_BUCKET_HALF
+
+    @staticmethod
+    def bucket_value(index: int) -> int:
+        """Valor representativo (meio do balde) de um índice."""
+        if index < SUB_BUCKET_COUNT:
+            return index
+        shift, sub = divmod(index - SUB_BUCKET_COUNT, SUB_BUCKET_HALF)
+        shift += 1
+        low = (sub + SUB_BUCKET_HALF) << shift
+        return low + (1 << shift) // 2
+
+    def record(self, value_us: int):
+        value_us = max(0, int(value_us))
+        index = self.bucket_index(value_us)
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += 1
+        self.total_count += 1
+        self.total += value_us
+        self.max = max(self.max, value_us)
+        self.min = value_us if self.min is None else min(self.min, value_us)
+
+    def percentile(self, fraction: float) -> int:
+        if not self.total_count:
+            return 0
+        target = max(1, int(round(fraction * self.total_count)))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self.bucket_value(index), self.max)
+        return self.max
+
+    def mean(self) -> float:
+        return self.total / self.total_count if self.total_count else 0.0
+
+    def merge(self, other: "LatencyHistogram"):
+        if len(other.counts) > len(self.counts):
+            self.counts.extend([0] * (len(other.counts) - len(self.counts)))
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.total_count += other.total_count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+
+    def summary(self) -> dict:
+        return {
+            "count": self.total_count,
+            "mean_ms": round(self.mean() / 1000, 3),
+            "p50_ms": round(self.percentile(0.50) / 1000, 3),
+            "p90_ms": round(self.percentile(0.90) / 1000, 3),
+            "p99_ms": round(self.percentile(0.99) / 1000, 3),
+            "p999_ms": round(self.percentile(0.999) / 1000, 3),
+            "max_ms": round(self.max / 1000, 3),
+        }
+
+
+class KeyRecorder:
+    """
+    Grava as teclas lidas em JSONL: um cabeçalho com o estado inicial (tamanho da tela,
+    abas abertas) e depois uma linha [ms desde o início, tecla] por leitura. Leituras sem
+    bloqueio que não acharam tecla (-1) também são gravadas, para a reprodução seguir o
+    mesmo caminho no tratamento de ESC e de colagens.
+    """
+
+    def __init__(self, path: Path, header: dict):
+        self.path = Path(path)
+        self._started = time.perf_counter()
+        self._pending = []
+        self.keys_written = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        header = dict(header, format=RECORDING_FORMAT, version=RECORDING_VERSION,
+                      started=time.strftime("%Y-%m-%dT%H:%M:%S"))
+        self.path.write_text(json.dumps(header, ensure_ascii=False) + "\n", encoding="utf-8")
+
+    def record(self, key: int):
+        self._pending.append(f"[{(time.perf_counter() - self._started) * 1000:.1f},{key}]\n")
+        if len(self._pending) >= RECORDER_FLUSH_KEYS:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(self._pending))
+        self.keys_written += len(self._pending)
+        self._pending.clear()
+
+
+def load_recording(path: Path):
+    """Retorna (cabeçalho, [(ms, tecla), ...]) de uma gravação."""
+    with open(path, encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("format") != RECORDING_FORMAT:
+            raise ValueError(f"{path} não é uma gravação de teclas do tasmacode")
+        events = [tuple(json.loads(line)) for line in f if line.strip()]
+    return header, events
+
+
+class LatencyTracker:
+    """
+    Mede o tempo entre getch() devolver uma tecla e o doupdate() do quadro seguinte
+    terminar, separado por classe de tecla. Também repassa as teclas lidas ao
+    KeyRecorder quando há uma gravação em andamento.
+    """
+
+    def __init__(self):
+        self.histograms: Dict[str, LatencyHistogram] = {name: LatencyHistogram() for name in KEY_CLASSES}
+        self.recorder: Optional[KeyRecorder] = None
+        self.describe_session: Optional[Callable[[], dict]] = None # Definido por main(): estado inicial da gravação
+        self._pending = None # (classe, instante em ns) da tecla ainda não pintada
+
+    # --- Latência ---
+
+    def key_read(self, key: int):
+        if self._pending is None: # Várias teclas antes de um quadro: mede a partir da primeira
+            self._pending = (classify_key(key), time.perf_counter_ns())
+
+    def reclassify(self, key_class: str):
+        """Usado quando a classe só é conhecida depois (ex.: ESC que era o início de uma colagem)."""
+        if self._pending is not None:
+            self._pending = (key_class, self._pending[1])
+
+    def painted(self):
+        """Chamado logo depois do doupdate() do quadro."""
+        if self._pending is None:
+            return
+        key_class, started = self._pending
+        self._pending = None
+        self.histograms[key_class].record((time.perf_counter_ns() - started) // 1000)
+
+    def reset(self):
+        for histogram in self.histograms.values():
+            histogram.__init__()
+        self._pending = None
+
+    def report(self) -> Dict[str, dict]:
+        return {name: h.summary() for name, h in self.histograms.items() if h.total_count}
+
+    def report_lines(self) -> List[str]:
+        report = self.report()
+        if not report:
+            return ["Nenhuma tecla medida ainda."]
+        lines = [f"  {'classe':<10} {'n':>6} {'p50':>8} {'p90':>8} {'p99':>8} {'p99.9':>8} {'máx':>8}  (ms)"]
+        for name, s in report.items():
+            lines.append(f"  {name:<10} {s['count']:>6} {s['p50_ms']:>8.2f} {s['p90_ms']:>8.2f} "
+                         f"{s['p99_ms']:>8.2f} {s['p999_ms']:>8.2f} {s['max_ms']:>8.2f}")
+        return lines
+
+    # --- Gravação ---
+
+    def input_read(self, key: int):
+        if self.recorder:
+            self.recorder.record(key)
+
+    def input_bytes(self, data: bytes):
+        """Bytes lidos direto do terminal (fora do getch), como o fim de uma colagem grande."""
+        if self.recorder:
+            for byte in data:
+                self.recorder.record(byte)
+
+    def start_recording(self, path: Path) -> str:
+        self.stop_recording()
+        header = self.describe_session() if self.describe_session else {}
+        try:
+            self.recorder = KeyRecorder(path, header)
+        except OSError as e:
+            return f"Não foi possível gravar as teclas: {e}"
+        return f"Gravando teclas em {path}"
+
+    def stop_recording(self) -> Optional[str]:
+        if not self.recorder:
+            return None
+        recorder, self.recorder = self.recorder, None
+        recorder.flush()
+        return f"{recorder.keys_written} leituras de teclas salvas em {recorder.path}"
+
+
+def read_key(win, record_timeouts: bool = True) -> int:
+    """
+    getch() que passa pela gravação. O loop principal usa record_timeouts=False:
+    os -1 dele são só o timeout de espera e não mudam o que acontece depois.
+    """
+    key = win.getch()
+    if key != -1 or record_timeouts:
+        tracker.input_read(key)
+    return key
+
+
+tracker = LatencyTracker()
@@ -0,0 +1,257 @@
+import email.utils
+import functools
+import http.server
+import io
+import os
+import re
+import threading
+from pathlib import Path
+
+AUTO_PORT_RANGE = range(8000, 8011)
+LIVE_RELOAD_PATH = "/__tasma_livereload"
+LIVE_RELOAD_KEEPALIVE = 15 # Segundos entre comentários de keep-alive no SSE
+LIVE_RELOAD_SCRIPT = (
+    '<script>new EventSource("' + LIVE_RELOAD_PATH + '")'
+    '.addEventListener("reload",function(){location.reload();});</script>'
+).encode("utf-8")
+_BODY_CLOSE_RE = re.compile(rb"</body\s*>", re.IGNORECASE)
+
+
+class LiveReloadHub:
+    """Mantém um contador de gerações; cada salvamento acorda os clientes SSE."""
+
+    def __init__(self):
+        self.generation = 0
+        self.closed = False
+        self._condition = threading.Condition()
+
+    def notify(self):
+        with self._condition:
+            self.generation += 1
+            self._condition.notify_all()
+
+    def wait(self, seen_generation: int, timeout: float) -> int:
+        with self._condition:
+            if self.generation == seen_generation and not self.closed:
+                self._condition.wait(timeout)
+            return self.generation
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+class ProjectRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """
+    Handler ligado a um diretório fixo (sem os.chdir) com validação por
+    ETag/Last-Modified, envio via sendfile e suporte a arquivos .gz pré-comprimidos.
+    """
+
+    def log_message(self, format, *args):
+        pass # Qualquer escrita em stderr corromperia a tela do curses
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] == LIVE_RELOAD_PATH:
+            self._serve_live_reload()
+            return
+        super().do_GET()
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            for index in ("index.html", "index.htm"):
+                index_path = os.path.join(path, index)
+                if os.path.isfile(index_path):
+                    if not self.path.split("?", 1)[0].endswith("/"):
+                        return super().send_head() # Deixa o stdlib fazer o redirect com "/"
+                    path = index_path
+                    break
+            else:
+                return super().send_head() # Listagem de diretório
+        elif path.endswith("/"):
+            self.send_error(404, "File not found")
+            return None
+
+        ctype = self.guess_type(path)
+        try:
+            f = open(path, "rb")
+        except OSError:
+            self.send_error(404, "File not found")
+            return None
+
+        try:
+            fs = os.fstat(f.fileno())
+            etag = f'"{fs.st_mtime_ns:x}-{fs.st_size:x}"'
+            if self._is_not_modified(etag, fs.st_mtime):
+                f.close()
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return None
+
+            content_encoding = None
+            length = fs.st_size
+            if ctype == "text/html":
+                body = self._inject_live_reload(f.read())
+                f.close()
+                f = io.BytesIO(body)
+                length = len(body)
+            else:
+                gz = self._precompressed_variant(path, fs.st_mtime)
+                if gz:
+                    f.close()
+                    f = gz
+                    length = os.fstat(gz.fileno()).st_size
+                    content_encoding = "gzip"
+                    etag = etag[:-1] + '-gz"'
+
+            self.send_response(200)
+            self.send_header("Content-type", ctype)
+            self.send_header("Content-Length", str(length))
+            self.send_header("Last-Modified", self.date_time_string(fs.st_mtime))
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache") # Sempre revalida; 304 é barato
+            if content_encoding:
+                self.send_header("Content-Encoding", content_encoding)
+            if self.server.precompressed_gzip:
+                self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return f
+        except Exception:
+            f.close()
+            raise
+
+    def copyfile(self, source, outputfile):
+        if isinstance(source, io.BufferedReader):
+            try:
+                self.connection.sendfile(source) # Usa os.sendfile quando disponível
+                return
+            except (OSError, ValueError):
+                pass
+        super().copyfile(source, outputfile)
+
+    def _is_not_modified(self, etag: str, mtime: float) -> bool:
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match:
+            candidates = [tag.strip() for tag in if_none_match.split(",")]
+            return etag in candidates or etag[:-1] + '-gz"' in candidates or "*" in candidates
+
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError, IndexError, OverflowError):
+                return False
+            return since is not None and int(mtime) <= since.timestamp()
+        return False
+
+    def _precompressed_variant(self, path: str, mtime: float):
+        if not self.server.precompressed_gzip:
+            return None
+        if "gzip" not in self.headers.get("Accept-Encoding", ""):
+            return None
+        gz_path = path + ".gz"
+        try:
+            if os.stat(gz_path).st_mtime < mtime:
+                return None # .gz desatualizado em relação ao original
+            return open(gz_path, "rb")
+        except OSError:
+            return None
+
+    def _inject_live_reload(self, body: bytes) -> bytes:
+        matches = list(_BODY_CLOSE_RE.finditer(body))
+        if not matches:
+            return body + LIVE_RELOAD_SCRIPT
+        pos = matches[-1].start()
+        return body[:pos] + LIVE_RELOAD_SCRIPT + body[pos:]
+
+    def _serve_live_reload(self):
+        hub = self.server.live_reload
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        seen = hub.generation
+        try:
+            while not hub.closed:
+                generation = hub.wait(seen, LIVE_RELOAD_KEEPALIVE)
+                if hub.closed:
+                    break
+                if generation != seen:
+                    seen = generation
+                    self.wfile.write(f"event: reload\ndata: {generation}\n\n".encode("utf-8"))
+                else:
+                    self.wfile.write(b": ping\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            pass
+
+
+class _ProjectHTTPServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, handler, precompressed_gzip: bool, live_reload: LiveReloadHub):
+        self.precompressed_gzip = precompressed_gzip
+        self.live_reload = live_reload
+        super().__init__(address, handler)
+
+
+class LocalServer:
+    """Servidor HTTP local da pasta do projeto (Alt+S)."""
+
+    def __init__(self, root: Path, port: int | None = None, precompressed_gzip: bool = True):
+        self.root = Path(root)
+        self.requested_port = port
+        self.precompressed_gzip = precompressed_gzip
+        self.port: int | None = None
+        self.live_reload = LiveReloadHub()
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> int:
+        """Inicia o servidor e retorna a porta usada. Levanta OSError se não conseguir."""
+        handler = functools.partial(ProjectRequestHandler, directory=str(self.root))
+        ports = [self.requested_port] if self.requested_port else list(AUTO_PORT_RANGE) + [0]
+
+        last_error = None
+        for port in ports:
+            try:
+                self._httpd = _ProjectHTTPServer(("", port), handler, self.precompressed_gzip, self.live_reload)
+                break
+            except OSError as e:
+                last_error = e
+        else:
+            raise last_error or OSError("Nenhuma porta disponível")
+
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.port
+
+    def stop(self):
+        self.live_reload.close()
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+        self._httpd = None
+        self._thread = None
+
+    def serves(self, path: Path | None) -> bool:
+        if not path:
+            return False
+        try:
+            Path(path).resolve().relative_to(self.root.resolve())
+            return True
+        except ValueError:
+            return False
+
+    def notify_reload(self, path: Path | None = None):
+        """Avisa os navegadores conectados que um arquivo do projeto foi salvo."""
+        if path is None or self.serves(path):
+            self.live_reload.notify()
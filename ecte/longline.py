@@ -0,0 +1,273 @@
+import bisect
+import time
+from itertools import accumulate
+from typing import List, Optional, Tuple
+
+from pygments.lexer import RegexLexer
+from pygments.token import Error, Text, _TokenType
+
+LONG_LINE_CHARS = 64 * 1024 # Acima disso a linha é editada em trechos e realçada em janelas
+CHUNK_CHARS = 4096
+LEX_WINDOW = 4096 # Distância mínima entre pontos de retomada do lexer
+LEX_LOOKAHEAD = 512 # Texto lido além do ponto de retomada seguinte à janela (lookaheads das regras)
+LEX_SCAN_AHEAD = 256 * 1024 # Sem ponto de retomada depois da janela, texto lido além dela
+LEX_MAX_RESUME = 64 * 1024 # Mais longe que isso do último ponto conhecido, a janela é só aproximada
+LEX_CATCHUP_SECONDS = 0.05 # Tempo por desenho para os pontos de retomada alcançarem um salto longo
+
+
+class LineEdit(list):
+    """
+    novas_linhas de uma edição dentro de uma linha longa: [SegmentedLine], mais o trecho
+    trocado (x, removidos, texto) para quem só precisa da diferença, como o diário de recuperação.
+    """
+
+    def __init__(self, line: "SegmentedLine", x: int, removed: int, text: str):
+        super().__init__([line])
+        self.x = x
+        self.removed = removed
+        self.text = text
+
+
+class SegmentedLine:
+    """
+    Uma linha enorme (JSON ou JS minificado) guardada em trechos de ~CHUNK_CHARS. Editar
+    copia só o trecho tocado e a lista de posições (uma entrada por trecho); o texto
+    inteiro só é montado quando alguém pede. Também guarda os pontos de retomada do
+    lexer usados por window_tokens, descartados a partir de cada edição.
+    """
+
+    def __init__(self, text: str = "", chunks: Optional[List[str]] = None):
+        self._text: Optional[str] = text if chunks is None else None
+        self.chunks: Optional[List[str]] = None # Só divide o texto na primeira edição
+        self._starts: List[int] = []
+        self._length = len(text)
+        if chunks is not None:
+            self._set_chunks(list(chunks))
+        self.lex_class = None
+        self.lex_offsets: List[int] = []
+        self.lex_states: list = []
+        self.lex_cache = None # ((classe, início, fim), tokens) do último quadro
+        self.edits = 0
+        self.last_edit = None # (início, fim, tamanho do texto novo) da última edição
+        self.column_cache = None # SegmentColumns (display.py) da versão `edits`
+
+    def _set_chunks(self, chunks: List[str]):
+        chunks = [chunk for chunk in chunks if chunk] or [""]
+        self.chunks = chunks
+        self._starts = [0] + list(accumulate(map(len, chunks)))[:-1]
+        self._length = self._starts[-1] + len(chunks[-1])
+
+    def _ensure_chunks(self):
+        if self.chunks is None:
+            text = self._text
+            self._set_chunks([text[i:i + CHUNK_CHARS] for i in range(0, len(text), CHUNK_CHARS)])
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __str__(self) -> str:
+        return self.text()
+
+    def text(self) -> str:
+        if self._text is None:
+            self._text = "".join(self.chunks)
+        return self._text
+
+    def snapshot(self) -> Tuple[str, ...]:
+        """Conteúdo atual para o undo: compartilha os trechos, custa um ponteiro por trecho."""
+        if self._text is not None:
+            return (self._text,)
+        return tuple(self.chunks)
+
+    def _find(self, pos: int) -> int:
+        return max(0, bisect.bisect_right(self._starts, pos) - 1)
+
+    def slice(self, start: int, end: int) -> str:
+        start, end = max(0, start), min(self._length, end)
+        if start >= end:
+            return ""
+        if self._text is not None:
+            return self._text[start:end]
+        i, j = self._find(start), self._find(end - 1)
+        if i == j:
+            offset = self._starts[i]
+            return self.chunks[i][start - offset:end - offset]
+        parts = [self.chunks[i][start - self._starts[i]:]]
+        parts.extend(self.chunks[i + 1:j])
+        parts.append(self.chunks[j][:end - self._starts[j]])
+        return "".join(parts)
+
+    def replace(self, start: int, end: int, text: str):
+        """line[start:end] = text, copiando só os trechos envolvidos."""
+        self._ensure_chunks()
+        start, end = max(0, min(start, self._length)), max(0, min(end, self._length))
+        i = self._find(start)
+        j = self._find(end) if end > start else i
+        first_start = self._starts[i]
+        merged = self.chunks[i][:start - first_start] + text + self.chunks[j][end - self._starts[j]:]
+        if len(merged) > 2 * CHUNK_CHARS:
+            pieces = [merged[k:k + CHUNK_CHARS] for k in range(0, len(merged), CHUNK_CHARS)]
+        else:
+            pieces = [merged] if merged or j - i + 1 == len(self.chunks) else []
+        self.chunks[i:j + 1] = pieces
+        self._starts[i:] = list(accumulate(map(len, self.chunks[i:]), initial=first_start))[:-1]
+        self._length += len(text) - (end - start)
+        self._text = None
+        self.edits += 1
+        self.last_edit = (start, end, len(text))
+        self.lex_cache = None
+        keep = bisect.bisect_left(self.lex_offsets, start) # Um token pode começar antes de start e atravessar o ponto
+        del self.lex_offsets[keep:]
+        del self.lex_states[keep:]
+
+
+def _regex_tokens(lexer, text: str, pos: int, stack: tuple):
+    """
+    O laço de RegexLexer.get_tokens_unprocessed a partir de (pos, pilha), devolvendo também
+    a pilha de estados no início de cada casamento: é dela que a próxima janela recomeça.
+    """
+    tokendefs = lexer._tokens
+    statestack = list(stack)
+    statetokens = tokendefs[statestack[-1]]
+    length = len(text)
+    while pos < length:
+        for rexmatch, action, new_state in statetokens:
+            m = rexmatch(text, pos)
+            if m:
+                resume = tuple(statestack)
+                if action is not None:
+                    if type(action) is _TokenType:
+                        yield pos, action, m.group(), resume
+                    else:
+                        for tpos, ttype, value in action(lexer, m):
+                            yield tpos, ttype, value, resume if tpos == pos else None
+                            resume = None
+                pos = m.end()
+                if new_state is not None:
+                    if isinstance(new_state, tuple):
+                        for state in new_state:
+                            if state == '#pop':
+                                if len(statestack) > 1:
+                                    statestack.pop()
+                            elif state == '#push':
+                                statestack.append(statestack[-1])
+                            else:
+                                statestack.append(state)
+                    elif isinstance(new_state, int):
+                        if abs(new_state) >= len(statestack):
+                            del statestack[1:]
+                        else:
+                            del statestack[new_state:]
+                    elif new_state == '#push':
+                        statestack.append(statestack[-1])
+                    statetokens = tokendefs[statestack[-1]]
+                break
+        else:
+            yield pos, Error, text[pos], tuple(statestack)
+            pos += 1
+
+
+def _lex_from(line: SegmentedLine, lexer, resumable: bool, origin: int, state, stop: Optional[int] = None):
+    """
+    (posição, tipo, texto, estado de retomada) a partir de origin, com o lexer no estado
+    `state`. Com `stop`, o texto é cortado ali e os tokens perto do corte podem sair errados
+    (uma string que passa do corte não casa); sem ele, o lexer vê a linha até o fim.
+    """
+    if resumable and stop is None:
+        yield from _regex_tokens(lexer, line.text(), origin, state) # Sem cópia: o texto já está montado
+        return
+    text = line.slice(origin, len(line) if stop is None else stop)
+    if resumable:
+        stream = _regex_tokens(lexer, text, 0, state)
+    else:
+        stream = ((pos, ttype, value, True) for pos, ttype, value in lexer.get_tokens_unprocessed(text))
+    for pos, ttype, value, resume in stream:
+        yield pos + origin, ttype, value, resume
+
+
+def _extend_checkpoints(line: SegmentedLine, lexer, resumable: bool, limit: int, deadline: float):
+    """
+    Lexa do último ponto de retomada até `limit` (ou até `deadline`), guardando um ponto a
+    cada LEX_WINDOW caracteres. O texto não é cortado: um ponto guardado vale para sempre.
+    """
+    origin, state = line.lex_offsets[-1], line.lex_states[-1]
+    for pos, _, _, resume in _lex_from(line, lexer, resumable, origin, state):
+        if pos >= limit:
+            break
+        if resume is not None and pos >= line.lex_offsets[-1] + LEX_WINDOW:
+            line.lex_offsets.append(pos)
+            line.lex_states.append(resume if resumable else None)
+            if time.perf_counter() >= deadline:
+                break
+
+
+def window_tokens(line: SegmentedLine, lexer, start: int, end: int) -> List[Tuple]:
+    """
+    Tokens (tipo, texto) que cobrem exatamente line[start:end]. O lexer recomeça do ponto de
+    retomada mais próximo antes de start, com o estado salvo ali (a pilha do RegexLexer; para
+    os outros lexers, um início de token), em vez de ver só o pedaço visível sem contexto.
+    Os pontos são guardados a cada LEX_WINDOW caracteres, avançando até a janela por no
+    máximo LEX_CATCHUP_SECONDS a cada chamada. Depois de um salto longo, enquanto não chegam,
+    a janela é lexada a partir do estado inicial um pouco antes de start: uma aproximação
+    que não é guardada (nem no cache), e o próximo desenho a corrige.
+    """
+    end = min(end, len(line))
+    if start >= end:
+        return []
+    lexer_class = type(lexer)
+    resumable = lexer_class.get_tokens_unprocessed is RegexLexer.get_tokens_unprocessed
+    initial = ('root',) if resumable else None
+    if line.lex_class is not lexer_class:
+        line.lex_class = lexer_class
+        line.lex_offsets, line.lex_states = [0], [initial]
+        line.lex_cache = None
+    key = (lexer_class, start, end)
+    if line.lex_cache and line.lex_cache[0] == key:
+        return line.lex_cache[1]
+    if not line.lex_offsets:
+        line.lex_offsets, line.lex_states = [0], [initial]
+
+    if start - line.lex_offsets[-1] > LEX_WINDOW:
+        _extend_checkpoints(line, lexer, resumable, start, time.perf_counter() + LEX_CATCHUP_SECONDS)
+    k = bisect.bisect_right(line.lex_offsets, start) - 1
+    origin, state = line.lex_offsets[k], line.lex_states[k]
+    approximate = start - origin > LEX_MAX_RESUME
+    if approximate:
+        origin, state = start - LEX_WINDOW, initial
+    # Nenhum token atravessa um ponto de retomada: cortar o texto logo depois do primeiro
+    # depois da janela não muda os tokens dela
+    after = bisect.bisect_left(line.lex_offsets, end)
+    stop = line.lex_offsets[after] + LEX_LOOKAHEAD if after < len(line.lex_offsets) else end + LEX_SCAN_AHEAD
+
+    tokens = []
+    covered = start
+    for pos, ttype, value, _ in _lex_from(line, lexer, resumable, origin, state, stop):
+        if pos >= end:
+            break
+        token_end = pos + len(value)
+        if token_end <= covered:
+            continue
+        if pos > covered: # Texto que o lexer pulou sem gerar token
+            tokens.append((Text, line.slice(covered, pos)))
+            covered = pos
+        tokens.append((ttype, value[covered - pos:end - pos]))
+        covered = min(token_end, end)
+    if covered < end:
+        tokens.append((Text, line.slice(covered, end)))
+
+    if not approximate:
+        line.lex_cache = (key, tokens)
+    return tokens
+
+
+def tokens_between(tokens: List[Tuple], starts: List[int], start: int, end: int) -> List[Tuple]:
+    """Recorta [start, end) de uma lista de tokens (tipo, texto); starts[i] é a posição do token i."""
+    result = []
+    for k in range(max(0, bisect.bisect_right(starts, start) - 1), len(tokens)):
+        pos = starts[k]
+        if pos >= end:
+            break
+        ttype, value = tokens[k]
+        if pos + len(value) > start:
+            result.append((ttype, value[max(0, start - pos):end - pos]))
+    return result
@@ -0,0 +1,96 @@
+from typing import Callable, List, NamedTuple, Optional
+
+from ecte.instrumentation import span
+
+# Só ações de edição entram na macro; atalhos de interface e os que leem o terminal ficam de fora
+RECORDED_PREFIXES = ("edit.", "cursor.", "select.")
+NOT_RECORDED = {"edit.undo", "edit.redo", "edit.find_replace", "edit.bracketed_paste"}
+
+
+class MacroStep(NamedTuple):
+    action: str # Nome da ação no key_handler.ACTIONS
+    key: int # Tecla que disparou a ação (usada pela inserção de caracteres)
+    clears_selection: bool # A ação veio do contexto do editor, que desfaz a seleção depois
+
+
+class MacroRecorder:
+    """
+    Grava as ações do editor disparadas pelo teclado (não as teclas) e as repete N vezes
+    ou uma vez por linha da seleção. A repetição roda dentro de um único handle_key, então
+    a tela só é redesenhada no fim, e vira um único passo de desfazer.
+    """
+
+    def __init__(self):
+        self.recording = False
+        self.steps: List[MacroStep] = []
+        self.last: List[MacroStep] = []
+
+    def toggle_recording(self) -> str:
+        if not self.recording:
+            self.recording = True
+            self.steps = []
+            return "Gravando macro (Alt+M para parar)"
+        self.recording = False
+        if not self.steps:
+            return "Macro vazia descartada."
+        self.last, self.steps = self.steps, []
+        return f"Macro gravada ({len(self.last)} ações). Alt+R para repetir."
+
+    def record(self, action: str, key: int, clears_selection: bool):
+        if action.startswith(RECORDED_PREFIXES) and action not in NOT_RECORDED:
+            self.steps.append(MacroStep(action, key, clears_selection))
+
+    def replay(self, editor, perform: Callable[[MacroStep], None], times: int = 1) -> str:
+        """Executa a última macro `times` vezes a partir do cursor."""
+        if self.recording:
+            return "Termine a gravação (Alt+M) antes de repetir a macro."
+        if not self.last or not editor.active_buffer:
+            return "Nenhuma macro gravada."
+        done = 0
+        with span("macro.replay"), editor.transaction():
+            try:
+                for done in range(1, times + 1):
+                    for step in self.last:
+                        perform(step)
+            except (IndexError, ValueError):
+                return f"Macro interrompida na repetição {done} de {times}."
+        return f"Macro repetida {times} vez(es)."
+
+    def replay_per_line(self, editor, perform: Callable[[MacroStep], None], first: int, last: int) -> str:
+        """
+        Executa a macro uma vez para cada linha de first a last, com o cursor no início
+        da linha. Linhas inseridas ou removidas pela macro deslocam as seguintes.
+        """
+        if self.recording:
+            return "Termine a gravação (Alt+M) antes de repetir a macro."
+        if not self.last or not editor.active_buffer:
+            return "Nenhuma macro gravada."
+        buf = editor.active_buffer
+        shift = 0
+        count = last - first + 1
+        with span("macro.replay"), editor.transaction():
+            for i, y in enumerate(range(first, last + 1)):
+                target = y + shift
+                if not 0 <= target < len(buf.lines):
+                    return f"Macro interrompida na linha {y + 1}: a linha não existe mais."
+                editor.clear_selection()
+                buf.cursor_y, buf.cursor_x = target, 0
+                before = len(buf.lines)
+                try:
+                    for step in self.last:
+                        perform(step)
+                except (IndexError, ValueError):
+                    return f"Macro interrompida na linha {y + 1} ({i} de {count} feitas)."
+                shift += len(buf.lines) - before
+        return f"Macro aplicada em {count} linhas."
+
+
+def parse_repeat_count(text: Optional[str]) -> Optional[int]:
+    """Resposta vazia -> 1, '250' -> 250; None se não for um número positivo."""
+    text = (text or "").strip()
+    if not text:
+        return 1
+    return int(text) if text.isdigit() and int(text) > 0 else None
+
+
+recorder = MacroRecorder()
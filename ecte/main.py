@@ -4,19 +4,34 @@ import os
 import argparse
 import locale
 import random
+from itertools import accumulate
 from pathlib import Path
 from ecte.editor import Editor
 from ecte.sidebar import Sidebar
 from ecte.console import Console
 from ecte.structbar import Structbar
-from ecte.key_handler import handle_key
+from ecte.key_handler import handle_key, keymap
+from ecte.macro import recorder as macro_recorder
+from ecte.run_watch import watcher as run_watcher
+from ecte.run_profile import run_profiler
 from ecte.help_window import HelpWindow
 from ecte.git_window import GitWindow
 from ecte.whats_new_window import WhatsNewWindow
 from ecte.config_window import ConfigWindow
+from ecte.diagnostics import DiagnosticsService
+from ecte.session import SessionManager
+from ecte.swap import SwapJournal
+from ecte.tab_memory import TabMemoryManager
+from ecte.utils import prompt_with_options
+from ecte.instrumentation import profiler, span
+from ecte.self_profile import self_profiler
+from ecte.latency import read_key, tracker as latency_tracker
+from ecte.longline import tokens_between, window_tokens
+from ecte.display import render
+from ecte.hexview import HexView, draw_hex_view
+from ecte.sniff import TEXT_FORMAT
 from pygments import lex
 from pygments.lexers import guess_lexer_for_filename, TextLexer
-from pygments.token import Token
 try:
     from pyfiglet import figlet_format
     FIGLET_AVAILABLE = True
@@ -58,7 +73,88 @@ ASCII_ART = [
     "                                      --    --::----::::--                      ..--                ",
     "                                                          ::::::::::  ----------------              ",
 ]
-def draw(stdscr, editor, sidebar, console, structbar, help_window, git_window, whats_new_window, config_window: ConfigWindow, status):
+def get_selection_spans(selection_coords, offset_y: int, editor_h: int) -> dict:
+    """Converte a seleção em intervalos de colunas (início, fim) por linha visível; fim None = até a borda."""
+    y1, x1, y2, x2 = selection_coords
+    spans = {}
+    for line_idx in range(max(y1, offset_y), min(y2, offset_y + editor_h - 1) + 1):
+        start = x1 if line_idx == y1 else 0
+        end = x2 if line_idx == y2 else None
+        spans[line_idx] = (start, end)
+    return spans
+
+def get_visible_rows(line_count: int, offset_y: int, offset_x: int, editor_h: int,
+                     wrap_index=None, first_part: int = 0) -> list:
+    """
+    (linha, coluna inicial, é a primeira parte da linha) para cada linha da tela. Com
+    wrap_index, cada linha ocupa as suas linhas visuais no índice, começando pela parte
+    first_part de offset_y; sem ele, uma linha por linha de tela a partir da coluna offset_x.
+    """
+    rows = []
+    y, part = offset_y, first_part
+    while len(rows) < editor_h:
+        if wrap_index is None or y >= line_count:
+            rows.append((y, offset_x, True))
+            y += 1
+            continue
+        starts = wrap_index.line_row_starts(y)
+        rows.append((y, wrap_index.row_column(y, part), part == 0))
+        part += 1
+        if part >= len(starts):
+            y, part = y + 1, 0
+    return rows
+
+def _addstr_clipped(stdscr, y: int, x: int, text: str, attr: int):
+    try:
+        stdscr.addstr(y, x, text, attr)
+    except (curses.error, ValueError):
+        pass
+
+def draw_tokens(stdscr, y: int, x_start: int, x_limit: int, tokens, theme, offset_x: int, span=None,
+                column: int = 0, position: int = 0):
+    """
+    Desenha uma linha com um addstr por token, dividindo o token apenas nas bordas da seleção.
+    Os tokens começam no caractere `position` da linha, que fica na coluna `column`; a tela
+    mostra as colunas a partir de offset_x (tabs e caracteres largos em display.render).
+    """
+    right = offset_x + x_limit - x_start
+    if span:
+        sel_start, sel_end = span
+        if sel_end is None: # Continua na próxima linha
+            sel_end = float("inf")
+    else:
+        sel_start = sel_end = 0
+
+    for ttype, tvalue in tokens:
+        if column >= right:
+            break
+        if '\n' in tvalue:
+            tvalue = tvalue.replace('\n', '')
+        if not tvalue:
+            continue
+        attr = theme.attr_for(ttype)
+        end = position + len(tvalue)
+
+        if sel_start >= end or sel_end <= position:
+            pieces = ((tvalue, attr),)
+        else:
+            a = max(sel_start, position) - position
+            b = min(sel_end, end) - position
+            pieces = ((tvalue[:a], attr), (tvalue[a:b], attr | curses.A_REVERSE), (tvalue[b:], attr))
+        for text, piece_attr in pieces:
+            if text:
+                shown, next_column = render(text, column, offset_x, right)
+                if shown:
+                    _addstr_clipped(stdscr, y, x_start + max(column, offset_x) - offset_x, shown, piece_attr)
+                column = next_column
+        position = end
+
+    # Seleções que continuam na próxima linha pintam o resto da linha
+    fill_x = x_start + max(0, column - offset_x)
+    if span and span[1] is None and fill_x < x_limit:
+        _addstr_clipped(stdscr, y, fill_x, " " * (x_limit - fill_x), curses.A_REVERSE)
+
+def draw(stdscr, editor, sidebar, console, structbar, help_window, git_window, whats_new_window, config_window: ConfigWindow, status, diagnostics: DiagnosticsService | None = None):
     stdscr.clear()
     h, w = stdscr.getmaxyx()
     
@@ -88,31 +184,57 @@ def draw(stdscr, editor, sidebar, console, structbar, help_window, git_window, w
         return
 
     show_line_numbers = config_window.get_setting("Exibir Números de Linha") == "Ativado"
-    line_number_width = len(str(len(active_buffer.lines))) + 2 if show_line_numbers else 0
+    line_count = active_buffer.line_count # Sem montar as linhas longas editadas (ver Buffer.line_slice)
+    line_number_width = len(str(line_count)) + 2 if show_line_numbers else 0
     editor_w = w - line_number_width - sidebar_w - structbar_w
     welcome_art = []
 
-    if active_buffer.cursor_y < active_buffer.offset_y:
-        active_buffer.offset_y = active_buffer.cursor_y
-    elif active_buffer.cursor_y >= active_buffer.offset_y + editor_h:
-        active_buffer.offset_y = active_buffer.cursor_y - editor_h + 1
-
-    if active_buffer.cursor_x < active_buffer.offset_x:
-        active_buffer.offset_x = active_buffer.cursor_x
-    elif active_buffer.cursor_x >= active_buffer.offset_x + editor_w:
-        active_buffer.offset_x = active_buffer.cursor_x - editor_w + 1
-
-
-
+    wrap_index = None
+    first_row_part = 0
+    if editor.soft_wrap and editor_w > 0:
+        # Rola por linhas visuais; o índice converte cursor <-> linha de tela sem percorrer o arquivo
+        wrap_index = editor.wrap_index_for(active_buffer, editor_w)
+        active_buffer.offset_x = 0
+        cursor_row, cursor_column = wrap_index.position_to_screen(active_buffer.cursor_y, active_buffer.cursor_x)
+        if cursor_row < active_buffer.offset_row:
+            active_buffer.offset_row = cursor_row
+        elif cursor_row >= active_buffer.offset_row + editor_h:
+            active_buffer.offset_row = cursor_row - editor_h + 1
+        active_buffer.offset_y, first_row_part = wrap_index.row_to_line(active_buffer.offset_row)
+        active_buffer.screen_cursor = (cursor_row - active_buffer.offset_row + tabs_bar_h,
+                                       cursor_column + line_number_width)
+    else:
+        if active_buffer.cursor_y < active_buffer.offset_y:
+            active_buffer.offset_y = active_buffer.cursor_y
+        elif active_buffer.cursor_y >= active_buffer.offset_y + editor_h:
+            active_buffer.offset_y = active_buffer.cursor_y - editor_h + 1
+
+        # offset_x é uma coluna de tela: tabs e caracteres largos ocupam mais de uma
+        cursor_column = active_buffer.column_of(active_buffer.cursor_y, active_buffer.cursor_x)
+        if cursor_column < active_buffer.offset_x:
+            active_buffer.offset_x = cursor_column
+        elif cursor_column >= active_buffer.offset_x + editor_w:
+            active_buffer.offset_x = cursor_column - editor_w + 1
+        active_buffer.screen_cursor = (active_buffer.cursor_y - active_buffer.offset_y + tabs_bar_h,
+                                       cursor_column - active_buffer.offset_x + line_number_width)
 
     try:
-        lexer = guess_lexer_for_filename(active_buffer.filepath.name, "") if active_buffer.filepath else TextLexer()
+        with span("lexer.guess"):
+            lexer = guess_lexer_for_filename(active_buffer.filepath.name, "") if active_buffer.filepath else TextLexer()
     except ClassNotFound:
         lexer = TextLexer()
 
     selection_coords = editor.get_selection_coords()
 
-    if not sidebar.current_path:
+    buffer_diagnostics = None
+    if diagnostics and config_window.get_setting("Destacar Linha com Erro") == "Ativado":
+        buffer_diagnostics = diagnostics.get(active_buffer)
+
+    hex_view = isinstance(active_buffer, HexView)
+    if hex_view:
+        active_buffer.screen_cursor = draw_hex_view(stdscr, active_buffer, tabs_bar_h, editor_h,
+                                                    w - sidebar_w - structbar_w)
+    elif not sidebar.current_path:
         welcome_art = ASCII_ART
         if FIGLET_AVAILABLE:
             try:
@@ -154,68 +276,58 @@ def draw(stdscr, editor, sidebar, console, structbar, help_window, git_window, w
                         color = curses.color_pair(color_index)
                         stdscr.addstr(draw_y, start_x, line[:editor_w - start_x], color)
     else:
+        visible_rows = get_visible_rows(line_count, active_buffer.offset_y, active_buffer.offset_x,
+                                        editor_h, wrap_index, first_row_part)
         if show_line_numbers:
-            for i in range(editor_h):
-                line_idx = active_buffer.offset_y + i
-                if line_idx < len(active_buffer.lines):
+            marked_lines = buffer_diagnostics.by_line if buffer_diagnostics else {}
+            for i, (line_idx, _, first_part) in enumerate(visible_rows):
+                if line_idx < line_count:
+                    if not first_part: # Continuação de uma linha quebrada
+                        stdscr.addstr(i + tabs_bar_h, 0, " " * (line_number_width - 2) + " │", curses.A_DIM)
+                        continue
                     line_num_str = str(line_idx + 1).rjust(line_number_width - 2) + " │"
-                    
-                    has_error = "erro" in active_buffer.lines[line_idx].lower() and config_window.get_setting("Destacar Linha com Erro") == "Ativado"
-                    color = curses.color_pair(18) if has_error else curses.A_DIM
-                    
+
+                    diagnostic = marked_lines.get(line_idx)
+                    if diagnostic:
+                        color = curses.color_pair(18 if diagnostic.severity == "error" else 15)
+                    else:
+                        color = curses.A_DIM
+
                     stdscr.addstr(i + tabs_bar_h, 0, line_num_str, color)
 
-        for i in range(editor_h):
-            line_idx = active_buffer.offset_y + i
-            if line_idx < len(active_buffer.lines):
-                line = active_buffer.lines[line_idx]
-                visible_line = line[active_buffer.offset_x : active_buffer.offset_x + editor_w]
-
-                tokens = lex(visible_line, lexer)
-                
-                if selection_coords:
-                    y1, x1, y2, x2 = selection_coords
-                    if y1 <= line_idx <= y2:
-                        start = x1 if line_idx == y1 else 0
-                        end = x2 if line_idx == y2 else editor_w
-                        for x_pos in range(start, end):
-                            if line_number_width + x_pos - active_buffer.offset_x < w:
-                                stdscr.addch(i + tabs_bar_h, line_number_width + x_pos, ' ', curses.A_REVERSE)
-                x = line_number_width
-                for ttype, tvalue in tokens:
-                    color_pair = curses.color_pair(0)
-                    if ttype in Token.Keyword:
-                        color_pair = curses.color_pair(1)
-                    elif ttype in Token.Literal.String:
-                        color_pair = curses.color_pair(2)
-                    elif ttype in Token.Comment:
-                        color_pair = curses.color_pair(3)
-                    elif ttype in Token.Literal.Number:
-                        color_pair = curses.color_pair(4)
-                    elif ttype in Token.Operator or ttype in Token.Punctuation:
-                        color_pair = curses.color_pair(5)
-                    elif ttype in Token.Name.Function or ttype in Token.Name.Class:
-                        color_pair = curses.color_pair(6)
-                    elif ttype in Token.Name.Variable:
-                        color_pair = curses.color_pair(8)
-                    elif ttype in Token.Name.Decorator:
-                        color_pair = curses.color_pair(9)
-                    elif ttype in Token.Name.Constant:
-                        color_pair = curses.color_pair(10)
-                    
-                    for char in tvalue:
-                        if x < w - sidebar_w - structbar_w:
-                            is_selected = False
-                            if selection_coords and not console.visible and editor.active_buffer.selecting:
-                                real_x = x - line_number_width + active_buffer.offset_x
-                                y1, x1, y2, x2 = selection_coords
-                                if (y1 < line_idx < y2) or \
-                                   (line_idx == y1 and line_idx == y2 and x1 <= real_x < x2) or \
-                                   (line_idx == y1 and line_idx != y2 and real_x >= x1) or \
-                                   (line_idx == y2 and line_idx != y1 and real_x < x2):
-                                    is_selected = True
-                            stdscr.addch(i + tabs_bar_h, x, char, color_pair | (curses.A_REVERSE if is_selected else 0))
-                            x += 1
+        text_right = w - sidebar_w - structbar_w
+        selection_spans = {}
+        if selection_coords and not console.visible:
+            selection_spans = get_selection_spans(selection_coords, active_buffer.offset_y, editor_h)
+
+        theme = editor.theme
+        row_ranges = []
+        long_windows = {} # Linha longa -> intervalo visível somando todas as suas linhas visuais
+        for line_idx, start_column, _ in visible_rows:
+            row_ranges.append(None)
+            if line_idx < line_count:
+                columns = active_buffer.column_map(line_idx)
+                first = columns.index(start_column) # Caracteres que aparecem nas colunas da tela
+                last = min(columns.length, columns.index(start_column + editor_w - 1) + 1)
+                row_ranges[-1] = (columns, first, last)
+                if active_buffer.long_line(line_idx) is not None:
+                    window = long_windows.get(line_idx, (first, last))
+                    long_windows[line_idx] = (min(window[0], first), max(window[1], last))
+        for line_idx, (window_first, window_last) in long_windows.items():
+            with span("lex"): # Uma janela por linha longa, retomando o lexer de um ponto salvo
+                tokens = window_tokens(active_buffer.long_line(line_idx), lexer, window_first, window_last)
+                long_windows[line_idx] = (tokens, list(accumulate((len(value) for _, value in tokens[:-1]),
+                                                                  initial=window_first)))
+        for i, (line_idx, start_column, _) in enumerate(visible_rows):
+            if line_idx < line_count:
+                columns, first, last = row_ranges[i]
+                with span("lex"):
+                    if line_idx in long_windows:
+                        tokens = tokens_between(*long_windows[line_idx], first, last)
+                    else:
+                        tokens = list(lex(active_buffer.line_slice(line_idx, first, last), lexer))
+                draw_tokens(stdscr, i + tabs_bar_h, line_number_width, text_right, tokens, theme,
+                            start_column, selection_spans.get(line_idx), columns.column(first), first)
             else:
                 if config_window.get_setting("Indicador de Linha Vazia (~)") == "Ativado":
                     draw_x = line_number_width
@@ -265,25 +377,39 @@ def draw(stdscr, editor, sidebar, console, structbar, help_window, git_window, w
             stdscr.addstr(h - 2, w - 2, "↓", sidebar_bg_color | curses.A_DIM)
 
     if structbar.visible:
-        file_ext = active_buffer.filepath.suffix if active_buffer.filepath else ""
-        structbar.parse_code(active_buffer.lines, file_ext)
+        structbar.parse_buffer(active_buffer)
         structbar.draw(stdscr, editor_w, editor_h, tabs_bar_h)
 
     dirty_indicator = " ●" if active_buffer.dirty else ""
     name = active_buffer.filepath.name if active_buffer.filepath else "[Novo]"
     
-    left_status = f" {name}{dirty_indicator} | Ln {active_buffer.cursor_y+1}, Col {active_buffer.cursor_x+1} "
+    if hex_view:
+        left_status = f" {name} | 0x{active_buffer.position:x} ({active_buffer.position} de {active_buffer.size} bytes) "
+    else:
+        left_status = f" {name}{dirty_indicator} | Ln {active_buffer.cursor_y+1}, Col {active_buffer.column_of(active_buffer.cursor_y, active_buffer.cursor_x)+1} "
+    if macro_recorder.recording:
+        left_status += "| ● macro "
+    if run_watcher.active:
+        left_status += f"| ⟳ {run_watcher.target.name} "
     if status:
         left_status += f" | {status}"
+    if buffer_diagnostics and buffer_diagnostics.diagnostics:
+        current = buffer_diagnostics.by_line.get(active_buffer.cursor_y)
+        if current:
+            left_status += f" | ✖ {current.message}"
+        else:
+            left_status += f" | ✖ {len(buffer_diagnostics.diagnostics)} problema(s)"
     left_status += " | Ajuda: F1"
 
-    lang_name = lexer.name if lexer.name != "Text only" else "Texto"
+    lang_name = "Hexadecimal" if hex_view else lexer.name if lexer.name != "Text only" else "Texto"
     file_type_key = f"file_{active_buffer.filepath.suffix[1:]}" if active_buffer.filepath and active_buffer.filepath.suffix else 'file'
     lang_icon = sidebar.ICONS.get(file_type_key, sidebar.ICONS['file'])
     
     git_indicator = "|  Alt+G " if (sidebar.current_path and (sidebar.current_path / ".git").is_dir()) else ""
 
-    right_status = f" {lang_icon} {lang_name} {git_indicator}"
+    show_format = active_buffer.file_format != TEXT_FORMAT and not hex_view # Só o que foge de UTF-8/LF
+    encoding_indicator = f"{active_buffer.file_format.label} " if show_format else ""
+    right_status = f" {encoding_indicator}{lang_icon} {lang_name} {git_indicator}"
 
     total_len = len(left_status) + len(right_status) + 1
     spacing = " " * (w - total_len - 1) if w > total_len else " "
@@ -335,6 +461,8 @@ def draw(stdscr, editor, sidebar, console, structbar, help_window, git_window, w
     if config_window.visible:
         config_window.draw(stdscr)
 
+    run_profiler.draw(stdscr)
+    profiler.draw_hud(stdscr)
     curses.doupdate()
 
 def apply_theme(bg_color: int):
@@ -367,7 +495,7 @@ def apply_theme(bg_color: int):
     curses.init_pair(20, curses.COLOR_RED, bg_color)
     curses.init_pair(21, 88, bg_color)
 
-def main(stdscr, initial_filepath=None):
+def main(stdscr, initial_filepath=None, trace_path=None, record_path=None, profile_path=None):
     curses.curs_set(1)
     stdscr.keypad(True)
     curses.raw() 
@@ -409,31 +537,85 @@ def main(stdscr, initial_filepath=None):
     git_window = GitWindow(stdscr, sidebar.current_path)
     whats_new_window = WhatsNewWindow()
     config_window = ConfigWindow(editor)
+    editor.set_soft_wrap(config_window.get_setting("Quebra de Linha Suave") == "Ativado")
+    diagnostics = DiagnosticsService()
+    swap_journal = None
+    if config_window.get_setting("Diário de Recuperação (Swap)") == "Ativado":
+        swap_journal = SwapJournal()
+        swap_journal.start()
+        editor.enable_swap(swap_journal)
+    tab_memory = TabMemoryManager()
+    session = SessionManager()
+    session_enabled = config_window.get_setting("Restaurar Sessão") == "Ativado"
     status = "TASMACODE | Ctrl+S salvar | Ctrl+Q sair"
+    keymap_errors = keymap.load()
+    if keymap_errors:
+        status = f"Atalhos: {keymap_errors[0]}" + (f" (+{len(keymap_errors) - 1})" if len(keymap_errors) > 1 else "")
+    if trace_path:
+        status = profiler.start_trace(trace_path)
+    if profile_path:
+        status = self_profiler.start(profile_path)
+
+    restored_tabs = session.restore(editor, sidebar, console) if session_enabled else 0
+    if restored_tabs:
+        status = f"Sessão restaurada ({restored_tabs} abas)"
 
     if initial_filepath and initial_filepath.is_file():
-        editor.open_file(initial_filepath)
+        error = editor.open_file(initial_filepath)
+        if error:
+            status = error
+            if not editor.tabs:
+                editor.new_file()
         sidebar.set_project_path(initial_filepath.parent)
         console.set_cwd(initial_filepath.parent)
-    else:
+    elif not restored_tabs:
         editor.new_file()
 
+    def describe_session() -> dict:
+        h, w = stdscr.getmaxyx()
+        return {
+            "size": [h, w],
+            "tabs": [str(buf.filepath) for buf in editor.tabs if buf.filepath],
+            "active": str(editor.active_buffer.filepath) if editor.active_buffer and editor.active_buffer.filepath else None,
+            "project": str(sidebar.current_path) if sidebar.current_path else None,
+            "keymap": keymap.overrides(),
+        }
+    latency_tracker.describe_session = describe_session
+    if record_path:
+        status = latency_tracker.start_recording(record_path)
+
     while True:
-        draw(stdscr, editor, sidebar, console, structbar, help_window, git_window, whats_new_window, config_window, status)
+        if config_window.get_setting("Destacar Linha com Erro") == "Ativado":
+            with span("diagnostics"):
+                diagnostics.update(editor.active_buffer)
+        with span("draw"):
+            draw(stdscr, editor, sidebar, console, structbar, help_window, git_window, whats_new_window, config_window, status, diagnostics)
+        latency_tracker.painted()
+
+        if editor.pending_recoveries:
+            recovered_buffer = editor.pending_recoveries.pop(0)
+            choice = prompt_with_options(
+                stdscr,
+                f"Há alterações não salvas de '{recovered_buffer.filepath.name}' de uma sessão anterior.",
+                ["Recuperar", "Descartar", "Ignorar"],
+            )
+            if choice == "Recuperar":
+                status = editor.recover_buffer(recovered_buffer)
+            elif choice == "Descartar":
+                editor.discard_recovery(recovered_buffer)
+                status = "Diário de recuperação descartado."
+            continue
         
         stdscr.timeout(100) # Timeout de 100ms
 
         try:
             active_buffer = editor.active_buffer
             if active_buffer and not structbar.visible: # Não move o cursor se as barras estiverem visíveis
-                show_line_numbers = config_window.get_setting("Exibir Números de Linha") == "Ativado"
-                line_number_width = len(str(len(active_buffer.lines))) + 2 if show_line_numbers else 0
-                
-                stdscr.move(active_buffer.cursor_y - active_buffer.offset_y + 2, active_buffer.cursor_x - active_buffer.offset_x + line_number_width)
+                stdscr.move(*active_buffer.screen_cursor) # Calculada pelo draw, com ou sem quebra de linha
         except (curses.error, AttributeError):
             pass
 
-        key = stdscr.getch() # Retorna -1 se o timeout for atingido
+        key = read_key(stdscr, record_timeouts=False) # Retorna -1 se o timeout for atingido
 
         if sidebar.cloning_thread and not sidebar.cloning_thread.is_alive():
             sidebar.cloning_thread.join()
@@ -446,20 +628,55 @@ def main(stdscr, initial_filepath=None):
             status = status_msg
         else:
             if key != -1:
-                result = handle_key(key, stdscr, editor, sidebar, console, structbar, help_window, git_window, whats_new_window, config_window)
+                latency_tracker.key_read(key)
+                profiler.key_pressed()
+                with span("handle_key"):
+                    result = handle_key(key, stdscr, editor, sidebar, console, structbar, help_window, git_window, whats_new_window, config_window)
                 if result == "exit" and not (sidebar.cloning_thread and sidebar.cloning_thread.is_alive()):
                     break
                 if result:
                     status = result
 
+        with span("run_watch"):
+            status = run_watcher.poll(console, editor.registry.paths()) or status
+
+        budget_setting = config_window.get_setting("Orçamento de Memória das Abas")
+        tab_memory.set_budget_mb(int(budget_setting.split()[0]))
+        with span("tab_memory"):
+            tab_memory.update(editor)
+
+        if session_enabled:
+            with span("session"):
+                session.maybe_autosave(editor, sidebar, console)
+        profiler.end_frame()
+
+    if session_enabled:
+        session.save(editor, sidebar, console)
+    console.cancel_run()
+    diagnostics.shutdown()
+    if swap_journal:
+        swap_journal.stop()
+    profiler.stop_trace()
+    self_profiler.stop()
+    latency_tracker.stop_recording()
     stdscr.addstr("\x1b[?2004l")
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="TasmaCode Text Editor")
     parser.add_argument("filepath", nargs="?", type=Path, help="Path to the file to open")
+    parser.add_argument("--trace", type=Path, metavar="FILE", help="Write a Chrome trace (.json or .jsonl) of frame timings")
+    parser.add_argument("--profile", type=Path, metavar="FILE", help="Profile the editor itself: cProfile stats (.prof) or sampled collapsed stacks (other suffixes)")
+    parser.add_argument("--record", type=Path, metavar="FILE", help="Record keystrokes for replay (python -m ecte.bench --replay FILE)")
     args = parser.parse_args()
+    # Antes do chdir abaixo
+    if args.trace:
+        args.trace = args.trace.resolve()
+    if args.record:
+        args.record = args.record.resolve()
+    if args.profile:
+        args.profile = args.profile.resolve()
 
     os.chdir(Path(__file__).parent.parent)
     locale.setlocale(locale.LC_ALL, "")
-    curses.wrapper(main, initial_filepath=args.filepath)
\ No newline at end of file
+    curses.wrapper(main, initial_filepath=args.filepath, trace_path=args.trace, record_path=args.record, profile_path=args.profile)
\ No newline at end of file
@@ -0,0 +1,231 @@
+import collections
+import curses
+import os
+import pstats
+import tempfile
+import time
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+from ecte.execution_handler import RunUsage, get_profiled_execution
+
+HOTSPOT_LIMIT = 200 # Funções guardadas por execução
+HISTORY_SIZE = 20
+SORT_KEYS = (("cumtime", "acumulado"), ("tottime", "próprio"), ("calls", "chamadas")) # Campo, cabeçalho
+
+
+class Hotspot(NamedTuple):
+    filename: str
+    line: int
+    function: str
+    calls: int
+    tottime: float
+    cumtime: float
+
+    @property
+    def location(self) -> str:
+        if self.filename == "~": # Funções embutidas não têm arquivo
+            return self.function
+        return f"{self.function}  {Path(self.filename).name}:{self.line}"
+
+
+class ProfiledRun(NamedTuple):
+    path: Path
+    number: int
+    returncode: int
+    usage: RunUsage
+    hotspots: List[Hotspot]
+    finished: float # time.time()
+
+
+def load_hotspots(profile_path: Path, limit: int = HOTSPOT_LIMIT) -> List[Hotspot]:
+    """As `limit` funções de maior tempo acumulado de um arquivo do cProfile."""
+    try:
+        stats = pstats.Stats(str(profile_path)).stats
+    except (OSError, EOFError, TypeError, ValueError):
+        return []
+    hotspots = [Hotspot(filename, line, function, calls, tottime, cumtime)
+                for (filename, line, function), (_, calls, tottime, cumtime, _) in stats.items()]
+    hotspots.sort(key=lambda spot: spot.cumtime, reverse=True)
+    return hotspots[:limit]
+
+
+def _seconds(value: Optional[float]) -> str:
+    return "—" if value is None else f"{value:.2f} s"
+
+
+def _megabytes(value: Optional[int]) -> str:
+    return "—" if value is None else f"{value / (1024 * 1024):.1f} MB"
+
+
+def _rss(usage: RunUsage) -> str:
+    if usage.max_rss is not None and usage.rss_floor and usage.max_rss <= usage.rss_floor:
+        return f"≤ {_megabytes(usage.max_rss)}" # Não passou do pico herdado do editor
+    return _megabytes(usage.max_rss)
+
+
+def _delta(current, previous, unit: str) -> str:
+    if current is None or previous is None:
+        return "—"
+    difference = current - previous
+    if unit == "MB":
+        text = f"{difference / (1024 * 1024):+.1f} MB"
+    else:
+        text = f"{difference:+.2f} s"
+    if previous:
+        text += f" ({difference / previous:+.0%})"
+    return text
+
+
+class RunProfiler:
+    """
+    Execução com perfil (Alt+E): para todas as linguagens, tempo de parede, CPU de usuário e
+    de sistema e RSS máximo do processo filho (os.wait4); para .py, também os hotspots do
+    cProfile, num painel ordenável em que Enter abre a função no editor. As últimas execuções
+    ficam guardadas para comparar uma com a anterior do mesmo arquivo (F6 reabre o painel).
+    """
+
+    def __init__(self):
+        self.history = collections.deque(maxlen=HISTORY_SIZE)
+        self.visible = False
+        self.selected = 0
+        self.scroll_offset = 0
+        self.sort_index = 0
+        self._runs = 0
+        self._profile_path: Optional[Path] = None # Da execução em andamento; uma cancelada não o apaga
+
+    @property
+    def current(self) -> Optional[ProfiledRun]:
+        return self.history[-1] if self.history else None
+
+    def previous(self, run: ProfiledRun) -> Optional[ProfiledRun]:
+        """Execução anterior do mesmo arquivo, para comparar."""
+        for other in reversed(self.history):
+            if other.path == run.path and other.number < run.number:
+                return other
+        return None
+
+    def start(self, filepath: Path, console) -> str:
+        if self._profile_path:
+            self._profile_path.unlink(missing_ok=True)
+        fd, profile_name = tempfile.mkstemp(prefix="ecte-", suffix=".prof")
+        os.close(fd)
+        profile_path = self._profile_path = Path(profile_name)
+        command, build = get_profiled_execution(filepath, profile_path)
+        if not command:
+            profile_path.unlink(missing_ok=True)
+            return f"Não há um comando de execução definido para arquivos '{filepath.suffix}'."
+
+        def finished(returncode: int, usage: RunUsage):
+            hotspots = load_hotspots(profile_path) # Vazio fora do Python (o arquivo nem é escrito)
+            profile_path.unlink(missing_ok=True)
+            self._profile_path = None
+            self._runs += 1
+            self.history.append(ProfiledRun(filepath, self._runs, returncode, usage, hotspots, time.time()))
+            self.selected = self.scroll_offset = 0
+            self.visible = True
+            console.output.extend(self.summary_lines(self.history[-1]))
+
+        console.cancel_run()
+        console.run_command(command, build, label=filepath.name, on_exit=finished)
+        console.visible = True
+        return f"Executando {filepath.name} com perfil..."
+
+    def summary_lines(self, run: ProfiledRun) -> List[str]:
+        usage = run.usage
+        lines = [f"[perfil] parede {_seconds(usage.wall)} | usuário {_seconds(usage.user)} | "
+                 f"sistema {_seconds(usage.system)} | RSS máx. {_rss(usage)}"]
+        previous = self.previous(run)
+        if previous:
+            lines.append(f"[perfil] vs. #{previous.number}: parede {_delta(usage.wall, previous.usage.wall, 's')} | "
+                         f"usuário {_delta(usage.user, previous.usage.user, 's')} | "
+                         f"RSS máx. {_delta(usage.max_rss, previous.usage.max_rss, 'MB')}")
+        return lines
+
+    def sorted_hotspots(self) -> List[Hotspot]:
+        run = self.current
+        if not run:
+            return []
+        key = SORT_KEYS[self.sort_index][0]
+        return sorted(run.hotspots, key=lambda spot: getattr(spot, key), reverse=True)
+
+    # --- Painel ---
+
+    def toggle(self) -> str:
+        if not self.history:
+            return "Nenhuma execução com perfil ainda (Alt+E)."
+        self.visible = not self.visible
+        return "Perfil: " + ("visível" if self.visible else "oculto")
+
+    def cycle_sort(self) -> str:
+        self.sort_index = (self.sort_index + 1) % len(SORT_KEYS)
+        self.selected = self.scroll_offset = 0
+        return f"Perfil ordenado por: {SORT_KEYS[self.sort_index][1]}"
+
+    def move(self, delta: int):
+        count = len(self.current.hotspots) if self.current else 0
+        self.selected = max(0, min(count - 1, self.selected + delta))
+
+    def jump(self, editor) -> Optional[str]:
+        """Abre no editor a função selecionada."""
+        spots = self.sorted_hotspots()
+        if not spots:
+            return None
+        spot = spots[self.selected]
+        path = Path(spot.filename)
+        if spot.filename == "~" or not path.is_file():
+            return f"{spot.function} não tem código-fonte."
+        error = editor.open_file(path)
+        if error:
+            return error
+        buf = editor.active_buffer
+        buf.cursor_y = max(0, min(spot.line - 1, buf.line_count - 1))
+        buf.cursor_x = 0
+        self.visible = False
+        return f"{spot.function} ({path.name}:{spot.line})"
+
+    def draw(self, stdscr):
+        if not self.visible or not self.current:
+            return
+        run = self.current
+        h, w = stdscr.getmaxyx()
+        win_h, win_w = max(8, min(h - 4, 30)), max(40, min(w - 4, 110))
+        win = curses.newwin(win_h, win_w, (h - win_h) // 2, (w - win_w) // 2)
+        win.bkgd(' ', curses.color_pair(7))
+        win.box()
+
+        def put(y, text, attr=0):
+            try:
+                win.addstr(y, 2, text[:win_w - 4], attr)
+            except curses.error:
+                pass
+
+        title = f" Perfil #{run.number}: {run.path.name} (código {run.returncode}) "
+        win.addstr(0, max(1, (win_w - len(title)) // 2), title[:win_w - 2], curses.A_BOLD)
+        summary = self.summary_lines(run)
+        for i, line in enumerate(summary):
+            put(1 + i, line.replace("[perfil] ", ""), curses.A_DIM if i else 0)
+        top = 1 + len(summary)
+        put(win_h - 1, " ↑↓ navegar | Enter abrir | S ordenar | ESC fechar ", curses.A_DIM)
+
+        spots = self.sorted_hotspots()
+        if not spots:
+            put(top + 1, "Sem hotspots: o perfil por função só existe para arquivos .py.", curses.A_DIM)
+            win.noutrefresh()
+            return
+        sort_key = SORT_KEYS[self.sort_index][0]
+        headers = dict(SORT_KEYS)
+        header = "".join(f"{headers[key]}{'▼' if key == sort_key else ' '}".rjust(12) for key in ("calls", "tottime", "cumtime"))
+        put(top, header + "  função", curses.A_BOLD)
+        rows = win_h - top - 2
+        if self.selected < self.scroll_offset:
+            self.scroll_offset = self.selected
+        elif self.selected >= self.scroll_offset + rows:
+            self.scroll_offset = self.selected - rows + 1
+        for i, spot in enumerate(spots[self.scroll_offset:self.scroll_offset + rows]):
+            line = f"{spot.calls:>11} {spot.tottime:>11.3f} {spot.cumtime:>11.3f}   {spot.location}"
+            put(top + 1 + i, line.ljust(win_w - 4), curses.A_REVERSE if self.scroll_offset + i == self.selected else 0)
+        win.noutrefresh()
+
+
+run_profiler = RunProfiler()
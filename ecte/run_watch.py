@@ -0,0 +1,103 @@
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from ecte.execution_handler import get_execution
+
+WATCH_DEBOUNCE = 0.3 # Segundos sem mudanças antes de rodar: uma rajada de saves vira uma execução
+WATCH_POLL_INTERVAL = 0.25 # Intervalo mínimo entre duas verificações do disco
+
+
+def _stamp(path: Path):
+    try:
+        st = path.stat()
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
+class RunWatcher:
+    """
+    Modo "observar e rodar" (Alt+W): roda de novo o arquivo alvo do Ctrl+E quando ele, ou
+    outra aba aberta da mesma pasta, é salvo ou muda no disco. As mudanças esperam
+    WATCH_DEBOUNCE segundos de calma e a execução anterior, se ainda estiver rodando, é
+    cancelada. O loop principal chama poll() a cada volta (no máximo a cada 100 ms).
+    """
+
+    def __init__(self):
+        self.target: Optional[Path] = None
+        self.runs = 0
+        self._stamps: Dict[Path, tuple] = {}
+        self._deadline: Optional[float] = None
+        self._last_poll = 0.0
+
+    @property
+    def active(self) -> bool:
+        return self.target is not None
+
+    def start(self, target: Path, console, open_paths: Iterable[Path]) -> str:
+        command, _ = get_execution(target)
+        if not command:
+            return f"Não há um comando de execução definido para arquivos '{target.suffix}'."
+        self.target = target
+        self.runs = 0
+        self._stamps = {path: _stamp(path) for path in self._watched(open_paths)}
+        self._deadline = time.monotonic() # Roda já uma vez
+        console.visible = True
+        return f"Observando {target.name}: salvar roda de novo (Alt+W para parar)"
+
+    def stop(self, console) -> str:
+        name = self.target.name if self.target else ""
+        self.target = None
+        self._deadline = None
+        self._stamps = {}
+        console.cancel_run()
+        return f"Parou de observar {name}"
+
+    def notify_saved(self, path: Path):
+        """Save pelo editor: não espera a próxima verificação do disco."""
+        if self.target is not None and self._is_watched(Path(path)):
+            self._stamps[Path(path)] = _stamp(Path(path))
+            self._deadline = time.monotonic() + WATCH_DEBOUNCE
+
+    def poll(self, console, open_paths: Iterable[Path]) -> Optional[str]:
+        """Verifica mudanças e, passado o debounce, roda. Devolve a mensagem de status quando roda."""
+        if self.target is None:
+            return None
+        now = time.monotonic()
+        if now - self._last_poll >= WATCH_POLL_INTERVAL:
+            self._last_poll = now
+            watched = self._watched(open_paths)
+            for path in watched:
+                stamp = _stamp(path)
+                if self._stamps.get(path, stamp) != stamp:
+                    self._deadline = now + WATCH_DEBOUNCE # Cada mudança adia: a rajada termina antes
+                self._stamps[path] = stamp
+            for path in set(self._stamps) - set(watched): # Abas fechadas
+                del self._stamps[path]
+        if self._deadline is None or now < self._deadline:
+            return None
+        self._deadline = None
+        return self._run(console)
+
+    def _run(self, console) -> str:
+        command, build = get_execution(self.target)
+        if not command:
+            return f"{self.target.name} não pode mais ser executado."
+        cancelled = console.cancel_run()
+        self.runs += 1
+        console.output.append("---")
+        console.output.append(f"[watch] {self.target.name}: execução {self.runs}" +
+                              (" (a anterior foi cancelada)" if cancelled else ""))
+        console.output_scroll_offset = 0
+        console.run_command(command, build, label=self.target.name)
+        return f"Executando {self.target.name} (watch #{self.runs})..."
+
+    def _is_watched(self, path: Path) -> bool:
+        return path == self.target or self.target.parent in path.parents
+
+    def _watched(self, open_paths: Iterable[Path]) -> list:
+        return [self.target] + [path for path in open_paths if path != self.target and self._is_watched(path)]
+
+
+watcher = RunWatcher()
@@ -0,0 +1,123 @@
+import collections
+import cProfile
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+SAMPLE_INTERVAL = 0.005 # Segundos entre amostras do perfil por amostragem
+PSTATS_SUFFIXES = (".prof", ".pstats")
+MODES = ("cprofile", "sample")
+
+
+class SamplingProfiler:
+    """
+    Perfil por amostragem do próprio editor: uma thread olha a pilha de todas as outras
+    (sys._current_frames) a cada SAMPLE_INTERVAL e conta as pilhas iguais. O custo é o de
+    uma amostra, não o de cada chamada, então dá para deixar ligado enquanto se reproduz um
+    travamento. Gera o formato "collapsed stacks" do flamegraph.pl / speedscope / inferno.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self._labels: Dict[object, str] = {} # código -> "função (arquivo.py:linha)"
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="ecte-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            name = getattr(code, "co_qualname", code.co_name)
+            label = self._labels[code] = f"{name} ({Path(code.co_filename).name}:{code.co_firstlineno})".replace(";", ",")
+        return label
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}")) # Raiz: a thread (MainThread, console...)
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def dump(self, path: Path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class SelfProfiler:
+    """
+    Perfil do próprio editor, ligado por --profile ARQUIVO ou pelo comando 'profile' do
+    console. cProfile (arquivos .prof/.pstats) mede cada chamada da thread principal, onde
+    rodam draw e handle_key; a amostragem (os demais) cobre todas as threads com custo
+    quase nulo.
+    """
+
+    def __init__(self):
+        self.path: Optional[Path] = None
+        self.mode: Optional[str] = None
+        self._cprofile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[SamplingProfiler] = None
+
+    @property
+    def active(self) -> bool:
+        return self.path is not None
+
+    def start(self, path: Path, mode: Optional[str] = None) -> str:
+        self.stop()
+        path = Path(path)
+        mode = mode or ("cprofile" if path.suffix.lower() in PSTATS_SUFFIXES else "sample")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.touch()
+        except OSError as e:
+            return f"Não foi possível criar o perfil: {e}"
+        if mode == "cprofile":
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError as e: # Outro profiler já ativo (sys.setprofile / sys.monitoring)
+                return f"Não foi possível iniciar o cProfile: {e}"
+            self._cprofile = profile
+        else:
+            self._sampler = SamplingProfiler()
+            self._sampler.start()
+        self.path, self.mode = path, mode
+        return f"Perfil do editor ({'cProfile' if mode == 'cprofile' else 'amostragem'}) gravando em {path}"
+
+    def stop(self) -> Optional[str]:
+        if not self.active:
+            return None
+        path, self.path = self.path, None
+        try:
+            if self._cprofile:
+                self._cprofile.disable()
+                self._cprofile.dump_stats(str(path))
+                return f"Perfil salvo em {path} (python -m pstats {path.name})"
+            self._sampler.stop()
+            self._sampler.dump(path)
+            return f"Perfil salvo em {path} ({self._sampler.samples} amostras, pilhas colapsadas)"
+        except OSError as e:
+            return f"Não foi possível salvar o perfil: {e}"
+        finally:
+            self._cprofile = self._sampler = None
+            self.mode = None
+
+
+self_profiler = SelfProfiler()
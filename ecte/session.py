@@ -0,0 +1,177 @@
+import hashlib
+import marshal
+import os
+import time
+import zlib
+from pathlib import Path
+from typing import Optional
+
+from ecte.editor import Buffer
+from ecte.hexview import HexView
+
+SESSION_FILE = Path.home() / ".config" / "ecte" / "session.bin"
+SESSION_MAGIC = b"TSES"
+SESSION_FORMAT = 1
+AUTOSAVE_INTERVAL = 30 # Segundos entre snapshots periódicos
+
+
+def hash_file(path: Path) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.digest()
+
+
+class SessionManager:
+    """
+    Salva e restaura abas, cursores, rolagem e caches em um snapshot binário compacto
+    (marshal + zlib). Na restauração só a aba ativa é lida do disco; as demais são
+    carregadas quando forem usadas.
+    """
+
+    def __init__(self, path: Path = SESSION_FILE):
+        self.path = path
+        self._last_save = time.monotonic()
+        self._hash_cache = {} # caminho -> (mtime_ns, tamanho, hash)
+
+    def _fingerprint(self, path: Path):
+        st = path.stat()
+        key = str(path)
+        cached = self._hash_cache.get(key)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached
+        entry = (st.st_mtime_ns, st.st_size, hash_file(path))
+        self._hash_cache[key] = entry
+        return entry
+
+    def snapshot(self, editor, sidebar, console) -> dict:
+        tabs = []
+        active = 0
+        for i, buf in enumerate(editor.tabs):
+            if not buf.filepath or not buf.filepath.is_file():
+                continue
+            hex_view = isinstance(buf, HexView)
+            try:
+                if hex_view: # O hash só valida o outline; binários de vários GB não são lidos inteiros
+                    st = buf.filepath.stat()
+                    mtime_ns, size, digest = st.st_mtime_ns, st.st_size, b""
+                else:
+                    mtime_ns, size, digest = self._fingerprint(buf.filepath)
+            except OSError:
+                continue
+            if i == editor.active_tab_index:
+                active = len(tabs)
+
+            outline = None
+            if buf.loaded and not buf.dirty and buf.outline_cache and buf.outline_cache[0] == buf.version:
+                outline = [tuple(item) for item in buf.outline_cache[1]]
+
+            tabs.append({
+                "path": str(buf.filepath),
+                "mtime_ns": mtime_ns,
+                "size": size,
+                "hash": digest,
+                "cursor": (buf.cursor_y, buf.cursor_x),
+                "offset": (buf.offset_y, buf.offset_x),
+                "outline": outline,
+                "hex": (buf.position, buf.top) if hex_view else None,
+            })
+
+        return {
+            "tabs": tabs,
+            "active": active,
+            "sidebar_path": str(sidebar.current_path) if sidebar.current_path and sidebar.mode == "project" else None,
+            "console_cwd": str(console.cwd),
+        }
+
+    def save(self, editor, sidebar, console) -> bool:
+        data = self.snapshot(editor, sidebar, console)
+        payload = SESSION_MAGIC + bytes([SESSION_FORMAT]) + zlib.compress(marshal.dumps(data), 6)
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_bytes(payload)
+            os.replace(tmp_path, self.path) # Troca atômica: nunca deixa um snapshot pela metade
+        except OSError:
+            return False
+        self._last_save = time.monotonic()
+        return True
+
+    def maybe_autosave(self, editor, sidebar, console):
+        if time.monotonic() - self._last_save >= AUTOSAVE_INTERVAL:
+            self.save(editor, sidebar, console)
+
+    def load(self) -> Optional[dict]:
+        try:
+            payload = self.path.read_bytes()
+        except OSError:
+            return None
+        if not payload.startswith(SESSION_MAGIC) or payload[len(SESSION_MAGIC)] != SESSION_FORMAT:
+            return None
+        try:
+            data = marshal.loads(zlib.decompress(payload[len(SESSION_MAGIC) + 1:]))
+        except (ValueError, EOFError, TypeError, zlib.error):
+            return None
+        return data if isinstance(data, dict) else None
+
+    def _is_unchanged(self, path: Path, entry: dict) -> bool:
+        try:
+            st = path.stat()
+        except OSError:
+            return False
+        if st.st_mtime_ns == entry["mtime_ns"] and st.st_size == entry["size"]:
+            return True
+        if st.st_size != entry["size"]:
+            return False
+        try:
+            return self._fingerprint(path)[2] == entry["hash"] # Só o mtime mudou (touch, checkout)
+        except OSError:
+            return False
+
+    def restore(self, editor, sidebar, console) -> int:
+        """Reabre as abas da última sessão. Retorna quantas foram restauradas."""
+        data = self.load()
+        if not data:
+            return 0
+
+        sidebar_path = data.get("sidebar_path")
+        if sidebar_path and Path(sidebar_path).is_dir():
+            sidebar.set_project_path(Path(sidebar_path))
+        console_cwd = data.get("console_cwd")
+        if console_cwd and Path(console_cwd).is_dir():
+            console.set_cwd(Path(console_cwd))
+
+        entries = [e for e in data.get("tabs", []) if Path(e["path"]).is_file()]
+        if not entries:
+            return 0
+        active = min(data.get("active", 0), len(entries) - 1)
+
+        restored = []
+        active_buffer = None
+        for i, entry in enumerate(entries):
+            path = Path(entry["path"])
+            if editor.find_tab(path) is not None:
+                continue # Mesmo arquivo já aberto (ou repetido na sessão por outro caminho)
+            if entry.get("hex") is not None:
+                buf = HexView(path)
+                buf.position, buf.top = entry["hex"]
+            else:
+                buf = Buffer(path, lazy=True)
+            buf.cursor_y, buf.cursor_x = entry["cursor"]
+            buf.offset_y, buf.offset_x = entry["offset"]
+            if self._is_unchanged(path, entry) and entry.get("outline") is not None:
+                buf.outline_cache = (buf.version, [tuple(item) for item in entry["outline"]])
+            if i == active:
+                buf.lines # A aba ativa é carregada já
+                active_buffer = buf
+            editor.attach_buffer(buf)
+            restored.append(buf)
+
+        if not restored:
+            return 0
+        if len(editor.tabs) == 1 and not editor.tabs[0].filepath and not editor.tabs[0].dirty:
+            editor.tabs = []
+        editor.tabs.extend(restored)
+        editor.active_tab_index = editor.tabs.index(active_buffer) if active_buffer in restored else len(editor.tabs) - 1
+        return len(restored)
@@ -1,10 +1,8 @@
 from pathlib import Path
 from ecte.utils import list_dir, create_file, create_folder, prompt_for_input, clone_repo, prompt_for_confirmation
 from ecte.execution_handler import search_in_project
+from ecte.local_server import LocalServer
 from threading import Thread
-import http.server
-import socketserver
-import os
 import shutil
 
 class Sidebar:
@@ -62,8 +60,7 @@ class Sidebar:
         self._history_index = -1
         self.cloning_thread = None
         self.cloning_result = None
-        self.local_server_thread = None
-        self.httpd = None
+        self.local_server: LocalServer | None = None
         self.search_query = ""
         self._folder_cache = []
         self._cache_base_path = None
@@ -226,10 +223,8 @@ class Sidebar:
             self.current_path = path
             self.refresh()
         elif item_type.startswith("file"):
-            if path.suffix.lower() in self.UNSUPPORTED_EXTENSIONS:
-                return f"Pré-visualização para '{path.suffix}' não disponível."
-            editor.open_file(path)
-            return f"Arquivo aberto: {path.name}"
+            hex_view = path.suffix.lower() in self.UNSUPPORTED_EXTENSIONS # Sem pré-visualização: bytes em hexadecimal
+            return editor.open_file(path, hex_view) or f"Arquivo aberto: {path.name}"
 
     def add_file(self, stdscr):
         if not self.current_path or self.mode == "prompt":
@@ -316,33 +311,33 @@ class Sidebar:
             return "Avançando no histórico"
         return None
 
-    def toggle_local_server(self):
-        if self.local_server_thread and self.local_server_thread.is_alive():
+    def toggle_local_server(self, port_setting: str = "Automática", precompressed_gzip: bool = True):
+        if self.local_server and self.local_server.running:
             return self.stop_local_server()
         else:
-            return self.start_local_server()
+            return self.start_local_server(port_setting, precompressed_gzip)
 
-    def start_local_server(self):
+    def start_local_server(self, port_setting: str = "Automática", precompressed_gzip: bool = True):
         if not self.current_path:
             return "Abra um projeto para iniciar o servidor."
 
-        PORT = 8000
-
-        def server_worker():
-            os.chdir(self.current_path)
-            handler = http.server.SimpleHTTPRequestHandler
-            self.httpd = socketserver.TCPServer(("", PORT), handler)
-            self.httpd.serve_forever()
+        port = int(port_setting) if port_setting.isdigit() else None
+        server = LocalServer(self.current_path, port=port, precompressed_gzip=precompressed_gzip)
+        try:
+            port = server.start()
+        except OSError as e:
+            return f"Erro ao iniciar o servidor local: {e}"
 
-        self.local_server_thread = Thread(target=server_worker, daemon=True)
-        self.local_server_thread.start()
-        return f"Servidor local iniciado em http://localhost:{PORT}"
+        self.local_server = server
+        return f"Servidor local iniciado em http://localhost:{port}"
 
     def stop_local_server(self):
-        if self.httpd:
-            self.httpd.shutdown()
-            self.httpd.server_close()
-            self.httpd = None
-            self.local_server_thread = None
+        if self.local_server:
+            self.local_server.stop()
+            self.local_server = None
             return "Servidor local parado."
-        return "Nenhum servidor local em execução."
\ No newline at end of file
+        return "Nenhum servidor local em execução."
+
+    def notify_file_saved(self, path: Path | None):
+        if self.local_server and self.local_server.running:
+            self.local_server.notify_reload(path)
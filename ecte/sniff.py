@@ -0,0 +1,111 @@
+import codecs
+from pathlib import Path
+from typing import List, NamedTuple, Tuple
+
+SNIFF_BYTES = 64 * 1024 # Só o começo do arquivo é lido para decidir como abri-lo
+BINARY_CONTROL_RATIO = 0.10 # Bytes de controle (fora \t \n \r \f \b \x1b) acima disso: binário
+LEGACY_ENCODING = "cp1252" # UTF-8 inválido sem cara de binário: texto antigo do Windows/Latin-1
+
+_BOMS = ( # UTF-32 antes de UTF-16: FF FE 00 00 também começa com FF FE
+    (codecs.BOM_UTF32_LE, "utf-32-le"),
+    (codecs.BOM_UTF32_BE, "utf-32-be"),
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+_NOT_CONTROL = bytes(range(0x20, 0x100)) + b"\t\n\r\f\b\x1b" # Apagados, sobram só os bytes de controle
+_HIGH = bytes(range(0x80, 0x100))
+
+
+class FileFormat(NamedTuple):
+    encoding: str
+    bom: bytes = b""
+    newline: str = "\n"
+    binary: bool = False
+
+    @property
+    def label(self) -> str:
+        """Nome curto para a barra de status."""
+        name = self.encoding.upper().replace("CP", "Windows-")
+        return name + (" BOM" if self.bom and self.encoding == "utf-8" else "") + (" CRLF" if self.newline == "\r\n" else "")
+
+
+TEXT_FORMAT = FileFormat("utf-8")
+
+
+def _utf16_from_nuls(block: bytes) -> str:
+    """UTF-16 sem BOM: texto latino tem um NUL em quase toda posição par (BE) ou ímpar (LE)."""
+    pairs = len(block) // 2
+    if pairs < 2:
+        return ""
+    even = block[0:pairs * 2:2].count(0) / pairs
+    odd = block[1:pairs * 2:2].count(0) / pairs
+    if odd > 0.4 and even < 0.05:
+        return "utf-16-le"
+    if even > 0.4 and odd < 0.05:
+        return "utf-16-be"
+    return ""
+
+
+def _newline(text: str) -> str:
+    end = text.find("\n")
+    return "\r\n" if end > 0 and text[end - 1] == "\r" else "\n"
+
+
+def sniff_bytes(block: bytes) -> FileFormat:
+    """Decide como abrir um arquivo a partir do seu começo."""
+    for bom, encoding in _BOMS:
+        if block.startswith(bom):
+            text = codecs.getincrementaldecoder(encoding)("replace").decode(block[len(bom):])
+            return FileFormat(encoding, bom, _newline(text))
+
+    encoding = _utf16_from_nuls(block)
+    if encoding:
+        return FileFormat(encoding, b"", _newline(codecs.getincrementaldecoder(encoding)("replace").decode(block)))
+    if 0 in block:
+        return FileFormat("", binary=True)
+
+    controls = len(block.translate(None, _NOT_CONTROL))
+    if block and controls / len(block) > BINARY_CONTROL_RATIO:
+        return FileFormat("", binary=True)
+    try:
+        # Incremental: um caractere cortado no fim do bloco não conta como erro
+        text = codecs.getincrementaldecoder("utf-8")().decode(block)
+        return FileFormat("utf-8", b"", _newline(text))
+    except UnicodeDecodeError:
+        pass
+    invalid = block.decode("utf-8", "replace").count("�")
+    high = len(block) - len(block.translate(None, _HIGH))
+    if high and invalid / high > 0.5 and high / len(block) > 0.3:
+        return FileFormat("", binary=True) # Quase tudo acima de 0x7f e nada disso é UTF-8
+    text = block.decode(LEGACY_ENCODING, "replace")
+    return FileFormat(LEGACY_ENCODING, b"", _newline(text))
+
+
+def sniff_file(path: Path) -> FileFormat:
+    with open(path, "rb") as f:
+        return sniff_bytes(f.read(SNIFF_BYTES))
+
+
+def read_text_file(path: Path) -> Tuple[List[str], FileFormat]:
+    """
+    Linhas do arquivo e o formato em que ele foi lido (para salvar do mesmo jeito). Bytes que
+    não decodificam viram surrogates (surrogateescape) e voltam iguais no save.
+    """
+    fmt = sniff_file(path)
+    if fmt.binary:
+        return [""], fmt
+    data = path.read_bytes()[len(fmt.bom):]
+    return decode_lines(data, fmt), fmt
+
+
+def decode_lines(data: bytes, fmt: FileFormat) -> List[str]:
+    try:
+        text = data.decode(fmt.encoding, "surrogateescape")
+    except UnicodeDecodeError: # UTF-16/32 com bytes soltos: surrogateescape só cobre bytes >= 0x80
+        text = data.decode(fmt.encoding, "replace")
+    return text.splitlines() or [""]
+
+
+def encode_text(lines: List[str], fmt: FileFormat) -> bytes:
+    return fmt.bom + fmt.newline.join(lines).encode(fmt.encoding, "surrogateescape")
@@ -2,6 +2,8 @@ import curses
 import re
 from typing import List, Tuple
 
+from ecte.instrumentation import cache_hit, cache_miss, span
+
 class Structbar:
     """
     Uma barra lateral que exibe a estrutura do código do arquivo atual (funções, classes, etc.).
@@ -80,6 +82,18 @@ class Structbar:
                     line_number = i
                     self.items.append((item_type, item_name, line_number))
 
+    def parse_buffer(self, buf):
+        """Analisa o buffer só quando ele mudou desde a última análise."""
+        if buf.outline_cache and buf.outline_cache[0] == buf.version:
+            cache_hit("estrutura")
+            self.items = buf.outline_cache[1]
+            return
+        cache_miss("estrutura")
+        file_ext = buf.filepath.suffix if buf.filepath else ""
+        with span("outline"):
+            self.parse_code(buf.lines, file_ext)
+        buf.outline_cache = (buf.version, self.items)
+
     def draw(self, stdscr, editor_w: int, editor_h: int, tabs_bar_h: int):
         """Desenha a barra de estrutura na tela."""
         if not self.visible:
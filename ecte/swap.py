@@ -0,0 +1,294 @@
+import collections
+import hashlib
+import marshal
+import os
+import struct
+import threading
+import weakref
+import zlib
+from pathlib import Path
+from typing import List, Optional
+
+from ecte.longline import LineEdit, SegmentedLine
+from ecte.sniff import read_text_file
+
+SWAP_DIR = Path.home() / ".config" / "ecte" / "swap"
+FLUSH_INTERVAL = 1.0 # Segundos entre gravações em lote (com fsync)
+CHECKPOINT_MIN_BYTES = 256 * 1024
+
+OP_BASE = b"B" # (caminho, mtime_ns, tamanho) do arquivo em disco quando o diário começou
+OP_CHECKPOINT = b"C" # (caminho, texto completo comprimido com zlib)
+OP_SPLICE = b"S" # (início, fim, novas_linhas): buffer.lines[início:fim] = novas_linhas
+OP_LINE_EDIT = b"E" # (linha, x, removidos, texto): edição dentro de uma linha longa
+
+_HEADER = struct.Struct("<cII") # operação, tamanho do payload, crc32 do payload
+
+
+def swap_path_for(path: Path, swap_dir: Path = SWAP_DIR) -> Path:
+    digest = hashlib.blake2b(str(Path(path).resolve()).encode("utf-8"), digest_size=10).hexdigest()
+    return swap_dir / f"{Path(path).name}.{digest}.swp"
+
+
+def encode_record(op: bytes, data) -> bytes:
+    payload = marshal.dumps(data)
+    return _HEADER.pack(op, len(payload), zlib.crc32(payload)) + payload
+
+
+def read_records(swap_file: Path) -> list:
+    """Lê os registros até o primeiro incompleto ou corrompido (gravação interrompida)."""
+    try:
+        raw = swap_file.read_bytes()
+    except OSError:
+        return []
+    records = []
+    pos = 0
+    while pos + _HEADER.size <= len(raw):
+        op, length, crc = _HEADER.unpack_from(raw, pos)
+        payload = raw[pos + _HEADER.size : pos + _HEADER.size + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            break
+        try:
+            records.append((op, marshal.loads(payload)))
+        except (ValueError, EOFError, TypeError):
+            break
+        pos += _HEADER.size + length
+    return records
+
+
+def _read_lines(path: Path) -> List[str]:
+    return read_text_file(path)[0]
+
+
+class _JournalState:
+    __slots__ = ("swap_file", "bytes_since_checkpoint", "content_size")
+
+    def __init__(self, swap_file: Path, content_size: int):
+        self.swap_file = swap_file
+        self.bytes_since_checkpoint = 0
+        self.content_size = content_size
+
+
+class SwapJournal:
+    """
+    Diário de recuperação: cada alteração de um buffer vira um registro pequeno
+    (intervalo de linhas substituído) anexado ao arquivo .swp por uma thread em
+    segundo plano, em lotes com fsync. O custo de I/O acompanha o que foi digitado;
+    o texto completo só é gravado em checkpoints ocasionais, quando o diário já
+    cresceu tanto quanto o próprio arquivo.
+    """
+
+    def __init__(self, swap_dir: Path = SWAP_DIR, flush_interval: float = FLUSH_INTERVAL):
+        self.swap_dir = swap_dir
+        self.flush_interval = flush_interval
+        self._states = weakref.WeakKeyDictionary() # buffer -> _JournalState
+        self._held = set() # Diários de sessões anteriores com a recuperação ainda por decidir
+        self._broken = set() # Diários sem alguns registros (falha de escrita, edição durante o hold)
+        self._queue = collections.deque()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._writer_loop, name="swap-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping = True
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+
+    def track(self, buf):
+        if self.record_change not in buf.change_listeners:
+            buf.change_listeners.append(self.record_change)
+
+    def untrack(self, buf):
+        if self.record_change in buf.change_listeners:
+            buf.change_listeners.remove(self.record_change)
+
+    def record_change(self, buf, changes: list):
+        if not buf.filepath:
+            return
+        state = self._states.get(buf)
+        if state is None or state.swap_file in self._broken:
+            swap_file = state.swap_file if state else swap_path_for(buf.filepath, self.swap_dir)
+            if swap_file in self._held:
+                # O diário antigo espera a resposta do usuário: não pode ser sobrescrito. A
+                # edição fica fora dele, então o diário novo terá de começar com um checkpoint.
+                self._broken.add(swap_file)
+                return
+            if not self._begin(buf, swap_file in self._broken):
+                return # Começou com um checkpoint, que já contém estas alterações
+            state = self._states[buf]
+
+        record = b"".join(
+            encode_record(OP_LINE_EDIT, (start, new_lines.x, new_lines.removed, new_lines.text))
+            if isinstance(new_lines, LineEdit) else encode_record(OP_SPLICE, (start, end, list(new_lines)))
+            for start, end, new_lines in changes
+        )
+        state.bytes_since_checkpoint += len(record)
+        self._queue.append(("append", state.swap_file, record))
+
+        if state.bytes_since_checkpoint >= max(CHECKPOINT_MIN_BYTES, state.content_size):
+            # Cópia rasa (só ponteiros); o texto é montado e comprimido na thread de escrita
+            self._queue.append(("checkpoint", state.swap_file, str(buf.filepath), list(buf.lines), state))
+            state.bytes_since_checkpoint = 0
+
+    def _begin(self, buf, broken: bool = False) -> bool:
+        """
+        Começa o diário do buffer. A base é o arquivo como estava quando o buffer o leu ou
+        salvou; se o disco já é outro (ou registros se perderam), começa com um checkpoint do
+        buffer. Devolve False nesse caso, pois o checkpoint já inclui as alterações em curso.
+        """
+        swap_file = swap_path_for(buf.filepath, self.swap_dir)
+        self._broken.discard(swap_file)
+        stamp = buf.disk_stamp()
+        if not broken and stamp == buf._disk_stamp:
+            base = (str(buf.filepath), *stamp) if stamp else (str(buf.filepath), 0, -1) # -1: ainda não existe em disco
+            self._states[buf] = _JournalState(swap_file, stamp[1] if stamp else 0)
+            self._queue.append(("reset", swap_file, encode_record(OP_BASE, base)))
+            return True
+        state = self._states[buf] = _JournalState(swap_file, 0)
+        self._queue.append(("checkpoint", swap_file, str(buf.filepath), list(buf.lines), state))
+        return False
+
+    def hold(self, path: Path):
+        """Protege o diário de uma sessão anterior até o usuário decidir (ver release)."""
+        self._held.add(swap_path_for(path, self.swap_dir))
+
+    def release(self, path: Path):
+        self._held.discard(swap_path_for(path, self.swap_dir))
+
+    def discard(self, buf):
+        """Chamado depois de salvar ou ao descartar as alterações de um buffer."""
+        if buf.filepath:
+            self.release(buf.filepath)
+        state = self._states.pop(buf, None)
+        if state is not None:
+            self._broken.discard(state.swap_file)
+            self._queue.append(("discard", state.swap_file))
+        elif buf.filepath:
+            swap_file = swap_path_for(buf.filepath, self.swap_dir)
+            self._broken.discard(swap_file)
+            self._queue.append(("discard", swap_file))
+        self._wakeup.set()
+
+    def has_recovery(self, path: Path) -> bool:
+        swap_file = swap_path_for(path, self.swap_dir)
+        if any(state.swap_file == swap_file for state in self._states.values()):
+            return False # Diário desta própria sessão
+        try:
+            return swap_file.stat().st_size > 0
+        except OSError:
+            return False
+
+    def recover(self, path: Path) -> Optional[List[str]]:
+        """Reconstrói as linhas a partir do diário; None se ele não puder ser aplicado com segurança."""
+        lines = None
+        segments = {} # Edições em linhas longas são aplicadas em trechos e montadas no fim
+        for op, data in read_records(swap_path_for(path, self.swap_dir)):
+            if op == OP_LINE_EDIT and lines is not None:
+                y, x, removed, text = data
+                if y not in segments:
+                    segments[y] = SegmentedLine(lines[y])
+                segments[y].replace(x, x + removed, text)
+                continue
+            if segments and lines is not None:
+                for y, segment in segments.items():
+                    lines[y] = segment.text()
+            segments = {}
+            if op == OP_BASE:
+                _, mtime_ns, size = data
+                lines = self._load_base(path, mtime_ns, size)
+            elif op == OP_CHECKPOINT:
+                lines = zlib.decompress(data[1]).decode("utf-8", "surrogatepass").split("\n")
+            elif op == OP_SPLICE and lines is not None:
+                start, end, new_lines = data
+                lines[start:end] = new_lines
+        for y, segment in segments.items():
+            lines[y] = segment.text()
+        return lines
+
+    def _load_base(self, path: Path, mtime_ns: int, size: int) -> Optional[List[str]]:
+        try:
+            st = path.stat()
+        except OSError:
+            return [""] if size == -1 else None
+        if st.st_mtime_ns != mtime_ns or st.st_size != size:
+            return None # O arquivo mudou no disco: os registros não se aplicam mais
+        try:
+            return _read_lines(path)
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def _writer_loop(self):
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Grava tudo o que está na fila, em ordem, e faz fsync de cada arquivo tocado."""
+        with self._write_lock:
+            if not self._queue:
+                return
+            handles = {}
+            swap_file = None
+            try:
+                self.swap_dir.mkdir(parents=True, exist_ok=True)
+                while self._queue:
+                    op = self._queue.popleft()
+                    kind, swap_file = op[0], op[1]
+                    if kind in ("reset", "checkpoint", "discard") and swap_file in handles:
+                        self._close(handles.pop(swap_file))
+                    if kind == "reset":
+                        handles[swap_file] = open(swap_file, "wb")
+                        handles[swap_file].write(op[2])
+                    elif kind == "append":
+                        if swap_file not in handles:
+                            handles[swap_file] = open(swap_file, "ab")
+                        handles[swap_file].write(op[2])
+                    elif kind == "checkpoint":
+                        self._write_checkpoint(swap_file, op[2], op[3], op[4])
+                    elif kind == "discard":
+                        swap_file.unlink(missing_ok=True)
+                while handles:
+                    swap_file, handle = handles.popitem()
+                    self._close(handle)
+            except OSError:
+                # Sem espaço/permissão: não trava o editor por causa do diário. Mas um diário
+                # com registros faltando reconstruiria o texto errado, então os afetados são
+                # apagados e o próximo registro de cada buffer recomeça com um checkpoint.
+                failed = set(handles) | {swap_file} | {op[1] for op in self._queue}
+                self._queue.clear()
+                for handle in handles.values():
+                    try:
+                        handle.close()
+                    except OSError:
+                        pass
+                for path in failed - {None}:
+                    self._broken.add(path)
+                    try:
+                        path.unlink(missing_ok=True)
+                    except OSError:
+                        pass
+
+    def _write_checkpoint(self, swap_file: Path, path: str, lines: List[str], state: _JournalState):
+        data = "\n".join(lines).encode("utf-8", "surrogatepass") # Bytes inválidos do original (surrogateescape)
+        state.content_size = len(data)
+        tmp_file = swap_file.with_suffix(".tmp")
+        with open(tmp_file, "wb") as f:
+            f.write(encode_record(OP_CHECKPOINT, (path, zlib.compress(data, 1))))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, swap_file)
+
+    def _close(self, handle):
+        try:
+            handle.flush()
+            os.fsync(handle.fileno())
+        finally:
+            handle.close()
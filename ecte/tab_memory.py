@@ -0,0 +1,158 @@
+import marshal
+import struct
+import weakref
+import zlib
+from typing import List, Optional
+
+from ecte.editor import _changed_range
+
+FRAME_MAGIC = b"TZ01"
+_FRAME_HEADER = struct.Struct("<4sI") # magic, tamanho descomprimido
+DEFAULT_BUDGET_MB = 256
+KEEP_RECENT_TABS = 3 # As abas mais recentes nunca são compactadas: a troca continua instantânea
+LINE_OVERHEAD = 57 # Custo aproximado de um objeto str vazio + ponteiro na lista
+
+
+def pack_frame(data) -> bytes:
+    raw = marshal.dumps(data)
+    return _FRAME_HEADER.pack(FRAME_MAGIC, len(raw)) + zlib.compress(raw, 1)
+
+
+def unpack_frame(frame: bytes):
+    magic, raw_len = _FRAME_HEADER.unpack_from(frame)
+    if magic != FRAME_MAGIC:
+        raise ValueError("Frame de buffer compactado inválido")
+    raw = zlib.decompress(frame[_FRAME_HEADER.size:], bufsize=max(raw_len, 1))
+    return marshal.loads(raw)
+
+
+def encode_history(current: List[str], states: list) -> list:
+    """
+    Codifica uma pilha de undo/redo como diferenças encadeadas a partir do estado atual,
+    do mais próximo para o mais distante. Snapshots quase idênticos viram poucos bytes.
+    """
+    encoded = []
+    reference = current
+    for state in reversed(states):
+        lines = state['lines']
+        delta = None
+        changed = _changed_range(reference, lines)
+        if changed:
+            start, ref_end, new_end = changed
+            delta = (start, ref_end, lines[start:new_end])
+        encoded.append((state['cursor_x'], state['cursor_y'], delta))
+        reference = lines
+    return encoded
+
+
+def decode_history(current: List[str], encoded: list) -> list:
+    states = []
+    reference = current
+    for cursor_x, cursor_y, delta in encoded:
+        lines = list(reference)
+        if delta:
+            start, end, new_lines = delta
+            lines[start:end] = new_lines
+        states.append({'lines': lines, 'cursor_x': cursor_x, 'cursor_y': cursor_y})
+        reference = lines
+    states.reverse()
+    return states
+
+
+def estimate_buffer_memory(buf) -> int:
+    """Estimativa barata (em bytes) do que o buffer ocupa; recalculada só quando a versão muda."""
+    if buf.frozen:
+        return len(buf._frozen)
+    if not buf.loaded:
+        return 0
+    cached = buf._memory_estimate
+    if cached and cached[0] == buf.version:
+        return cached[1]
+    lines = buf._lines
+    size = sum(map(len, lines)) + LINE_OVERHEAD * len(lines)
+    for state in buf._undo_states + buf._redo_states:
+        size += 8 * len(state['lines']) + 64 # As strings são compartilhadas; conta os ponteiros
+    buf._memory_estimate = (buf.version, size)
+    return size
+
+
+class TabMemoryManager:
+    """
+    Política LRU sobre Editor.tabs com orçamento de memória. Abas inativas e limpas
+    descartam o texto (recarregado do disco ao voltar); abas sujas são compactadas
+    com zlib em um frame próprio, junto com o histórico de undo/redo.
+    """
+
+    def __init__(self, budget_mb: int = DEFAULT_BUDGET_MB, keep_recent: int = KEEP_RECENT_TABS):
+        self.budget_bytes = budget_mb * 1024 * 1024
+        self.keep_recent = keep_recent
+        self._last_used = weakref.WeakKeyDictionary()
+        self._clock = 0
+        self._last_active = None
+
+    def set_budget_mb(self, budget_mb: int):
+        self.budget_bytes = budget_mb * 1024 * 1024
+
+    def touch(self, buf):
+        self._clock += 1
+        self._last_used[buf] = self._clock
+
+    def update(self, editor) -> int:
+        """Chamado pelo loop principal; só trabalha quando a aba ativa muda. Retorna abas compactadas."""
+        active = editor.active_buffer
+        if active is None or active is self._last_active:
+            return 0
+        self._last_active = active
+        self.touch(active)
+        return self.enforce(editor)
+
+    def enforce(self, editor) -> int:
+        active = editor.active_buffer
+        usage = {buf: estimate_buffer_memory(buf) for buf in editor.tabs}
+        total = sum(usage.values())
+        if total <= self.budget_bytes:
+            return 0
+
+        by_recency = sorted(editor.tabs, key=lambda b: self._last_used.get(b, 0), reverse=True)
+        protected = set(map(id, by_recency[:self.keep_recent]))
+        protected.add(id(active))
+
+        frozen = 0
+        for buf in reversed(by_recency): # Menos usadas primeiro
+            if total <= self.budget_bytes:
+                break
+            if id(buf) in protected or buf.frozen or not buf.loaded:
+                continue
+            buf.freeze()
+            total -= usage[buf] - estimate_buffer_memory(buf)
+            frozen += 1
+        return frozen
+
+    def total_usage(self, editor) -> int:
+        return sum(estimate_buffer_memory(buf) for buf in editor.tabs)
+
+
+def freeze_state(buf) -> Optional[bytes]:
+    lines = buf._lines
+    keep_text = buf.dirty or not buf.filepath or buf.disk_stamp() != buf._disk_stamp
+    return pack_frame({
+        "lines": "\n".join(lines) if keep_text else None,
+        "disk_stamp": buf._disk_stamp,
+        "undo": encode_history(lines, buf._undo_states),
+        "redo": encode_history(lines, buf._redo_states),
+    })
+
+
+def thaw_state(buf, frame: bytes):
+    data = unpack_frame(frame)
+    if data["lines"] is not None:
+        buf._lines = data["lines"].split("\n")
+        history_valid = True
+    else:
+        buf._load()
+        history_valid = buf._disk_stamp == data["disk_stamp"] # O arquivo mudou: o histórico não se aplica
+        if not history_valid:
+            buf.version += 1 # Texto novo: os caches por versão (estrutura, diagnósticos, memória) caducam
+    if history_valid:
+        buf._undo_states = decode_history(buf._lines, data["undo"])
+        buf._redo_states = decode_history(buf._lines, data["redo"])
@@ -0,0 +1,72 @@
+import os
+import weakref
+from pathlib import Path
+from typing import Optional
+
+
+def file_key(path) -> tuple:
+    """Identidade do arquivo: (st_dev, st_ino) quando existe; caminho real quando ainda não existe."""
+    try:
+        st = os.stat(path)
+        return ("inode", st.st_dev, st.st_ino)
+    except OSError:
+        return ("path", os.path.realpath(path))
+
+
+class TabRegistry:
+    """
+    Índice dos buffers abertos por arquivo. Links simbólicos, caminhos relativos e
+    '..' que apontam para o mesmo inode caem no mesmo buffer. Cada grafia já vista
+    fica no mapa de apelidos, então reabrir um arquivo não precisa varrer as abas.
+    Usado por Editor.open_file, pela restauração de sessão e por quem observa arquivos.
+    """
+
+    def __init__(self):
+        self._by_key = {} # file_key -> buffer
+        self._aliases = {} # caminho como string -> file_key
+        self._keys = weakref.WeakKeyDictionary() # buffer -> file_key
+
+    def __len__(self) -> int:
+        return len(self._by_key)
+
+    def lookup(self, path) -> Optional[object]:
+        key = self._aliases.get(str(path))
+        if key is not None:
+            buf = self._by_key.get(key)
+            if buf is not None:
+                return buf
+        key = file_key(path)
+        buf = self._by_key.get(key)
+        if buf is not None:
+            self._aliases[str(path)] = key
+        return buf
+
+    def register(self, buf, path=None):
+        if not buf.filepath:
+            return
+        self.unregister(buf)
+        key = file_key(buf.filepath)
+        self._by_key[key] = buf
+        self._keys[buf] = key
+        for alias in {str(buf.filepath), str(path or buf.filepath), os.path.realpath(buf.filepath)}:
+            self._aliases[alias] = key
+
+    def unregister(self, buf):
+        key = self._keys.pop(buf, None)
+        if key is None:
+            return
+        if self._by_key.get(key) is buf:
+            del self._by_key[key]
+        for alias in [a for a, k in self._aliases.items() if k == key]:
+            del self._aliases[alias]
+
+    def refresh(self, buf):
+        """Recalcula a chave depois de salvar (um arquivo novo passa a ter inode)."""
+        if buf.filepath and self._keys.get(buf) != file_key(buf.filepath):
+            self.register(buf)
+
+    def buffers(self):
+        return list(self._by_key.values())
+
+    def paths(self) -> list:
+        return [Path(buf.filepath) for buf in self._by_key.values()]
@@ -0,0 +1,59 @@
+import curses
+from pygments.token import Token, string_to_tokentype
+
+# Tipo de token -> par de cores (ou (par, atributos extras)).
+# A busca sobe pela hierarquia do token, então a entrada mais específica vence.
+DEFAULT_TOKEN_COLORS = {
+    Token.Keyword: 1,
+    Token.Literal.String: 2,
+    Token.Comment: 3,
+    Token.Literal.Number: 4,
+    Token.Operator: 5,
+    Token.Punctuation: 5,
+    Token.Name.Function: 6,
+    Token.Name.Class: 6,
+    Token.Name.Variable: 8,
+    Token.Name.Decorator: 9,
+    Token.Name.Constant: 10,
+}
+
+
+class Theme:
+    """
+    Resolve cada tipo de token do pygments para um atributo do curses uma única vez.
+    Trocar de tema é só trocar a tabela: o cache é descartado e reconstruído sob demanda.
+    """
+
+    def __init__(self, token_colors=None):
+        self.token_colors = {}
+        self._attr_cache = {}
+        self.set_token_colors(token_colors or DEFAULT_TOKEN_COLORS)
+
+    def set_token_colors(self, token_colors):
+        """Aceita chaves como tipos de token ou strings ("Keyword", "Literal.String")."""
+        table = {}
+        for token_type, value in token_colors.items():
+            if isinstance(token_type, str):
+                token_type = string_to_tokentype(token_type)
+            table[token_type] = value
+        self.token_colors = table
+        self._attr_cache.clear()
+
+    def attr_for(self, ttype) -> int:
+        try:
+            return self._attr_cache[ttype]
+        except KeyError:
+            attr = self._resolve(ttype)
+            self._attr_cache[ttype] = attr
+            return attr
+
+    def _resolve(self, ttype) -> int:
+        while ttype is not None:
+            value = self.token_colors.get(ttype)
+            if value is not None:
+                if isinstance(value, tuple):
+                    pair, extra = value
+                    return curses.color_pair(pair) | extra
+                return curses.color_pair(value)
+            ttype = ttype.parent
+        return curses.color_pair(0)
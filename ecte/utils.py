@@ -6,6 +6,8 @@ from pathlib import Path
 import platform
 from threading import Thread
 
+from ecte.latency import read_key, tracker as latency_tracker
+
 
 def get_project_root() -> Path:
     return Path.cwd()
@@ -69,7 +71,7 @@ def prompt_for_input(stdscr, message: str) -> str | None:
     edit_win = curses.newwin(1, prompt_w - 4, prompt_y + 2, prompt_x + 2)
     box = Textbox(edit_win)
 
-    box.edit()
+    box.edit(lambda ch: (latency_tracker.input_read(ch), ch)[1]) # Passa cada tecla pela gravação
 
     input_str = box.gather().strip()
     return input_str if input_str else None
@@ -93,7 +95,7 @@ def prompt_for_confirmation(stdscr, message: str) -> bool:
     win.refresh()
 
     while True:
-        key = stdscr.getch()
+        key = read_key(stdscr)
         if key in (ord('s'), ord('S')):
             return True
         if key in (ord('n'), ord('N'), 27):
@@ -135,7 +137,7 @@ def prompt_with_options(stdscr, title, options):
             win.addstr(4, button_x_start, f"  {option}  ", button_style)
             button_x_start += len(option) + 4
 
-        key = win.getch()
+        key = read_key(win)
 
         if key in (curses.KEY_LEFT, 9):
             selected_option = (selected_option - 1 + len(options)) % len(options)
@@ -0,0 +1,458 @@
+import collections
+import contextlib
+import curses
+import hashlib
+from typing import List, NamedTuple, Optional
+
+A_CHARTEXT = 0xff
+A_COLOR = 0xff00
+A_ALTCHARSET = curses.A_ALTCHARSET
+
+# Caracteres de linha do VT100 (o que ACS_* vira no terminal)
+ALTCHARSET_MAP = {
+    "q": "─", "x": "│", "l": "┌", "k": "┐", "m": "└", "j": "┘",
+    "t": "├", "u": "┤", "w": "┬", "v": "┴", "n": "┼", "a": "▒", "~": "·",
+}
+ACS_NAMES = {
+    "ACS_HLINE": "q", "ACS_VLINE": "x", "ACS_ULCORNER": "l", "ACS_URCORNER": "k",
+    "ACS_LLCORNER": "m", "ACS_LRCORNER": "j", "ACS_LTEE": "t", "ACS_RTEE": "u",
+    "ACS_TTEE": "w", "ACS_BTEE": "v", "ACS_PLUS": "n", "ACS_CKBOARD": "a", "ACS_BULLET": "~",
+}
+
+
+def _decode_char(ch):
+    """Converte o ch do curses (str ou chtype inteiro) em (caractere, atributos embutidos)."""
+    if isinstance(ch, str):
+        return ch, 0
+    if isinstance(ch, bytes):
+        return ch.decode("latin-1"), 0
+    char = chr(ch & A_CHARTEXT)
+    attr = ch & ~A_CHARTEXT
+    if attr & A_ALTCHARSET:
+        return ALTCHARSET_MAP.get(char, char), attr & ~A_ALTCHARSET
+    return char, attr
+
+
+class FrameStats(NamedTuple):
+    cells_written: int # Células escritas pelas janelas desde o último doupdate (inclui reescritas iguais)
+    cells_changed: int # Células que realmente mudaram no terminal
+    attr_changes: int # Trocas de atributo ao emitir as células alteradas (≈ sequências SGR)
+    calls: int # Chamadas de desenho (addstr, addch, box...)
+
+
+class VirtualWindow:
+    """
+    Janela em memória com a parte da API do curses usada pelo projeto. Cada célula
+    guarda (caractere, atributos); noutrefresh copia a janela para a tela virtual
+    do terminal, e doupdate compara com o que já estava "na tela".
+    """
+
+    def __init__(self, terminal: "VirtualTerminal", height: int, width: int, begin_y: int = 0, begin_x: int = 0):
+        self.terminal = terminal
+        self.height = height
+        self.width = width
+        self.begin_y = begin_y
+        self.begin_x = begin_x
+        self.cursor_y = 0
+        self.cursor_x = 0
+        self.background = 0
+        self.attrs = 0
+        self.chars = [[" "] * width for _ in range(height)]
+        self.cell_attrs = [[0] * width for _ in range(height)]
+
+    # --- Escrita ---
+
+    def _effective_attr(self, attr: int) -> int:
+        attr |= self.attrs
+        if not attr & A_COLOR:
+            attr |= self.background & A_COLOR
+        return attr | (self.background & ~A_COLOR & ~A_CHARTEXT)
+
+    def _put(self, y: int, x: int, char: str, attr: int):
+        self.chars[y][x] = char
+        self.cell_attrs[y][x] = attr
+        self.terminal.cells_written += 1
+
+    def _check(self, y: int, x: int):
+        if not (0 <= y < self.height and 0 <= x < self.width):
+            raise curses.error("addwstr() returned ERR")
+
+    def _write(self, text: str, attr: int):
+        """Escreve a partir do cursor, quebrando linha na borda; passar da última célula é erro, como no curses."""
+        self.terminal.calls += 1
+        attr = self._effective_attr(attr)
+        y, x = self.cursor_y, self.cursor_x
+        for char in text:
+            if char == "\n":
+                for cx in range(x, self.width):
+                    self._put(y, cx, " ", attr)
+                y, x = y + 1, 0
+                if y >= self.height:
+                    self.cursor_y, self.cursor_x = self.height - 1, self.width - 1
+                    raise curses.error("addwstr() returned ERR")
+                continue
+            self._put(y, x, char, attr)
+            x += 1
+            if x >= self.width:
+                y, x = y + 1, 0
+                if y >= self.height:
+                    self.cursor_y, self.cursor_x = self.height - 1, self.width - 1
+                    raise curses.error("addwstr() returned ERR")
+        self.cursor_y, self.cursor_x = y, x
+
+    def addstr(self, *args):
+        if len(args) >= 3 and isinstance(args[0], int) and isinstance(args[1], int):
+            y, x, text = args[0], args[1], args[2]
+            attr = args[3] if len(args) > 3 else 0
+            self._check(y, x)
+            self.cursor_y, self.cursor_x = y, x
+        else:
+            text = args[0]
+            attr = args[1] if len(args) > 1 else 0
+        if isinstance(text, bytes):
+            text = text.decode("utf-8", errors="replace")
+        if "\x00" in text:
+            raise ValueError("embedded null character")
+        self._write(text, attr)
+
+    def addnstr(self, *args):
+        if len(args) >= 4 and isinstance(args[0], int) and isinstance(args[1], int):
+            y, x, text, n = args[:4]
+            self.addstr(y, x, text[:n], *args[4:])
+        else:
+            text, n = args[:2]
+            self.addstr(text[:n], *args[2:])
+
+    def addch(self, *args):
+        if len(args) >= 3:
+            y, x, ch = args[0], args[1], args[2]
+            attr = args[3] if len(args) > 3 else 0
+            self._check(y, x)
+            self.cursor_y, self.cursor_x = y, x
+        else:
+            ch = args[0]
+            attr = args[1] if len(args) > 1 else 0
+        char, embedded = _decode_char(ch)
+        self._write(char, attr | embedded)
+
+    def insstr(self, *args):
+        if len(args) >= 3 and isinstance(args[0], int):
+            y, x, text = args[0], args[1], args[2]
+            attr = args[3] if len(args) > 3 else 0
+        else:
+            y, x = self.cursor_y, self.cursor_x
+            text = args[0]
+            attr = args[1] if len(args) > 1 else 0
+        self._check(y, x)
+        self.terminal.calls += 1
+        attr = self._effective_attr(attr)
+        row_chars, row_attrs = self.chars[y], self.cell_attrs[y]
+        text = text[:self.width - x]
+        row_chars[x:] = (list(text) + row_chars[x:])[:self.width - x]
+        row_attrs[x:] = ([attr] * len(text) + row_attrs[x:])[:self.width - x]
+        self.terminal.cells_written += len(text)
+
+    def insch(self, *args):
+        if len(args) >= 3:
+            self.insstr(args[0], args[1], _decode_char(args[2])[0], *args[3:])
+        else:
+            self.insstr(_decode_char(args[0])[0], *args[1:])
+
+    def delch(self, *args):
+        y, x = args[:2] if args else (self.cursor_y, self.cursor_x)
+        self._check(y, x)
+        self.terminal.calls += 1
+        attr = self._effective_attr(0)
+        del self.chars[y][x]
+        del self.cell_attrs[y][x]
+        self.chars[y].append(" ")
+        self.cell_attrs[y].append(attr)
+
+    def inch(self, *args) -> int:
+        y, x = args[:2] if args else (self.cursor_y, self.cursor_x)
+        self._check(y, x)
+        char = self.chars[y][x]
+        return (ord(char) if ord(char) <= A_CHARTEXT else ord("?")) | self.cell_attrs[y][x]
+
+    def _line(self, y: int, x: int, ch, n: int, dy: int, dx: int):
+        self._check(y, x)
+        self.terminal.calls += 1
+        char, attr = _decode_char(ch)
+        attr = self._effective_attr(attr)
+        for i in range(n):
+            cy, cx = y + i * dy, x + i * dx
+            if cy >= self.height or cx >= self.width:
+                break
+            self._put(cy, cx, char, attr)
+
+    def hline(self, *args):
+        if len(args) == 4:
+            y, x, ch, n = args
+        else:
+            (y, x), (ch, n) = (self.cursor_y, self.cursor_x), args
+        self._line(y, x, ch, n, 0, 1)
+
+    def vline(self, *args):
+        if len(args) == 4:
+            y, x, ch, n = args
+        else:
+            (y, x), (ch, n) = (self.cursor_y, self.cursor_x), args
+        self._line(y, x, ch, n, 1, 0)
+
+    def border(self, ls=0, rs=0, ts=0, bs=0, tl=0, tr=0, bl=0, br=0):
+        acs = lambda name: A_ALTCHARSET | ord(ACS_NAMES[name])
+        ls, rs = ls or acs("ACS_VLINE"), rs or acs("ACS_VLINE")
+        ts, bs = ts or acs("ACS_HLINE"), bs or acs("ACS_HLINE")
+        tl, tr = tl or acs("ACS_ULCORNER"), tr or acs("ACS_URCORNER")
+        bl, br = bl or acs("ACS_LLCORNER"), br or acs("ACS_LRCORNER")
+        h, w = self.height, self.width
+        self.terminal.calls += 1
+        for x in range(1, w - 1):
+            self._put(0, x, *self._border_cell(ts))
+            self._put(h - 1, x, *self._border_cell(bs))
+        for y in range(1, h - 1):
+            self._put(y, 0, *self._border_cell(ls))
+            self._put(y, w - 1, *self._border_cell(rs))
+        self._put(0, 0, *self._border_cell(tl))
+        self._put(0, w - 1, *self._border_cell(tr))
+        self._put(h - 1, 0, *self._border_cell(bl))
+        self._put(h - 1, w - 1, *self._border_cell(br))
+
+    def _border_cell(self, ch):
+        char, attr = _decode_char(ch)
+        return char, self._effective_attr(attr)
+
+    def box(self, vertch=0, horch=0):
+        self.border(vertch, vertch, horch, horch)
+
+    def clrtoeol(self):
+        self.terminal.calls += 1
+        attr = self._effective_attr(0)
+        for x in range(self.cursor_x, self.width):
+            self._put(self.cursor_y, x, " ", attr)
+
+    def erase(self):
+        attr = self._effective_attr(0)
+        self.chars = [[" "] * self.width for _ in range(self.height)]
+        self.cell_attrs = [[attr] * self.width for _ in range(self.height)]
+        self.cursor_y = self.cursor_x = 0
+
+    def clear(self):
+        self.erase()
+        self.terminal.clear_pending = True # Como clearok: o próximo doupdate repinta tudo
+
+    def bkgd(self, ch, attr: int = 0):
+        char, embedded = _decode_char(ch)
+        old_color = self.background & A_COLOR
+        self.background = attr | embedded
+        new_color = self.background & A_COLOR
+        for row_attrs in self.cell_attrs:
+            for x, cell_attr in enumerate(row_attrs):
+                if (cell_attr & A_COLOR) in (0, old_color):
+                    row_attrs[x] = (cell_attr & ~A_COLOR) | new_color
+
+    def attron(self, attr: int):
+        self.attrs |= attr
+
+    def attroff(self, attr: int):
+        self.attrs &= ~attr
+
+    def attrset(self, attr: int):
+        self.attrs = attr
+
+    # --- Cursor e geometria ---
+
+    def move(self, y: int, x: int):
+        if not (0 <= y < self.height and 0 <= x < self.width):
+            raise curses.error("wmove() returned ERR")
+        self.cursor_y, self.cursor_x = y, x
+        self.terminal.cursor = (self.begin_y + y, self.begin_x + x)
+
+    def getmaxyx(self):
+        return self.height, self.width
+
+    def getbegyx(self):
+        return self.begin_y, self.begin_x
+
+    def getyx(self):
+        return self.cursor_y, self.cursor_x
+
+    # --- Atualização ---
+
+    def noutrefresh(self):
+        self.terminal.copy_window(self)
+
+    def refresh(self):
+        self.noutrefresh()
+        self.terminal.doupdate()
+
+    # --- Entrada ---
+
+    def getch(self) -> int:
+        return self.terminal.next_key()
+
+    def get_wch(self):
+        key = self.terminal.next_key()
+        if key == -1:
+            raise curses.error("no input")
+        return key
+
+    def keypad(self, flag):
+        pass
+
+    def nodelay(self, flag):
+        pass
+
+    def timeout(self, delay):
+        pass
+
+    def scrollok(self, flag):
+        pass
+
+    def leaveok(self, flag):
+        pass
+
+
+class VirtualTerminal:
+    """
+    Terminal em memória: a tela virtual montada pelos noutrefresh e a tela física
+    (o que o usuário "vê"). Cada doupdate registra um FrameStats com quantas células
+    foram escritas, quantas mudaram de fato e quantas trocas de atributo seriam enviadas.
+    """
+
+    def __init__(self, height: int = 50, width: int = 160):
+        self.height = height
+        self.width = width
+        self.virtual_chars = [[" "] * width for _ in range(height)]
+        self.virtual_attrs = [[0] * width for _ in range(height)]
+        self.physical_chars = [[" "] * width for _ in range(height)]
+        self.physical_attrs = [[0] * width for _ in range(height)]
+        self.cursor = (0, 0)
+        self.clear_pending = True
+        self.cells_written = 0
+        self.calls = 0
+        self.frames: List[FrameStats] = []
+        self.input = collections.deque()
+        self.stdscr = VirtualWindow(self, height, width)
+
+    def newwin(self, *args) -> VirtualWindow:
+        if len(args) == 2: # newwin(begin_y, begin_x): ocupa o resto da tela
+            height, width, (begin_y, begin_x) = 0, 0, args
+        else:
+            height, width, begin_y, begin_x = (list(args) + [0, 0])[:4]
+        height = height or self.height - begin_y
+        width = width or self.width - begin_x
+        return VirtualWindow(self, height, width, begin_y, begin_x)
+
+    def copy_window(self, win: VirtualWindow):
+        for y in range(win.height):
+            ty = win.begin_y + y
+            if not 0 <= ty < self.height:
+                continue
+            x0 = max(0, win.begin_x)
+            x1 = min(self.width, win.begin_x + win.width)
+            if x0 >= x1:
+                continue
+            self.virtual_chars[ty][x0:x1] = win.chars[y][x0 - win.begin_x : x1 - win.begin_x]
+            self.virtual_attrs[ty][x0:x1] = win.cell_attrs[y][x0 - win.begin_x : x1 - win.begin_x]
+
+    def doupdate(self) -> FrameStats:
+        changed = 0
+        attr_changes = 0
+        full = self.clear_pending
+        for y in range(self.height):
+            v_chars, v_attrs = self.virtual_chars[y], self.virtual_attrs[y]
+            p_chars, p_attrs = self.physical_chars[y], self.physical_attrs[y]
+            if not full and v_chars == p_chars and v_attrs == p_attrs:
+                continue
+            current_attr = None
+            for x in range(self.width):
+                if full or v_chars[x] != p_chars[x] or v_attrs[x] != p_attrs[x]:
+                    changed += 1
+                    if v_attrs[x] != current_attr:
+                        attr_changes += 1
+                        current_attr = v_attrs[x]
+                else:
+                    current_attr = None # Pulo de cursor: o próximo trecho reenvia o atributo
+            p_chars[:] = v_chars
+            p_attrs[:] = v_attrs
+        self.clear_pending = False
+
+        stats = FrameStats(self.cells_written, changed, attr_changes, self.calls)
+        self.frames.append(stats)
+        self.cells_written = 0
+        self.calls = 0
+        return stats
+
+    @property
+    def last_frame(self) -> Optional[FrameStats]:
+        return self.frames[-1] if self.frames else None
+
+    # --- Entrada roteirizada ---
+
+    def push_keys(self, *keys):
+        for key in keys:
+            if isinstance(key, str):
+                self.input.extend(ord(c) for c in key)
+            else:
+                self.input.append(key)
+
+    def next_key(self) -> int:
+        return self.input.popleft() if self.input else -1
+
+    # --- Snapshots ---
+
+    def text(self) -> List[str]:
+        """Conteúdo da tela física, linha a linha (sem espaços à direita)."""
+        return ["".join(row).rstrip() for row in self.physical_chars]
+
+    def attr_runs(self, y: int) -> List[tuple]:
+        """Trechos (início, fim, atributos) da linha y da tela física."""
+        runs = []
+        row = self.physical_attrs[y]
+        start = 0
+        for x in range(1, self.width + 1):
+            if x == self.width or row[x] != row[start]:
+                runs.append((start, x, row[start]))
+                start = x
+        return runs
+
+    def snapshot(self) -> str:
+        """Texto estável com caracteres e atributos de cada linha, para comparar quadros exatamente."""
+        out = []
+        for y, line in enumerate(self.text()):
+            runs = " ".join(f"{a}-{b}:{attr:#x}" for a, b, attr in self.attr_runs(y) if attr)
+            out.append(f"{line}\t{runs}" if runs else line)
+        return "\n".join(out)
+
+    def digest(self) -> str:
+        return hashlib.blake2b(self.snapshot().encode("utf-8"), digest_size=12).hexdigest()
+
+
+@contextlib.contextmanager
+def installed(terminal: VirtualTerminal):
+    """Liga as funções globais do curses (newwin, doupdate, color_pair, ACS_*...) ao terminal virtual."""
+    replacements = {
+        "newwin": terminal.newwin,
+        "doupdate": terminal.doupdate,
+        "color_pair": lambda n: (n << 8) & A_COLOR, # Mesmo layout de COLOR_PAIR() do ncurses
+        "pair_number": lambda attr: (attr & A_COLOR) >> 8,
+        "curs_set": lambda visibility: 1,
+        "ungetch": lambda key: terminal.input.appendleft(key if isinstance(key, int) else ord(key)),
+        "beep": lambda: None,
+    }
+    for name, code in ACS_NAMES.items():
+        replacements[name] = A_ALTCHARSET | ord(code) # Só existem depois de initscr() no curses real
+
+    missing = object()
+    originals = {name: getattr(curses, name, missing) for name in replacements}
+    for name, value in replacements.items():
+        setattr(curses, name, value)
+    try:
+        yield terminal
+    finally:
+        for name, value in originals.items():
+            if value is missing:
+                delattr(curses, name)
+            else:
+                setattr(curses, name, value)
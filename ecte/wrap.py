@@ -0,0 +1,215 @@
+import bisect
+from typing import List, Tuple
+
+from ecte.display import TAB_WIDTH, is_simple, line_columns, row_starts
+
+WRAP_BLOCK = 256 # Linhas por bloco; blocos com mais que o dobro são divididos
+
+
+class _Fenwick:
+    """Árvore de Fenwick (somas de prefixo com atualização pontual em O(log n))."""
+
+    def __init__(self, values: List[int]):
+        tree = [0] + list(values)
+        n = len(values)
+        for i in range(1, n + 1):
+            parent = i + (i & -i)
+            if parent <= n:
+                tree[parent] += tree[i]
+        self.tree = tree
+        self.size = n
+        self._top = 1 << n.bit_length() if n else 0
+
+    def add(self, index: int, delta: int):
+        i = index + 1
+        tree = self.tree
+        while i <= self.size:
+            tree[i] += delta
+            i += i & -i
+
+    def prefix(self, count: int) -> int:
+        """Soma dos `count` primeiros valores."""
+        total = 0
+        tree = self.tree
+        while count > 0:
+            total += tree[count]
+            count -= count & -count
+        return total
+
+    def search(self, target: int) -> int:
+        """Maior k tal que prefix(k) <= target (os valores precisam ser não negativos)."""
+        pos = 0
+        step = self._top
+        tree = self.tree
+        while step:
+            nxt = pos + step
+            if nxt <= self.size and tree[nxt] <= target:
+                pos = nxt
+                target -= tree[nxt]
+            step >>= 1
+        return pos
+
+
+class WrapIndex:
+    """
+    Quantas linhas de tela (visuais) cada linha lógica ocupa com a quebra suave, para uma
+    largura. As contagens ficam em blocos de ~WRAP_BLOCK linhas com duas árvores de
+    Fenwick por cima (linhas e linhas visuais por bloco), então converter entre posição
+    lógica e linha de tela custa O(log n + bloco) e uma edição só recalcula as linhas
+    editadas. As larguras são colunas de tela (display.row_starts), não caracteres.
+    Ligado ao buffer como change_listener; mudar a largura refaz tudo.
+    """
+
+    def __init__(self, width: int):
+        self.width = max(1, width)
+        self.buffer = None
+        self._blocks: List[List[int]] = []
+        self._lines_tree = _Fenwick([])
+        self._rows_tree = _Fenwick([])
+        self.line_count = 0
+
+    # --- Construção ---
+
+    def rows_for(self, line) -> int:
+        if isinstance(line, str): # Casos comuns, sem montar o mapa de colunas
+            length = len(line)
+            if TAB_WIDTH * length < self.width: # Nenhum caractere ocupa mais que um tab
+                return 1
+            if is_simple(line):
+                return length // self.width + 1 # Sempre sobra espaço para o cursor depois do último caractere
+            if 2 * length + (TAB_WIDTH - 2) * line.count("\t") < self.width:
+                return 1
+        return len(row_starts(line_columns(line), self.width))
+
+    def attach(self, buf):
+        self.detach()
+        self.buffer = buf
+        buf.change_listeners.append(self.on_change)
+        self.rebuild(buf.lines)
+
+    def detach(self):
+        if self.buffer is not None and self.on_change in self.buffer.change_listeners:
+            self.buffer.change_listeners.remove(self.on_change)
+        self.buffer = None
+
+    def rebuild(self, lines: List[str]):
+        rows_for = self.rows_for
+        counts = [rows_for(line) for line in lines]
+        self._blocks = [counts[i:i + WRAP_BLOCK] for i in range(0, len(counts), WRAP_BLOCK)]
+        self._rebuild_trees()
+
+    def set_width(self, width: int):
+        width = max(1, width)
+        if width != self.width:
+            self.width = width
+            if self.buffer is not None:
+                self.rebuild(self.buffer.lines)
+
+    def _rebuild_trees(self):
+        self._lines_tree = _Fenwick([len(block) for block in self._blocks])
+        self._rows_tree = _Fenwick([sum(block) for block in self._blocks])
+        self.line_count = self._lines_tree.prefix(len(self._blocks))
+
+    # --- Atualização ---
+
+    def on_change(self, buf, changes):
+        rows_for = self.rows_for
+        for start, end, new_lines in changes:
+            self._splice(start, end, [rows_for(line) for line in new_lines])
+        if self.line_count != buf.line_count: # Nunca deveria acontecer; se acontecer, não desenha errado
+            self.rebuild(buf.lines)
+
+    def _locate(self, y: int) -> Tuple[int, int]:
+        """(bloco, posição no bloco) da linha y; y == line_count aponta para depois da última."""
+        if y >= self.line_count:
+            last = len(self._blocks) - 1
+            return last, len(self._blocks[last]) if last >= 0 else 0
+        block = self._lines_tree.search(y)
+        return block, y - self._lines_tree.prefix(block)
+
+    def _splice(self, start: int, end: int, new_counts: List[int]):
+        if not self._blocks:
+            self._blocks = [new_counts] if new_counts else []
+            self._rebuild_trees()
+            return
+        first, first_off = self._locate(start)
+        last, last_off = self._locate(end) if end > start else (first, first_off)
+        if first == last:
+            block = self._blocks[first]
+            removed = block[first_off:last_off]
+            block[first_off:last_off] = new_counts
+            if 0 < len(block) <= 2 * WRAP_BLOCK:
+                self._lines_tree.add(first, len(new_counts) - len(removed))
+                self._rows_tree.add(first, sum(new_counts) - sum(removed))
+                self.line_count += len(new_counts) - len(removed)
+                return
+            merged = block
+        else:
+            merged = self._blocks[first][:first_off] + new_counts + self._blocks[last][last_off:]
+        pieces = [merged[i:i + WRAP_BLOCK] for i in range(0, len(merged), WRAP_BLOCK)]
+        self._blocks[first:last + 1] = pieces
+        self._rebuild_trees()
+
+    # --- Consultas ---
+
+    def total_rows(self) -> int:
+        return self._rows_tree.prefix(len(self._blocks))
+
+    def line_to_row(self, y: int) -> int:
+        """Primeira linha visual da linha lógica y."""
+        block, offset = self._locate(min(max(0, y), max(0, self.line_count - 1)))
+        return self._rows_tree.prefix(block) + sum(self._blocks[block][:offset]) if self._blocks else 0
+
+    def row_to_line(self, row: int) -> Tuple[int, int]:
+        """(linha lógica, linha visual dentro dela) da linha visual `row`, limitada ao fim do texto."""
+        if not self._blocks:
+            return 0, 0
+        total = self.total_rows()
+        if row >= total:
+            y = self.line_count - 1
+            return y, self._blocks[-1][-1] - 1
+        row = max(0, row)
+        block = self._rows_tree.search(row)
+        remaining = row - self._rows_tree.prefix(block)
+        y = self._lines_tree.prefix(block)
+        for count in self._blocks[block]:
+            if remaining < count:
+                return y, remaining
+            remaining -= count
+            y += 1
+        return y - 1, self._blocks[block][-1] - 1 # Inalcançável com contagens consistentes
+
+    def line_row_starts(self, y: int):
+        """Índices onde começa cada linha visual da linha lógica y."""
+        return row_starts(self.buffer.column_map(y), self.width)
+
+    def row_column(self, y: int, sub: int) -> int:
+        """Coluna da linha lógica y onde começa a sua linha visual `sub`."""
+        return self.buffer.column_of(y, self.line_row_starts(y)[sub])
+
+    def position_to_screen(self, y: int, x: int) -> Tuple[int, int]:
+        """(linha visual, coluna dentro dela) do caractere x da linha y."""
+        starts = self.line_row_starts(y)
+        sub = bisect.bisect_right(starts, x) - 1
+        columns = self.buffer.column_map(y)
+        return self.line_to_row(y) + sub, columns.column(x) - columns.column(starts[sub])
+
+    def position_to_row(self, y: int, x: int) -> int:
+        return self.position_to_screen(y, x)[0]
+
+    def row_to_position(self, row: int, column: int) -> Tuple[int, int]:
+        """Posição (y, x) do texto na linha visual `row`, coluna `column` da área de texto."""
+        y, sub = self.row_to_line(row)
+        starts = self.line_row_starts(y)
+        sub = min(sub, len(starts) - 1)
+        columns = self.buffer.column_map(y)
+        x = columns.index(columns.column(starts[sub]) + max(0, column))
+        if sub + 1 < len(starts): # Não passa para a linha visual seguinte
+            x = min(x, starts[sub + 1] - 1)
+        return y, x
+
+
+def move_cursor_rows(buf, index: WrapIndex, rows: int):
+    """Sobe/desce `rows` linhas visuais mantendo a coluna de tela."""
+    row, column = index.position_to_screen(buf.cursor_y, buf.cursor_x)
+    buf.cursor_y, buf.cursor_x = index.row_to_position(max(0, row + rows), column)
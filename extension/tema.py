@@ -0,0 +1,22 @@
+import curses
+
+# Tabela de cores do destaque de sintaxe: tipo de token do pygments -> par de cores.
+# Use (par, atributo) para combinar com negrito, itálico etc.
+TOKEN_COLORS = {
+    "Keyword": (19, curses.A_BOLD),
+    "Keyword.Constant": 10,
+    "Literal.String": 17,
+    "Literal.String.Doc": (3, curses.A_DIM),
+    "Comment": (3, curses.A_DIM),
+    "Literal.Number": 14,
+    "Operator": 15,
+    "Punctuation": 0,
+    "Name.Function": (13, curses.A_BOLD),
+    "Name.Class": (6, curses.A_BOLD),
+    "Name.Builtin": 4,
+    "Name.Variable": 8,
+    "Name.Decorator": 9,
+    "Name.Constant": 10,
+    "Name.Tag": 1,
+    "Name.Attribute": 6,
+}
@@ -0,0 +1,34 @@
+import unittest
+
+from pygments.lexers import JavascriptLexer
+
+from ecte.longline import LEX_WINDOW, SegmentedLine, window_tokens
+
+
+def token_types(tokens):
+    return [ttype for ttype, value in tokens for _ in value]
+
+
+class WindowTokensTest(unittest.TestCase):
+    def test_edit_at_checkpoint_offset(self):
+        """Uma edição exatamente num ponto de retomada descarta o ponto (a linha vira um comentário //)."""
+        lexer = JavascriptLexer()
+        text = "var a = 1; " * 1500
+        line = SegmentedLine(text)
+        window_tokens(line, lexer, 12000, 12200) # Cria os pontos de retomada até a janela
+        checkpoint = next(offset for offset in line.lex_offsets if offset >= LEX_WINDOW)
+
+        line.replace(checkpoint - 1, checkpoint, "/") # Divisão: o ponto continua um início de token
+        window_tokens(line, lexer, 12000, 12200)
+        self.assertIn(checkpoint, line.lex_offsets)
+        line.replace(checkpoint, checkpoint, "/") # Agora '//' começa antes do ponto e o atravessa
+        text = line.text()
+
+        expected = list(lexer.get_tokens_unprocessed(text))
+        reference = [(ttype, value[max(0, 12000 - pos):12200 - pos])
+                     for pos, ttype, value in expected if pos < 12200 and pos + len(value) > 12000]
+        self.assertEqual(token_types(window_tokens(line, lexer, 12000, 12200)), token_types(reference))
+
+
+if __name__ == "__main__":
+    unittest.main()